@@ -69,18 +69,8 @@ class OBV(BaseIndicator):
         close = self._get_column(df, "close")
         volume = self._get_column(df, "volume")
 
-        # Calculate price changes
-        close_diff = close.diff()
-
-        # Assign signed volume
-        signed_volume = pd.Series(index=df.index, dtype=float)
-        signed_volume[close_diff > 0] = volume[close_diff > 0]
-        signed_volume[close_diff < 0] = -volume[close_diff < 0]
-        signed_volume[close_diff == 0] = 0
-        signed_volume.iloc[0] = volume.iloc[0]  # First value
-
-        # Cumulative sum
-        obv = signed_volume.cumsum()
+        # Cumulative signed volume
+        obv = calculate_obv(close, volume)
 
         # Create result
         if self.signal_period:
@@ -147,13 +137,7 @@ class OBVDivergence(BaseIndicator):
         volume = self._get_column(df, "volume")
 
         # Calculate OBV
-        close_diff = close.diff()
-        signed_volume = pd.Series(index=df.index, dtype=float)
-        signed_volume[close_diff > 0] = volume[close_diff > 0]
-        signed_volume[close_diff < 0] = -volume[close_diff < 0]
-        signed_volume[close_diff == 0] = 0
-        signed_volume.iloc[0] = volume.iloc[0]
-        obv = signed_volume.cumsum()
+        obv = calculate_obv(close, volume)
 
         # Rolling min/max for detecting divergences
         price_min = close.rolling(window=self.lookback).min()
@@ -182,6 +166,38 @@ class OBVDivergence(BaseIndicator):
             params={"lookback": self.lookback},
         )
 
+    def calculate_tail(
+        self,
+        df: pd.DataFrame,
+        tail: int = 10,
+    ) -> IndicatorResult:
+        """
+        Detect OBV divergences for the most recent bars only.
+
+        A bar's signal compares it with rolling extremes over the previous
+        ``lookback`` bars, and OBV enters only through differences inside
+        that window (its starting level cancels out). The last
+        ``tail + lookback - 1`` bars therefore give the same signals as
+        ``calculate`` on the full history, at a cost independent of its length.
+
+        Args:
+            df: DataFrame with close and volume columns
+            tail: Number of most recent bars to return
+
+        Returns:
+            IndicatorResult with divergence signals for the last ``tail`` bars
+            (the OBV column is accumulated from the start of the window)
+        """
+        validate_period(tail)
+        window = tail + self.lookback - 1
+        result_df = self.calculate(df.iloc[-window:]).values.iloc[-tail:]
+
+        return IndicatorResult(
+            name="OBV_Divergence",
+            values=result_df,
+            params={"lookback": self.lookback, "tail": tail},
+        )
+
 
 def calculate_obv(
     close: pd.Series,
@@ -199,11 +215,12 @@ def calculate_obv(
     Returns:
         OBV series
     """
-    close_diff = close.diff()
-    signed_volume = pd.Series(index=close.index, dtype=float)
-    signed_volume[close_diff > 0] = volume[close_diff > 0]
-    signed_volume[close_diff < 0] = -volume[close_diff < 0]
-    signed_volume[close_diff == 0] = 0
-    signed_volume.iloc[0] = volume.iloc[0]
+    # sign(diff) * volume in one vectorized pass: +volume on up bars,
+    # -volume on down bars, 0 on flat bars, NaN where the diff is NaN
+    close_diff = close.diff().to_numpy(dtype=np.float64)
+    volume_values = volume.to_numpy(dtype=np.float64)
+    signed = np.where(close_diff == 0, 0.0, np.sign(close_diff) * volume_values)
+    signed[0] = volume_values[0]
+    signed_volume = pd.Series(signed, index=close.index)
 
     return signed_volume.cumsum()
@@ -111,6 +111,32 @@ class VCPConfig:
     weight_pivot: float = 15.0
 
 
+def _window_extreme_indices(values: np.ndarray, period: int, highs: bool) -> list[int]:
+    """
+    Find bars that are the extreme of their centered window.
+
+    Returns each index i in [period, len - period) where values[i] equals the
+    max (highs) or min (lows) of values[i - period : i + period + 1]. All
+    window extremes come from one sliding-window reduction instead of a
+    pandas slice per bar; fmax/fmin skip NaN like Series.max/min.
+
+    Args:
+        values: Price array (or Series)
+        period: Bars on each side of the center
+        highs: True for window maxima, False for minima
+
+    Returns:
+        Ascending list of matching indices
+    """
+    arr = np.asarray(values, dtype=np.float64)
+    n = len(arr)
+    if n < 2 * period + 1:
+        return []
+    windows = np.lib.stride_tricks.sliding_window_view(arr, 2 * period + 1)
+    extremes = (np.fmax if highs else np.fmin).reduce(windows, axis=1)
+    return (np.flatnonzero(arr[period : n - period] == extremes) + period).tolist()
+
+
 class VCP(BaseIndicator):
     """
     VCP (Volatility Contraction Pattern) indicator.
@@ -150,16 +176,25 @@ class VCP(BaseIndicator):
 
         Args:
             df: DataFrame with OHLCV data
+            arrays: Optional float64 column arrays of df keyed by capitalized
+                name (as built by ``ohlcv_arrays``); reused instead of
+                extracting the columns again
 
         Returns:
             IndicatorResult with VCPResult as values
         """
         self._validate_dataframe(df, ["high", "low", "close", "volume"])
 
-        high = self._get_column(df, "high")
-        low = self._get_column(df, "low")
-        close = self._get_column(df, "close")
-        volume = self._get_column(df, "volume")
+        arrays = kwargs.get("arrays")
+        if arrays is None:
+            arrays = {
+                col.capitalize(): self._get_column(df, col).to_numpy(dtype=np.float64)
+                for col in ("high", "low", "close", "volume")
+            }
+        high = arrays["High"]
+        low = arrays["Low"]
+        close = arrays["Close"]
+        volume = arrays["Volume"]
 
         # Detect VCP pattern
         vcp_result = self._detect_vcp(high, low, close, volume)
@@ -172,10 +207,10 @@ class VCP(BaseIndicator):
 
     def _detect_vcp(
         self,
-        high: pd.Series,
-        low: pd.Series,
-        close: pd.Series,
-        volume: pd.Series,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
     ) -> VCPResult:
         """
         Detect VCP pattern in the data.
@@ -233,7 +268,7 @@ class VCP(BaseIndicator):
         # Step 6: Find pivot price
         result.pivot_price = self._find_pivot_price(high, contractions)
         if result.pivot_price:
-            current_price = close.iloc[-1]
+            current_price = close[-1]
             result.pivot_distance_pct = (
                 (result.pivot_price - current_price) / current_price * 100
             )
@@ -250,43 +285,35 @@ class VCP(BaseIndicator):
 
         return result
 
-    def _find_swing_highs(self, high: pd.Series) -> list[int]:
+    def _find_swing_highs(self, high: np.ndarray) -> list[int]:
         """Find swing high indices."""
         swing_highs = []
         period = self.config.swing_period
 
-        for i in range(period, len(high) - period):
-            if high.iloc[i] == high.iloc[i - period : i + period + 1].max():
-                # Ensure minimum distance from previous swing
-                if (
-                    not swing_highs
-                    or i - swing_highs[-1] >= self.config.min_swing_distance
-                ):
-                    swing_highs.append(i)
+        for i in _window_extreme_indices(high, period, highs=True):
+            # Ensure minimum distance from previous swing
+            if not swing_highs or i - swing_highs[-1] >= self.config.min_swing_distance:
+                swing_highs.append(i)
 
         return swing_highs
 
-    def _find_swing_lows(self, low: pd.Series) -> list[int]:
+    def _find_swing_lows(self, low: np.ndarray) -> list[int]:
         """Find swing low indices."""
         swing_lows = []
         period = self.config.swing_period
 
-        for i in range(period, len(low) - period):
-            if low.iloc[i] == low.iloc[i - period : i + period + 1].min():
-                if (
-                    not swing_lows
-                    or i - swing_lows[-1] >= self.config.min_swing_distance
-                ):
-                    swing_lows.append(i)
+        for i in _window_extreme_indices(low, period, highs=False):
+            if not swing_lows or i - swing_lows[-1] >= self.config.min_swing_distance:
+                swing_lows.append(i)
 
         return swing_lows
 
     def _detect_contractions(
         self,
-        high: pd.Series,
-        low: pd.Series,
-        close: pd.Series,
-        volume: pd.Series,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
         swing_highs: list[int],
         swing_lows: list[int],
     ) -> list[Contraction]:
@@ -305,8 +332,8 @@ class VCP(BaseIndicator):
             return contractions
 
         # Find the base high (highest swing high)
-        base_high_idx = max(relevant_highs, key=lambda x: high.iloc[x])
-        base_high_price = high.iloc[base_high_idx]
+        base_high_idx = max(relevant_highs, key=high.__getitem__)
+        base_high_price = high[base_high_idx]
 
         # Track contractions after the base high
         current_high_idx = base_high_idx
@@ -319,7 +346,7 @@ class VCP(BaseIndicator):
             if low_idx <= current_high_idx:
                 continue
 
-            low_price = low.iloc[low_idx]
+            low_price = low[low_idx]
 
             # Calculate contraction depth
             depth_pct = (current_high_price - low_price) / current_high_price * 100
@@ -327,7 +354,7 @@ class VCP(BaseIndicator):
             # Check if valid contraction
             if depth_pct >= self.config.min_depth_pct:
                 # Calculate average volume during contraction
-                avg_vol = volume.iloc[current_high_idx : low_idx + 1].mean()
+                avg_vol = np.nanmean(volume[current_high_idx : low_idx + 1])
 
                 contraction = Contraction(
                     start_idx=current_high_idx,
@@ -345,7 +372,7 @@ class VCP(BaseIndicator):
                 if next_highs:
                     # Use the first swing high that's higher than previous lows
                     for next_high_idx in next_highs:
-                        next_high_price = high.iloc[next_high_idx]
+                        next_high_price = high[next_high_idx]
                         # The next high should be above the current low
                         if next_high_price > low_price:
                             current_high_idx = next_high_idx
@@ -370,7 +397,7 @@ class VCP(BaseIndicator):
         return True
 
     def _analyze_volume_trend(
-        self, volume: pd.Series, contractions: list[Contraction]
+        self, volume: np.ndarray, contractions: list[Contraction]
     ) -> float:
         """
         Analyze volume trend during contractions.
@@ -393,8 +420,8 @@ class VCP(BaseIndicator):
 
     def _analyze_range_contraction(
         self,
-        high: pd.Series,
-        low: pd.Series,
+        high: np.ndarray,
+        low: np.ndarray,
         contractions: list[Contraction],
     ) -> float:
         """
@@ -409,8 +436,8 @@ class VCP(BaseIndicator):
         # Calculate range for each contraction period
         ranges = []
         for c in contractions:
-            period_high = high.iloc[c.start_idx : c.end_idx + 1].max()
-            period_low = low.iloc[c.start_idx : c.end_idx + 1].min()
+            period_high = np.nanmax(high[c.start_idx : c.end_idx + 1])
+            period_low = np.nanmin(low[c.start_idx : c.end_idx + 1])
             range_pct = (period_high - period_low) / period_high * 100
             ranges.append(range_pct)
 
@@ -422,7 +449,7 @@ class VCP(BaseIndicator):
         return 0.0
 
     def _find_pivot_price(
-        self, high: pd.Series, contractions: list[Contraction]
+        self, high: np.ndarray, contractions: list[Contraction]
     ) -> Optional[float]:
         """
         Find the pivot/breakout price level.
@@ -21,22 +21,45 @@ Usage:
 """
 
 import logging
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import date
 from pathlib import Path
-from typing import Optional, Union
+from typing import Iterator, Optional, Union
 
+import matplotlib
+import matplotlib.pyplot as plt
 import mplfinance as mpf
+import numpy as np
 import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from numpy.lib.stride_tricks import sliding_window_view
 
 from .styles import DARK_STYLE, ChartStyle, get_style
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+def _moving_average(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Simple moving average aligned with ``pd.Series.rolling(period).mean()``.
+
+    Args:
+        values: 1-D array of prices
+        period: Window length
+
+    Returns:
+        Array of the same length, with NaN for the first ``period - 1`` rows
+    """
+    ma = np.full(len(values), np.nan)
+    if period <= len(values):
+        ma[period - 1 :] = sliding_window_view(values, period).mean(axis=1)
+    return ma
+
+
+@dataclass(frozen=True, slots=True)
 class ChartConfig:
-    """Configuration for chart generation."""
+    """Configuration for chart generation (immutable, shared across a batch)."""
 
     # Moving averages to display
     ma_periods: list[int] = field(default_factory=lambda: [5, 10, 20, 60])
@@ -104,6 +127,106 @@ class ChartGenerator:
         # Create mplfinance style
         self._mpf_style = mpf.make_mpf_style(**self.style.to_mpf_style())
 
+        # rcParams for the current style, built on first use
+        self._rc: Optional[dict] = None
+        self._style_active = False
+
+    def __getstate__(self) -> dict:
+        """Reset the active-style flag when pickling (e.g. for render workers)."""
+        state = self.__dict__.copy()
+        state["_style_active"] = False
+        return state
+
+    def rc_for_style(
+        self,
+        style: Optional[Union[str, ChartStyle]] = None,
+    ) -> dict:
+        """
+        Build the matplotlib rcParams for a chart style.
+
+        Mirrors what mplfinance applies globally before every plot, so the
+        result can be installed once with ``plt.rc_context`` around a batch.
+
+        Args:
+            style: Style name or ChartStyle instance (default: current style)
+
+        Returns:
+            Dict of rcParams
+        """
+        if style is None or style == self.style.name or style is self.style:
+            if self._rc is None:
+                self._rc = self._build_rc(self._mpf_style)
+            return self._rc
+
+        if isinstance(style, str):
+            style = get_style(style)
+        return self._build_rc(mpf.make_mpf_style(**style.to_mpf_style()))
+
+    @contextmanager
+    def style_context(
+        self,
+        style: Optional[Union[str, ChartStyle]] = None,
+    ) -> Iterator[None]:
+        """
+        Apply the chart style's rcParams for the duration of a block.
+
+        Nested calls (e.g. ``generate()`` inside a batch) reuse the outer
+        context instead of re-applying the style per chart.
+
+        Args:
+            style: Style name or ChartStyle instance (default: current style)
+        """
+        if self._style_active:
+            yield
+            return
+
+        with plt.rc_context(self.rc_for_style(style)):
+            self._style_active = True
+            try:
+                yield
+            finally:
+                self._style_active = False
+
+    @staticmethod
+    def _build_rc(mpf_style: dict) -> dict:
+        """Flatten an mplfinance style into plain rcParams."""
+        rc = dict(matplotlib.rcParamsDefault)
+        base = mpf_style.get("base_mpl_style")
+        if base:
+            rc.update(matplotlib.style.library.get(base, {}))
+        rc.update(mpf_style.get("rc") or {})
+
+        if mpf_style.get("facecolor") is not None:
+            rc["axes.facecolor"] = mpf_style["facecolor"]
+        if mpf_style.get("edgecolor") is not None:
+            rc["axes.edgecolor"] = mpf_style["edgecolor"]
+        if mpf_style.get("figcolor") is not None:
+            rc["figure.facecolor"] = mpf_style["figcolor"]
+            rc["savefig.facecolor"] = mpf_style["figcolor"]
+
+        explicit_grid = False
+        if mpf_style.get("gridcolor") is not None:
+            explicit_grid = True
+            rc["grid.color"] = mpf_style["gridcolor"]
+        if mpf_style.get("gridstyle") is not None:
+            explicit_grid = True
+            rc["grid.linestyle"] = mpf_style["gridstyle"]
+
+        rc["axes.grid.axis"] = "both"
+        gridaxis = mpf_style.get("gridaxis")
+        if gridaxis:
+            explicit_grid = True
+            if "horizontal".startswith(gridaxis):
+                rc["axes.grid.axis"] = "y"
+            elif "vertical".startswith(gridaxis):
+                rc["axes.grid.axis"] = "x"
+        if explicit_grid:
+            rc["axes.grid"] = True
+
+        # Leave the active backend alone
+        rc.pop("backend", None)
+        return rc
+
     def generate(
         self,
         df: pd.DataFrame,
@@ -136,12 +259,42 @@ class ChartGenerator:
         if df.empty:
             raise ValueError("DataFrame is empty after filtering")
 
-        # Calculate moving averages if needed
+        plot_kwargs = self._plot_kwargs(df, title, config)
+
+        if show and not output_path:
+            mpf.plot(df, **plot_kwargs)
+            return None
+
+        if output_path:
+            output_path = Path(output_path)
+        else:
+            # Generate with default filename
+            output_path = self.output_dir / self._generate_filename(df, title)
+
+        with self.style_context():
+            # mplfinance lays out the panels; the figure is then detached
+            # from pyplot and printed through a headless Agg canvas
+            fig, _ = mpf.plot(df, **plot_kwargs, returnfig=True, closefig=True)
+            FigureCanvasAgg(fig).print_figure(
+                str(output_path),
+                format="png",
+                dpi=config.dpi,
+                bbox_inches="tight",
+            )
+        logger.info(f"Chart saved to {output_path}")
+        return output_path
+
+    def _plot_kwargs(
+        self,
+        df: pd.DataFrame,
+        title: str,
+        config: ChartConfig,
+    ) -> dict:
+        """Build the mplfinance plot kwargs for a prepared DataFrame."""
         add_plots = []
         if config.show_ma:
             add_plots.extend(self._create_ma_plots(df, config.ma_periods))
 
-        # Build plot kwargs
         plot_kwargs = {
             "type": "candle",
             "style": self._mpf_style,
@@ -155,32 +308,7 @@ class ChartGenerator:
         if add_plots:
             plot_kwargs["addplot"] = add_plots
 
-        # Generate chart
-        if output_path:
-            output_path = Path(output_path)
-            plot_kwargs["savefig"] = {
-                "fname": str(output_path),
-                "dpi": config.dpi,
-                "bbox_inches": "tight",
-            }
-            mpf.plot(df, **plot_kwargs)
-            logger.info(f"Chart saved to {output_path}")
-            return output_path
-        elif show:
-            mpf.plot(df, **plot_kwargs)
-            return None
-        else:
-            # Generate with default filename
-            filename = self._generate_filename(df, title)
-            output_path = self.output_dir / filename
-            plot_kwargs["savefig"] = {
-                "fname": str(output_path),
-                "dpi": config.dpi,
-                "bbox_inches": "tight",
-            }
-            mpf.plot(df, **plot_kwargs)
-            logger.info(f"Chart saved to {output_path}")
-            return output_path
+        return plot_kwargs
 
     def generate_from_klines(
         self,
@@ -225,20 +353,21 @@ class ChartGenerator:
         output_dir.mkdir(parents=True, exist_ok=True)
 
         results = {}
-        for code, df in data_dict.items():
-            try:
-                output_path = output_dir / f"{code.replace('.', '_')}.png"
-                path = self.generate(
-                    df,
-                    title=code,
-                    output_path=output_path,
-                    config=config,
-                )
-                if path:
-                    results[code] = path
-            except Exception as e:
-                logger.error(f"Failed to generate chart for {code}: {e}")
-                continue
+        with self.style_context():
+            for code, df in data_dict.items():
+                try:
+                    output_path = output_dir / f"{code.replace('.', '_')}.png"
+                    path = self.generate(
+                        df,
+                        title=code,
+                        output_path=output_path,
+                        config=config,
+                    )
+                    if path:
+                        results[code] = path
+                except Exception as e:
+                    logger.error(f"Failed to generate chart for {code}: {e}")
+                    continue
 
         return results
 
@@ -308,6 +437,7 @@ class ChartGenerator:
     ) -> list:
         """Create moving average plot overlays."""
         add_plots = []
+        close = df["close"].to_numpy(dtype=float)
 
         for period in ma_periods:
             if len(df) < period:
@@ -317,7 +447,7 @@ class ChartGenerator:
 
             # Calculate MA if not present
             if ma_col not in df.columns:
-                df[ma_col] = df["close"].rolling(window=period).mean()
+                df[ma_col] = _moving_average(close, period)
 
             # Skip if all NaN
             if df[ma_col].isna().all():
@@ -387,6 +517,7 @@ class ChartGenerator:
         else:
             self.style = style
         self._mpf_style = mpf.make_mpf_style(**self.style.to_mpf_style())
+        self._rc = None
 
 
 def create_chart_generator(
@@ -27,8 +27,9 @@ class DatabaseSettings:
             "DATABASE_URL", "postgresql://localhost:5432/investment_db"
         )
     )
-    pool_size: int = 5
+    pool_size: int = 10
     max_overflow: int = 10
+    pool_recycle: int = 1800  # seconds; recycle before server-side idle timeouts
     echo: bool = field(
         default_factory=lambda: os.getenv("DB_ECHO", "").lower() == "true"
     )
@@ -50,6 +51,7 @@ class KlineSettings:
 
     default_days: int = 250
     cache_hours: int = 4
+    cache_dir: Path = field(default_factory=lambda: PROJECT_ROOT / ".cache" / "kline")
     markets: tuple = ("HK", "US", "A", "JP")
 
 
@@ -8,18 +8,41 @@ from contextlib import contextmanager
 from typing import Generator
 
 from sqlalchemy import create_engine, event, text
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import Session, sessionmaker
 
 from config import settings
 
+
+def _pool_options(url: str) -> dict:
+    """
+    Get connection pool options for a database URL.
+
+    Server databases get a sized QueuePool whose connections are health
+    checked and recycled, so sessions reuse warm connections. SQLite keeps
+    SQLAlchemy's default pool, which rejects the sizing arguments.
+
+    Args:
+        url: Database URL
+
+    Returns:
+        Keyword arguments for create_engine
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.database.pool_size,
+        "max_overflow": settings.database.max_overflow,
+        "pool_recycle": settings.database.pool_recycle,
+        "pool_pre_ping": True,  # Enable connection health checks
+    }
+
+
 # Create engine with connection pooling
 engine = create_engine(
     settings.database.url,
-    pool_size=settings.database.pool_size,
-    max_overflow=settings.database.max_overflow,
     echo=settings.database.echo,
-    pool_pre_ping=True,  # Enable connection health checks
+    **_pool_options(settings.database.url),
 )
 
 # Session factory
@@ -0,0 +1,61 @@
+-- Investment Analyzer Migration 001
+-- Date: 2026-10-17
+--
+-- Give the sync tables' unique constraints the names used by the ORM models.
+--
+-- Databases created from an older init_schema.sql got PostgreSQL's generated
+-- names (e.g. positions_account_id_snapshot_date_market_code_key). The sync
+-- service upserts with INSERT ... ON CONFLICT ON CONSTRAINT uq_..., which
+-- requires the named constraints. Each unique constraint is backed by a
+-- unique index on the same columns, so the per-row existence lookups in the
+-- sync loops are index probes.
+--
+-- Idempotent: generated names are renamed, missing constraints are created,
+-- already named constraints are left alone.
+--
+-- Usage:
+--   python scripts/init_db.py migrate
+
+DO $$
+DECLARE
+    spec RECORD;
+BEGIN
+    FOR spec IN
+        SELECT * FROM (VALUES
+            ('positions',
+             'positions_account_id_snapshot_date_market_code_key',
+             'uq_positions_account_date_code',
+             'account_id, snapshot_date, market, code'),
+            ('trades',
+             'trades_account_id_deal_id_key',
+             'uq_trades_account_deal',
+             'account_id, deal_id'),
+            ('account_snapshots',
+             'account_snapshots_account_id_snapshot_date_key',
+             'uq_account_snapshots_account_date',
+             'account_id, snapshot_date'),
+            ('klines',
+             'klines_market_code_trade_date_key',
+             'uq_klines_market_code_date',
+             'market, code, trade_date')
+        ) AS t(table_name, generated_name, constraint_name, columns)
+    LOOP
+        IF EXISTS (
+            SELECT 1 FROM pg_constraint WHERE conname = spec.constraint_name
+        ) THEN
+            CONTINUE;
+        ELSIF EXISTS (
+            SELECT 1 FROM pg_constraint WHERE conname = spec.generated_name
+        ) THEN
+            EXECUTE format(
+                'ALTER TABLE %I RENAME CONSTRAINT %I TO %I',
+                spec.table_name, spec.generated_name, spec.constraint_name
+            );
+        ELSE
+            EXECUTE format(
+                'ALTER TABLE %I ADD CONSTRAINT %I UNIQUE (%s)',
+                spec.table_name, spec.constraint_name, spec.columns
+            );
+        END IF;
+    END LOOP;
+END $$;
@@ -87,7 +87,7 @@ CREATE TABLE positions (
     pl_ratio DECIMAL(10,4),
     position_side VARCHAR(10) DEFAULT 'LONG',
     created_at TIMESTAMP DEFAULT NOW(),
-    UNIQUE(account_id, snapshot_date, market, code)
+    CONSTRAINT uq_positions_account_date_code UNIQUE(account_id, snapshot_date, market, code)
 );
 
 CREATE INDEX idx_positions_account_date ON positions(account_id, snapshot_date DESC);
@@ -117,7 +117,7 @@ CREATE TABLE trades (
     fee DECIMAL(18,4),
     currency VARCHAR(10),
     created_at TIMESTAMP DEFAULT NOW(),
-    UNIQUE(account_id, deal_id)
+    CONSTRAINT uq_trades_account_deal UNIQUE(account_id, deal_id)
 );
 
 CREATE INDEX idx_trades_account_time ON trades(account_id, trade_time DESC);
@@ -142,7 +142,7 @@ CREATE TABLE account_snapshots (
     max_power_short DECIMAL(18,2),
     currency VARCHAR(10),
     created_at TIMESTAMP DEFAULT NOW(),
-    UNIQUE(account_id, snapshot_date)
+    CONSTRAINT uq_account_snapshots_account_date UNIQUE(account_id, snapshot_date)
 );
 
 CREATE INDEX idx_account_snapshots_date ON account_snapshots(account_id, snapshot_date DESC);
@@ -172,7 +172,7 @@ CREATE TABLE klines (
     obv BIGINT,
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW(),
-    UNIQUE(market, code, trade_date)
+    CONSTRAINT uq_klines_market_code_date UNIQUE(market, code, trade_date)
 );
 
 CREATE INDEX idx_klines_code_date ON klines(market, code, trade_date DESC);
@@ -10,6 +10,7 @@ Futu OpenD must be running locally for HK/A-share primary path.
 
 import logging
 import re
+import threading
 from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
@@ -109,6 +110,7 @@ class KlineFetcher:
         self.futu_port = futu_port
         self.futu_timeout = futu_timeout
         self._futu_ctx = None
+        self._futu_ctx_lock = threading.Lock()
 
     def fetch(
         self,
@@ -213,29 +215,49 @@ class KlineFetcher:
         codes: list[str],
         days: Optional[int] = None,
         adjust: str = "qfq",
+        max_workers: int = 4,
     ) -> dict[str, KlineFetchResult]:
         """
         Fetch K-line data for multiple stocks.
 
+        Futu's history K-line API and akshare both take a single code per
+        request, so a batch is still one request per unique code; these are
+        issued concurrently over the shared Futu quote context.
+
         Args:
-            codes: List of stock codes
+            codes: List of stock codes (duplicates are fetched once)
             days: Number of days to fetch
             adjust: Price adjustment type
+            max_workers: Maximum concurrent requests (1 = sequential)
 
         Returns:
-            Dict mapping code to KlineFetchResult
+            Dict mapping code to KlineFetchResult, in input order
         """
-        results = {}
-        for code in codes:
-            results[code] = self.fetch(code, days=days, adjust=adjust)
-        return results
+        unique_codes = list(dict.fromkeys(codes))
+        workers = min(max_workers, len(unique_codes))
+        if workers <= 1:
+            return {
+                code: self.fetch(code, days=days, adjust=adjust)
+                for code in unique_codes
+            }
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                code: executor.submit(self.fetch, code, days=days, adjust=adjust)
+                for code in unique_codes
+            }
+            return {code: future.result() for code, future in futures.items()}
 
     def _get_futu_ctx(self):
-        """Get or create Futu OpenQuoteContext (lazy initialization)."""
+        """Get or create Futu OpenQuoteContext (lazy, thread-safe initialization)."""
         if self._futu_ctx is None:
-            from futu import OpenQuoteContext
+            with self._futu_ctx_lock:
+                if self._futu_ctx is None:
+                    from futu import OpenQuoteContext
 
-            self._futu_ctx = OpenQuoteContext(host=self.futu_host, port=self.futu_port)
+                    self._futu_ctx = OpenQuoteContext(
+                        host=self.futu_host, port=self.futu_port
+                    )
         return self._futu_ctx
 
     def _close_futu_ctx(self):
@@ -448,9 +448,10 @@ def chart_single(
     type=click.Choice(["dark", "light", "chinese", "western"]),
     help="图表样式",
 )
-def chart_watchlist(user: str, days: int, style: str):
+@click.option("--workers", default=4, help="并行渲染进程数")
+def chart_watchlist(user: str, days: int, style: str, workers: int):
     """为关注列表生成图表"""
-    from services import BatchChartConfig, ChartService
+    from services import BatchChartConfig, ChartService, KlineCache
 
     click.echo(f"Generating charts for {user}'s watchlist...")
 
@@ -460,8 +461,12 @@ def chart_watchlist(user: str, days: int, style: str):
         sys.exit(1)
 
     try:
-        config = BatchChartConfig(days=days, style=style, output_subdir=user)
-        service = ChartService(output_dir=settings.chart.output_dir)
+        config = BatchChartConfig(
+            days=days, style=style, output_subdir=user, render_workers=workers
+        )
+        service = ChartService(
+            output_dir=settings.chart.output_dir, kline_cache=KlineCache()
+        )
         result = service.generate_watchlist_charts(
             user_id=db_user.id,
             config=config,
@@ -497,9 +502,10 @@ def chart_watchlist(user: str, days: int, style: str):
     type=click.Choice(["dark", "light", "chinese", "western"]),
     help="图表样式",
 )
-def chart_positions(user: str, days: int, style: str):
+@click.option("--workers", default=4, help="并行渲染进程数")
+def chart_positions(user: str, days: int, style: str, workers: int):
     """为持仓股票生成图表"""
-    from services import BatchChartConfig, ChartService
+    from services import BatchChartConfig, ChartService, KlineCache
 
     click.echo(f"Generating charts for {user}'s positions...")
 
@@ -510,9 +516,14 @@ def chart_positions(user: str, days: int, style: str):
 
     try:
         config = BatchChartConfig(
-            days=days, style=style, output_subdir=f"{user}/positions"
+            days=days,
+            style=style,
+            output_subdir=f"{user}/positions",
+            render_workers=workers,
+        )
+        service = ChartService(
+            output_dir=settings.chart.output_dir, kline_cache=KlineCache()
         )
-        service = ChartService(output_dir=settings.chart.output_dir)
         result = service.generate_position_charts(
             user_id=db_user.id,
             config=config,
@@ -920,7 +931,7 @@ def db_migrate(direction: str):
 
     # TODO: Implement proper migration system (e.g., Alembic)
     click.echo("Note: Migration system not yet implemented.")
-    click.echo("Use 'python scripts/init_db.py' for now.")
+    click.echo("Use 'python scripts/init_db.py migrate' to apply SQL migrations.")
 
 
 # =============================================================================
@@ -1754,7 +1765,7 @@ def export():
 @click.option(
     "--format",
     "-f",
-    type=click.Choice(["csv", "xlsx", "json"]),
+    type=click.Choice(["csv", "xlsx", "json", "ndjson", "parquet", "feather"]),
     default="csv",
     help="导出格式",
 )
@@ -1808,7 +1819,7 @@ def export_positions_cmd(user: str, format: str, output: str):
 @click.option(
     "--format",
     "-f",
-    type=click.Choice(["csv", "xlsx", "json"]),
+    type=click.Choice(["csv", "xlsx", "json", "ndjson", "parquet", "feather"]),
     default="csv",
     help="导出格式",
 )
@@ -1881,7 +1892,7 @@ def export_trades_cmd(
 @click.option(
     "--format",
     "-f",
-    type=click.Choice(["csv", "xlsx", "json"]),
+    type=click.Choice(["csv", "xlsx", "json", "ndjson", "parquet", "feather"]),
     default="csv",
     help="导出格式",
 )
@@ -1941,7 +1952,7 @@ def export_klines_cmd(
 @click.option(
     "--format",
     "-f",
-    type=click.Choice(["csv", "xlsx", "json"]),
+    type=click.Choice(["csv", "xlsx", "json", "ndjson", "parquet", "feather"]),
     default="csv",
     help="导出格式",
 )
@@ -3281,16 +3292,19 @@ def contract_sync(user: str):
 
         service = DerivativeService(session)
         synced = 0
+        existing = service.get_contracts([(m, c) for m, c, _ in derivatives])
 
         for market, code, stock_name in derivatives:
-            existing = service.get_contract(market, code)
-            if existing:
+            if (market, code) in existing:
                 continue
 
-            contract = service.auto_populate_from_code(market, code, stock_name)
+            contract = service.auto_populate_from_code(
+                market, code, stock_name, commit=False
+            )
             if contract:
                 synced += 1
 
+        service.commit()
         print_success(f"同步完成: 新增 {synced} 条合约记录")
 
 
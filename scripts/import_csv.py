@@ -521,12 +521,12 @@ def import_trades(
                         )
                         fee = parse_decimal(row.get(fee_col)) if fee_col else None
 
-                        # Check if exists
-                        existing = (
+                        # Check if exists (SELECT EXISTS, no Trade row loaded)
+                        existing = session.query(
                             session.query(Trade)
                             .filter_by(account_id=account_id, deal_id=deal_id)
-                            .first()
-                        )
+                            .exists()
+                        ).scalar()
 
                         if existing:
                             result.skipped += 1
@@ -24,6 +24,9 @@ Usage:
 
     # Create database (PostgreSQL only)
     python scripts/init_db.py create-db
+
+    # Apply SQL migrations (db/migrations/NNN_*.sql) to an existing database
+    python scripts/init_db.py migrate
 """
 
 import sys
@@ -47,6 +50,12 @@ def get_db_name_from_url(url: str) -> str:
     return url.rsplit("/", 1)[-1].split("?")[0]
 
 
+def get_migration_files() -> list[Path]:
+    """Get numbered SQL migration files (NNN_*.sql) in apply order."""
+    migrations_dir = project_root / "db" / "migrations"
+    return sorted(migrations_dir.glob("[0-9][0-9][0-9]_*.sql"))
+
+
 def get_server_url(url: str) -> str:
     """Get server URL without database name (for creating database)."""
     # Connect to 'postgres' database to create new database
@@ -165,6 +174,28 @@ def reset(yes: bool):
     click.echo("Database reset complete.")
 
 
+@cli.command()
+def migrate():
+    """Apply SQL migrations to an existing database."""
+    if not check_connection():
+        click.echo("Error: Cannot connect to database.", err=True)
+        sys.exit(1)
+
+    files = get_migration_files()
+    if not files:
+        click.echo("No migrations found.")
+        return
+
+    # Migrations are idempotent, so every file is applied on each run
+    with engine.connect() as conn:
+        for sql_file in files:
+            click.echo(f"Applying {sql_file.name}...")
+            conn.execute(text(sql_file.read_text()))
+        conn.commit()
+
+    click.echo(f"Applied {len(files)} migration(s).")
+
+
 @cli.command("create-db")
 @click.option("--name", default=None, help="Database name (default from DATABASE_URL)")
 def create_db(name: str):
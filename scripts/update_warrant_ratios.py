@@ -3,13 +3,19 @@
 通过正股代码查询窝轮列表，按 strike_price 和 maturity_time 匹配
 """
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 from decimal import Decimal
 
+import pandas as pd
 from futu import OpenQuoteContext, RET_OK, SecurityType, Market
 
 from db import get_session, DerivativeContract
 
+# get_warrant 请求节流间隔 (秒) 与最大并发数
+WARRANT_REQUEST_INTERVAL = 0.3
+WARRANT_WORKERS = 4
+
 
 def update_warrant_ratios():
     """更新港股窝轮换股比率"""
@@ -61,49 +67,53 @@ def update_warrant_ratios():
             print(f"获取基本信息失败: {basicinfo}")
             return
 
-        # 建立正股映射
-        code_to_owner = {}
-        for _, row in basicinfo.iterrows():
-            code = row['code'].replace('HK.', '')
-            owner = row.get('stock_owner', '')
-            if owner:
-                code_to_owner[code] = owner
-
-        # 获取唯一的正股列表
-        owners = list(set(code_to_owner.values()))
+        # 建立正股映射 (向量化一次完成, 正股列表保持首次出现顺序)
+        owner_col = basicinfo.get(
+            'stock_owner', pd.Series('', index=basicinfo.index)
+        ).fillna('')
+        mask = owner_col.astype(bool)
+        stripped = basicinfo.loc[mask, 'code'].str.replace('HK.', '', regex=False)
+        code_to_owner = dict(zip(stripped, owner_col[mask]))
+        owners = owner_col[mask].unique().tolist()
         print(f"涉及 {len(owners)} 个正股")
 
         # 4. 查询每个正股的窝轮列表
+        # get_warrant 只接受单个正股, 且 OpenD 没有异步接口: 按原有 0.3s
+        # 间隔发出请求, 但不再等待上一个响应返回, 让网络等待相互重叠
         all_warrants = []
-        for owner in owners:
-            print(f"\n查询 {owner} 的窝轮...")
-            ret, result = ctx.get_warrant(stock_owner=owner)
-            if ret != RET_OK:
-                print(f"  获取失败")
-                continue
-
-            df, has_next, total = result
-            print(f"  找到 {total} 个窝轮")
-
-            for _, row in df.iterrows():
-                # 解析到期日
-                maturity = row.get('maturity_time', '')
-                try:
-                    expiry_date = datetime.strptime(maturity, '%Y-%m-%d').date() if maturity else None
-                except:
-                    expiry_date = None
-
-                all_warrants.append({
-                    'owner': owner,
-                    'strike': float(row.get('strike_price', 0)),
-                    'expiry': expiry_date,
-                    'opt_type': 'CALL' if row.get('type') == 'CALL' else 'PUT',
-                    'ratio': float(row.get('conversion_ratio', 0)),
-                    'futu_code': row.get('stock', ''),
-                    'name': row.get('name', ''),
-                })
-
-            time.sleep(0.3)
+        with ThreadPoolExecutor(max_workers=WARRANT_WORKERS) as pool:
+            futures = []
+            for owner in owners:
+                futures.append(pool.submit(ctx.get_warrant, stock_owner=owner))
+                time.sleep(WARRANT_REQUEST_INTERVAL)
+
+            for owner, future in zip(owners, futures):
+                print(f"\n查询 {owner} 的窝轮...")
+                ret, result = future.result()
+                if ret != RET_OK:
+                    print(f"  获取失败")
+                    continue
+
+                df, has_next, total = result
+                print(f"  找到 {total} 个窝轮")
+
+                for _, row in df.iterrows():
+                    # 解析到期日
+                    maturity = row.get('maturity_time', '')
+                    try:
+                        expiry_date = datetime.strptime(maturity, '%Y-%m-%d').date() if maturity else None
+                    except:
+                        expiry_date = None
+
+                    all_warrants.append({
+                        'owner': owner,
+                        'strike': float(row.get('strike_price', 0)),
+                        'expiry': expiry_date,
+                        'opt_type': 'CALL' if row.get('type') == 'CALL' else 'PUT',
+                        'ratio': float(row.get('conversion_ratio', 0)),
+                        'futu_code': row.get('stock', ''),
+                        'name': row.get('name', ''),
+                    })
 
         print(f"\n共获取 {len(all_warrants)} 个窝轮信息")
 
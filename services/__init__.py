@@ -23,79 +23,69 @@ Usage:
     result = chart_service.generate_watchlist_charts(user_id=1)
 """
 
-from .alert_service import (
-    AlertResult,
-    AlertService,
-    AlertSummary,
-    AlertType,
-    create_alert_service,
-)
-from .chart_service import (
-    BatchChartConfig,
-    ChartResult,
-    ChartService,
-    create_chart_service,
-)
-from .export_service import (
-    DateRange,
-    ExportConfig,
-    ExportFormat,
-    ExportResult,
-    ExportService,
-    create_export_service,
-    export_all_to_excel,
-    export_klines_to_csv,
-    export_positions_to_csv,
-    export_trades_to_csv,
-)
-from .analysis_service import AnalysisResultService, create_analysis_service
-from .dingtalk_service import DingtalkService, create_dingtalk_service
-from .plan_service import TradingPlanService, create_plan_service
-from .signal_service import SignalAccuracy, SignalService, create_signal_service
-from .sync_service import SyncResult, SyncService, create_sync_service
-from .watchlist_service import WatchlistService, create_watchlist_service
+from importlib import import_module
 
-__all__ = [
+# Public name -> defining submodule. Submodules are imported on first attribute
+# access (PEP 562) so `from services import X` only pays for X's dependencies
+# (e.g. matplotlib for ChartService, futu for SyncService).
+_LAZY_IMPORTS = {
     # Sync service
-    "SyncService",
-    "SyncResult",
-    "create_sync_service",
+    "SyncService": ".sync_service",
+    "SyncResult": ".sync_service",
+    "create_sync_service": ".sync_service",
     # Chart service
-    "ChartService",
-    "ChartResult",
-    "BatchChartConfig",
-    "create_chart_service",
+    "ChartService": ".chart_service",
+    "ChartResult": ".chart_service",
+    "BatchChartConfig": ".chart_service",
+    "create_chart_service": ".chart_service",
+    "KlineCache": ".kline_cache",
     # Alert service
-    "AlertService",
-    "AlertResult",
-    "AlertSummary",
-    "AlertType",
-    "create_alert_service",
+    "AlertService": ".alert_service",
+    "AlertResult": ".alert_service",
+    "AlertSummary": ".alert_service",
+    "AlertType": ".alert_service",
+    "create_alert_service": ".alert_service",
     # Export service
-    "ExportService",
-    "ExportResult",
-    "ExportConfig",
-    "ExportFormat",
-    "DateRange",
-    "create_export_service",
-    "export_positions_to_csv",
-    "export_trades_to_csv",
-    "export_klines_to_csv",
-    "export_all_to_excel",
+    "ExportService": ".export_service",
+    "ExportResult": ".export_service",
+    "ExportConfig": ".export_service",
+    "ExportFormat": ".export_service",
+    "DateRange": ".export_service",
+    "create_export_service": ".export_service",
+    "export_positions_to_csv": ".export_service",
+    "export_trades_to_csv": ".export_service",
+    "export_klines_to_csv": ".export_service",
+    "export_all_to_excel": ".export_service",
     # Signal service
-    "SignalService",
-    "SignalAccuracy",
-    "create_signal_service",
+    "SignalService": ".signal_service",
+    "SignalAccuracy": ".signal_service",
+    "create_signal_service": ".signal_service",
     # Analysis service
-    "AnalysisResultService",
-    "create_analysis_service",
+    "AnalysisResultService": ".analysis_service",
+    "create_analysis_service": ".analysis_service",
     # Plan service
-    "TradingPlanService",
-    "create_plan_service",
+    "TradingPlanService": ".plan_service",
+    "create_plan_service": ".plan_service",
     # DingTalk service
-    "DingtalkService",
-    "create_dingtalk_service",
+    "DingtalkService": ".dingtalk_service",
+    "create_dingtalk_service": ".dingtalk_service",
     # Watchlist service
-    "WatchlistService",
-    "create_watchlist_service",
-]
+    "WatchlistService": ".watchlist_service",
+    "create_watchlist_service": ".watchlist_service",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name: str):
+    """Import the submodule defining ``name`` on first access."""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
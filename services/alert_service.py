@@ -11,7 +11,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
-from typing import Optional
+from typing import NamedTuple, Optional
 
 from sqlalchemy.orm import Session
 
@@ -30,6 +30,29 @@ class AlertType(str, Enum):
     OCO = "OCO"  # One-Cancels-Other (stop_loss_price + take_profit_price)
 
 
+class _AlertPrices(NamedTuple):
+    """Float snapshot of an alert's Decimal price columns."""
+
+    target_price: Optional[float]
+    stop_loss_price: Optional[float]
+    take_profit_price: Optional[float]
+    target_change_pct: Optional[float]
+    base_price: Optional[float]
+
+    @classmethod
+    def from_alert(cls, alert: PriceAlert) -> "_AlertPrices":
+        def _f(value: Optional[Decimal]) -> Optional[float]:
+            return float(value) if value is not None else None
+
+        return cls(
+            target_price=_f(alert.target_price),
+            stop_loss_price=_f(alert.stop_loss_price),
+            take_profit_price=_f(alert.take_profit_price),
+            target_change_pct=_f(alert.target_change_pct),
+            base_price=_f(alert.base_price),
+        )
+
+
 @dataclass
 class AlertResult:
     """Result of an alert check."""
@@ -286,10 +309,12 @@ class AlertService:
         message = None
         change_pct = None
 
+        # Float snapshot populated by check_all_alerts; computed on demand otherwise
+        prices = getattr(alert, "_float_prices", None) or _AlertPrices.from_alert(alert)
         alert_type = AlertType(alert.alert_type)
 
         if alert_type == AlertType.ABOVE:
-            target = float(alert.target_price)
+            target = prices.target_price
             if current_price >= target:
                 triggered = True
                 message = (
@@ -297,7 +322,7 @@ class AlertService:
                 )
 
         elif alert_type == AlertType.BELOW:
-            target = float(alert.target_price)
+            target = prices.target_price
             if current_price <= target:
                 triggered = True
                 message = (
@@ -305,38 +330,38 @@ class AlertService:
                 )
 
         elif alert_type == AlertType.CHANGE_UP:
-            base = float(alert.base_price) if alert.base_price else 0
+            base = prices.base_price or 0
             if base > 0:
                 change_pct = (current_price - base) / base
-                target_pct = float(alert.target_change_pct)
+                target_pct = prices.target_change_pct
                 if change_pct >= target_pct:
                     triggered = True
                     message = f"{alert.full_code} 涨幅达 {change_pct:.2%} (目标: +{target_pct:.2%})"
 
         elif alert_type == AlertType.CHANGE_DOWN:
-            base = float(alert.base_price) if alert.base_price else 0
+            base = prices.base_price or 0
             if base > 0:
                 change_pct = (current_price - base) / base
-                target_pct = float(alert.target_change_pct)
+                target_pct = prices.target_change_pct
                 if change_pct <= -abs(target_pct):
                     triggered = True
                     message = f"{alert.full_code} 跌幅达 {change_pct:.2%} (目标: -{abs(target_pct):.2%})"
 
         elif alert_type == AlertType.STOP_LOSS:
-            sl = float(alert.stop_loss_price or alert.target_price or 0)
+            sl = prices.stop_loss_price or prices.target_price or 0
             if sl > 0 and current_price <= sl:
                 triggered = True
                 message = f"{alert.full_code} 触发止损 {sl:.2f} (现价: {current_price:.2f})"
 
         elif alert_type == AlertType.TAKE_PROFIT:
-            tp = float(alert.take_profit_price or alert.target_price or 0)
+            tp = prices.take_profit_price or prices.target_price or 0
             if tp > 0 and current_price >= tp:
                 triggered = True
                 message = f"{alert.full_code} 触发止盈 {tp:.2f} (现价: {current_price:.2f})"
 
         elif alert_type == AlertType.OCO:
-            sl = float(alert.stop_loss_price or 0)
-            tp = float(alert.take_profit_price or 0)
+            sl = prices.stop_loss_price or 0
+            tp = prices.take_profit_price or 0
             if sl > 0 and current_price <= sl:
                 triggered = True
                 message = f"{alert.full_code} OCO止损触发 {sl:.2f} (现价: {current_price:.2f})"
@@ -348,7 +373,7 @@ class AlertService:
             alert_id=alert.id,
             triggered=triggered,
             current_price=current_price,
-            target_price=float(alert.target_price) if alert.target_price else None,
+            target_price=prices.target_price or None,
             change_pct=change_pct,
             message=message,
         )
@@ -401,20 +426,30 @@ class AlertService:
         alerts = self.get_user_alerts(user_id, active_only=True)
         summary = AlertSummary()
 
+        # Convert Decimal columns to floats once per loaded alert
         for alert in alerts:
-            full_code = alert.full_code
-            if full_code not in price_data:
-                continue
-
-            current_price = price_data[full_code]
-            result = self.check_alert(alert, current_price)
-            summary.total_checked += 1
-
-            if result.triggered:
-                summary.total_triggered += 1
-                if auto_trigger:
-                    self.trigger_alert(alert.id, current_price)
-                summary.results.append(result)
+            alert._float_prices = _AlertPrices.from_alert(alert)
+
+        try:
+            for alert in alerts:
+                full_code = alert.full_code
+                if full_code not in price_data:
+                    continue
+
+                current_price = price_data[full_code]
+                result = self.check_alert(alert, current_price)
+                summary.total_checked += 1
+
+                if result.triggered:
+                    summary.total_triggered += 1
+                    if auto_trigger:
+                        self.trigger_alert(alert.id, current_price)
+                    summary.results.append(result)
+        finally:
+            # Alerts stay in the session identity map; drop the snapshot so
+            # later updates are never checked against stale values
+            for alert in alerts:
+                alert.__dict__.pop("_float_prices", None)
 
         return summary
 
@@ -5,7 +5,7 @@ Provides high-level chart generation for watchlists and positions.
 
 Usage:
     from services import ChartService
-    from fetchers import KlineFetcher
+    from fetchers import KlineFetcher, KlineFetchResult
     from charts import ChartGenerator
 
     # Create service
@@ -21,19 +21,48 @@ Usage:
 """
 
 import logging
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 from charts import ChartConfig, ChartGenerator
 from db import Account, Position, WatchlistItem, get_session
-from fetchers import KlineFetcher
+from fetchers import KlineFetcher, KlineFetchResult
+
+from .kline_cache import KlineCache
 
 logger = logging.getLogger(__name__)
 
+# Per-process ChartGenerator used by render pool workers
+_worker_generator: Optional[ChartGenerator] = None
+
+
+def _init_render_worker(chart_generator: ChartGenerator) -> None:
+    """Initialize a render pool worker with a headless backend."""
+    global _worker_generator
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    _worker_generator = chart_generator
+
+
+def _render_chart(
+    df, code: str, output_path: Path, chart_config: ChartConfig
+) -> Optional[Path]:
+    """Render a single chart inside a render pool worker."""
+    return _worker_generator.generate(
+        df=df,
+        title=code,
+        output_path=output_path,
+        config=chart_config,
+    )
+
 
-@dataclass
+@dataclass(slots=True)
 class ChartResult:
     """Result of chart generation operation."""
 
@@ -58,7 +87,7 @@ class ChartResult:
             logger.warning(f"Failed to generate chart for {code}: {reason}")
 
 
-@dataclass
+@dataclass(slots=True)
 class BatchChartConfig:
     """Configuration for batch chart generation."""
 
@@ -69,6 +98,8 @@ class BatchChartConfig:
     figsize: tuple[float, float] = (14, 8)
     dpi: int = 100
     output_subdir: Optional[str] = None
+    render_workers: int = 1
+    fetch_workers: int = 8
 
 
 class ChartService:
@@ -99,6 +130,7 @@ class ChartService:
         kline_fetcher: Optional[KlineFetcher] = None,
         chart_generator: Optional[ChartGenerator] = None,
         output_dir: Optional[Path] = None,
+        kline_cache: Optional[KlineCache] = None,
     ):
         """
         Initialize chart service.
@@ -107,10 +139,12 @@ class ChartService:
             kline_fetcher: KlineFetcher instance for fetching K-line data
             chart_generator: ChartGenerator instance for creating charts
             output_dir: Base output directory for charts
+            kline_cache: Optional on-disk K-line cache (disabled if None)
         """
         self.kline_fetcher = kline_fetcher or KlineFetcher()
         self.chart_generator = chart_generator or ChartGenerator()
         self.output_dir = output_dir or Path("charts/output")
+        self.kline_cache = kline_cache
 
     def generate_watchlist_charts(
         self,
@@ -135,8 +169,12 @@ class ChartService:
         try:
             # Get watchlist items
             with get_session() as session:
-                items = session.query(WatchlistItem).filter_by(user_id=user_id, is_active=True).all()
-                codes = [f"{item.market}.{item.code}" for item in items]
+                rows = (
+                    session.query(WatchlistItem.market, WatchlistItem.code)
+                    .filter_by(user_id=user_id, is_active=True)
+                    .all()
+                )
+                codes = [f"{row.market}.{row.code}" for row in rows]
 
             if not codes:
                 result.error_message = "No items in watchlist"
@@ -179,20 +217,16 @@ class ChartService:
         result = ChartResult(success=True)
 
         try:
-            # Get unique position codes
+            # Get unique codes with qty > 0 (deduplicated by the database)
             with get_session() as session:
-                positions = (
-                    session.query(Position)
+                rows = (
+                    session.query(Position.market, Position.code)
                     .join(Account)
-                    .filter(Account.user_id == user_id)
+                    .filter(Account.user_id == user_id, Position.qty > 0)
+                    .distinct()
                     .all()
                 )
-                # Get unique codes with qty > 0
-                codes = list(
-                    set(
-                        f"{p.market}.{p.code}" for p in positions if p.qty and p.qty > 0
-                    )
-                )
+                codes = [f"{row.market}.{row.code}" for row in rows]
 
             if not codes:
                 result.error_message = "No active positions"
@@ -266,6 +300,9 @@ class ChartService:
         Returns:
             Updated ChartResult
         """
+        # Drop duplicate codes (order-preserving) so each chart renders once
+        codes = list(dict.fromkeys(codes))
+
         # Create chart config
         chart_config = ChartConfig(
             ma_periods=config.ma_periods,
@@ -280,11 +317,143 @@ class ChartService:
         if config.style:
             self.chart_generator.set_style(config.style)
 
-        # Generate charts for each code
-        for code in codes:
-            try:
-                # Fetch K-line data
-                fetch_result = self.kline_fetcher.fetch(code, days=config.days)
+        # Build every output path up front instead of once per render
+        output_paths = {
+            code: output_dir / f"{code.replace('.', '_')}.png" for code in codes
+        }
+
+        workers = min(config.render_workers, len(codes), os.cpu_count() or 1)
+        if workers > 1:
+            self._render_in_pool(
+                codes, output_paths, config, chart_config, result, workers
+            )
+        else:
+            # Apply the style rcParams once for the whole batch
+            with self.chart_generator.style_context():
+                for code, fetch_future in self._prefetch_klines(codes, config):
+                    try:
+                        # Wait for prefetched K-line data
+                        fetch_result = fetch_future.result()
+
+                        if (
+                            not fetch_result.success
+                            or fetch_result.df is None
+                            or fetch_result.df.empty
+                        ):
+                            result.add_failed(code, fetch_result.error_message or "No data")
+                            continue
+
+                        # Generate chart
+                        chart_path = self.chart_generator.generate(
+                            df=fetch_result.df,
+                            title=code,
+                            output_path=output_paths[code],
+                            config=chart_config,
+                        )
+
+                        if chart_path:
+                            result.add_generated(chart_path)
+                        else:
+                            result.add_failed(code, "Generation failed")
+
+                    except Exception as e:
+                        result.add_failed(code, str(e))
+
+        # Update success status
+        if result.charts_generated == 0 and result.charts_failed > 0:
+            result.success = False
+            result.error_message = f"All {result.charts_failed} charts failed"
+
+        return result
+
+    def _prefetch_klines(
+        self, codes: list[str], config: BatchChartConfig
+    ) -> Iterator[tuple[str, Future]]:
+        """
+        Fetch K-line data on a thread pool ahead of rendering.
+
+        All fetches are submitted up front; futures are yielded in input
+        order so the caller can render one code while later codes are
+        still downloading.
+
+        Args:
+            codes: List of stock codes
+            config: Batch chart configuration
+
+        Yields:
+            (code, future resolving to KlineFetchResult) tuples
+        """
+        workers = max(1, min(config.fetch_workers, len(codes)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                (code, pool.submit(self._fetch_kline, code, config.days))
+                for code in codes
+            ]
+            yield from futures
+
+    def _fetch_kline(self, code: str, days: int) -> KlineFetchResult:
+        """
+        Fetch K-line data for one code, going through the disk cache if set.
+
+        Args:
+            code: Stock code
+            days: Number of days to fetch
+
+        Returns:
+            KlineFetchResult (only ``df`` is populated on a cache hit)
+        """
+        if self.kline_cache is not None:
+            df = self.kline_cache.get(code, days)
+            if df is not None:
+                return KlineFetchResult(success=True, records_count=len(df), df=df)
+
+        fetch_result = self.kline_fetcher.fetch(code, days=days)
+
+        if (
+            self.kline_cache is not None
+            and fetch_result.success
+            and fetch_result.df is not None
+            and not fetch_result.df.empty
+        ):
+            self.kline_cache.set(code, days, fetch_result.df)
+
+        return fetch_result
+
+    def _render_in_pool(
+        self,
+        codes: list[str],
+        output_paths: dict[str, Path],
+        config: BatchChartConfig,
+        chart_config: ChartConfig,
+        result: ChartResult,
+        workers: int,
+    ) -> None:
+        """
+        Render prefetched K-line data in a process pool.
+
+        Each worker receives a pickled copy of the chart generator once at
+        start-up, so rendering of one code overlaps with fetching the next.
+
+        Args:
+            codes: List of stock codes
+            output_paths: Precomputed PNG path for each code
+            config: Batch chart configuration
+            chart_config: Chart configuration passed to the generator
+            result: ChartResult to populate
+            workers: Number of render processes
+        """
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_render_worker,
+            initargs=(self.chart_generator,),
+        ) as pool:
+            futures = {}
+            for code, fetch_future in self._prefetch_klines(codes, config):
+                try:
+                    fetch_result = fetch_future.result()
+                except Exception as e:
+                    result.add_failed(code, str(e))
+                    continue
 
                 if (
                     not fetch_result.success
@@ -294,35 +463,33 @@ class ChartService:
                     result.add_failed(code, fetch_result.error_message or "No data")
                     continue
 
-                # Generate chart
-                output_path = output_dir / f"{code.replace('.', '_')}.png"
-                chart_path = self.chart_generator.generate(
-                    df=fetch_result.df,
-                    title=code,
-                    output_path=output_path,
-                    config=chart_config,
+                future = pool.submit(
+                    _render_chart,
+                    fetch_result.df,
+                    code,
+                    output_paths[code],
+                    chart_config,
                 )
+                futures[future] = code
+
+            for future, code in futures.items():
+                try:
+                    chart_path = future.result()
+                except Exception as e:
+                    result.add_failed(code, str(e))
+                    continue
 
                 if chart_path:
                     result.add_generated(chart_path)
                 else:
                     result.add_failed(code, "Generation failed")
 
-            except Exception as e:
-                result.add_failed(code, str(e))
-
-        # Update success status
-        if result.charts_generated == 0 and result.charts_failed > 0:
-            result.success = False
-            result.error_message = f"All {result.charts_failed} charts failed"
-
-        return result
-
 
 def create_chart_service(
     kline_fetcher: Optional[KlineFetcher] = None,
     chart_generator: Optional[ChartGenerator] = None,
     output_dir: Optional[str] = None,
+    use_cache: bool = False,
 ) -> ChartService:
     """
     Factory function to create a ChartService.
@@ -331,6 +498,7 @@ def create_chart_service(
         kline_fetcher: KlineFetcher instance
         chart_generator: ChartGenerator instance
         output_dir: Output directory for charts
+        use_cache: Cache fetched K-lines on disk (see KlineCache)
 
     Returns:
         ChartService instance
@@ -340,4 +508,5 @@ def create_chart_service(
         kline_fetcher=kline_fetcher,
         chart_generator=chart_generator,
         output_dir=out_path,
+        kline_cache=KlineCache() if use_cache else None,
     )
@@ -7,10 +7,13 @@ Derivative Contract Service - 衍生品合约信息服务
 
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 from decimal import Decimal
+from functools import lru_cache
 from typing import Optional
 
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 
 from db import DerivativeContract, get_session
@@ -21,6 +24,17 @@ logger = logging.getLogger(__name__)
 # 默认合约乘数
 DEFAULT_US_OPTION_MULTIPLIER = Decimal("100")  # 美股期权标准合约乘数
 DEFAULT_HK_WARRANT_RATIO = Decimal("1")  # 港股窝轮默认换股比率（保守值）
+SNAPSHOT_BATCH_SIZE = 400  # get_market_snapshot 单次请求代码上限
+# 代码中的行权价为实际价格 x1000，预先构造避免每次 int -> Decimal 转换
+_STRIKE_DIVISOR = Decimal(1000)
+
+# 期权/窝轮代码正则（模块级预编译）
+# 港股：正股简称 + YYMMDD + C/P + 行权价
+_HK_OPT_RE = re.compile(r"^([A-Z]{2,4})(\d{6})([CP])(\d+)$")
+# 美股：正股代码 + YYMMDD + C/P + 行权价
+_US_OPT_RE = re.compile(r"^([A-Z]{1,5})(\d{6})([CP])(\d+)$")
+_US_IS_DERIV_RE = re.compile(r"^[A-Z]+\d{6}[CP]\d+$")
+_HAS_ALPHA_RE = re.compile(r"[^\W\d_]")  # 任意字母，等价于 str.isalpha 逐字符判断
 
 
 def parse_option_code(market: str, code: str) -> Optional[dict]:
@@ -37,61 +51,81 @@ def parse_option_code(market: str, code: str) -> Optional[dict]:
         dict with keys: underlying, expiry_date, option_type, strike_price
         or None if not parseable
     """
+    parsed = _parse_option_code_cached(market, code)
+    if parsed is None:
+        return None
+    underlying, expiry, opt_type, strike = parsed
+    return {
+        "underlying": underlying,
+        "expiry_date": expiry,
+        "option_type": opt_type,
+        "strike_price": strike,
+    }
+
+
+def _parse_yymmdd(date_str: str) -> Optional[date]:
+    """
+    解析 YYMMDD 日期（按整数切片，代替 datetime.strptime 的格式串解析）。
+
+    两位年份与 strptime 的 %y 规则一致：00-68 -> 20xx，69-99 -> 19xx。
+    无效日期返回 None。
+    """
+    try:
+        yy = int(date_str[:2])
+        return date(
+            yy + (2000 if yy < 69 else 1900),
+            int(date_str[2:4]),
+            int(date_str[4:6]),
+        )
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_option_code_cached(
+    market: str, code: str
+) -> Optional[tuple[str, Optional[date], str, Decimal]]:
+    """parse_option_code 的缓存实现，返回不可变元组 (underlying, expiry, type, strike)"""
     if market == "HK":
         # 港股窝轮: 代码前缀是正股简称（2-3个字母），后面是日期+类型+行权价
-        match = re.match(r"^([A-Z]{2,4})(\d{6})([CP])(\d+)$", code)
+        match = _HK_OPT_RE.match(code)
         if match:
             underlying_abbr = match.group(1)
             date_str = match.group(2)
             opt_type = "CALL" if match.group(3) == "C" else "PUT"
-            strike = Decimal(match.group(4)) / 1000  # 行权价除以1000
+            strike = Decimal(match.group(4)) / _STRIKE_DIVISOR  # 行权价除以1000
 
             # 解析到期日 (YYMMDD)
-            try:
-                expiry = datetime.strptime(date_str, "%y%m%d").date()
-            except ValueError:
-                expiry = None
+            expiry = _parse_yymmdd(date_str)
 
-            return {
-                "underlying": underlying_abbr,
-                "expiry_date": expiry,
-                "option_type": opt_type,
-                "strike_price": strike,
-            }
+            return underlying_abbr, expiry, opt_type, strike
 
     elif market == "US":
         # 美股期权: 正股代码(1-5字母) + YYMMDD + C/P + 行权价
-        match = re.match(r"^([A-Z]{1,5})(\d{6})([CP])(\d+)$", code)
+        match = _US_OPT_RE.match(code)
         if match:
             underlying = match.group(1)
             date_str = match.group(2)
             opt_type = "CALL" if match.group(3) == "C" else "PUT"
-            strike = Decimal(match.group(4)) / 1000
+            strike = Decimal(match.group(4)) / _STRIKE_DIVISOR
 
-            try:
-                expiry = datetime.strptime(date_str, "%y%m%d").date()
-            except ValueError:
-                expiry = None
+            expiry = _parse_yymmdd(date_str)
 
-            return {
-                "underlying": underlying,
-                "expiry_date": expiry,
-                "option_type": opt_type,
-                "strike_price": strike,
-            }
+            return underlying, expiry, opt_type, strike
 
     return None
 
 
+@lru_cache(maxsize=4096)
 def is_derivative_code(market: str, code: str) -> bool:
     """判断是否为衍生品代码（期权/窝轮）"""
     if market == "HK":
         # 港股期权/窝轮代码中包含字母
-        return any(c.isalpha() for c in code)
+        return _HAS_ALPHA_RE.search(code) is not None
 
     if market == "US":
         # 美股期权格式: SYMBOL + YYMMDD + C/P + STRIKE
-        return bool(re.match(r"^[A-Z]+\d{6}[CP]\d+$", code))
+        return _US_IS_DERIV_RE.match(code) is not None
 
     return False
 
@@ -110,11 +144,21 @@ def get_derivative_type(market: str, code: str) -> Optional[str]:
 
 
 class DerivativeService:
-    """衍生品合约信息服务"""
+    """
+    衍生品合约信息服务
+
+    (market, code) 是唯一键而非主键，session.get 无法命中 identity map，
+    因此服务内维护一个 {(market, code): 合约} 缓存，由单条/批量查询和
+    save_contract 填充，重复查询同一合约不再发出 SELECT。
+    get_multiplier 另有 {(market, code): 乘数} 缓存（含未入库时的默认值），
+    save_contract 时失效。
+    """
 
     def __init__(self, session: Optional[Session] = None):
         self._session = session
         self._owns_session = session is None
+        self._contracts: dict[tuple[str, str], DerivativeContract] = {}
+        self._multipliers: dict[tuple[str, str], Decimal] = {}
 
     def _get_session(self) -> Session:
         if self._session is None:
@@ -122,18 +166,60 @@ class DerivativeService:
         return self._session
 
     def close(self):
+        self._contracts.clear()
+        self._multipliers.clear()
         if self._owns_session and self._session:
             self._session.close()
             self._session = None
 
     def get_contract(self, market: str, code: str) -> Optional[DerivativeContract]:
-        """从数据库获取合约信息"""
+        """从数据库获取合约信息（命中服务内缓存时不查询）"""
+        contract = self._contracts.get((market, code))
+        if contract is not None:
+            return contract
+
         session = self._get_session()
-        return (
+        contract = (
             session.query(DerivativeContract)
             .filter_by(market=market, code=code)
             .first()
         )
+        if contract is not None:
+            self._contracts[(market, code)] = contract
+        return contract
+
+    def get_contracts(
+        self, keys: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], DerivativeContract]:
+        """
+        批量获取合约信息（单次 IN 查询，只查询缓存未命中的键）。
+
+        Args:
+            keys: List of (market, code) tuples
+
+        Returns:
+            Dict mapping (market, code) to DerivativeContract (仅包含已存在的)
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        found = {
+            key: self._contracts[key] for key in unique_keys if key in self._contracts
+        }
+        missing = [key for key in unique_keys if key not in found]
+        if not missing:
+            return found
+
+        session = self._get_session()
+        rows = (
+            session.query(DerivativeContract)
+            .filter(
+                tuple_(DerivativeContract.market, DerivativeContract.code).in_(missing)
+            )
+            .all()
+        )
+        for row in rows:
+            found[(row.market, row.code)] = row
+            self._contracts[(row.market, row.code)] = row
+        return found
 
     def get_multiplier(self, market: str, code: str) -> Decimal:
         """
@@ -145,15 +231,22 @@ class DerivativeService:
         Returns:
             乘数值（港股窝轮为换股比率，美股期权为合约乘数）
         """
+        key = (market, code)
+        multiplier = self._multipliers.get(key)
+        if multiplier is not None:
+            return multiplier
+
         contract = self.get_contract(market, code)
         if contract:
-            return contract.multiplier
-
-        # 返回默认值
-        if market == "US":
-            return DEFAULT_US_OPTION_MULTIPLIER
+            multiplier = contract.multiplier
+        elif market == "US":
+            # 返回默认值
+            multiplier = DEFAULT_US_OPTION_MULTIPLIER
         else:
-            return DEFAULT_HK_WARRANT_RATIO
+            multiplier = DEFAULT_HK_WARRANT_RATIO
+
+        self._multipliers[key] = multiplier
+        return multiplier
 
     def save_contract(
         self,
@@ -169,14 +262,22 @@ class DerivativeService:
         expiry_date: Optional[date] = None,
         lot_size: Optional[int] = None,
         data_source: str = "MANUAL",
+        commit: bool = True,
     ) -> DerivativeContract:
-        """保存或更新合约信息"""
+        """
+        保存或更新合约信息。
+
+        commit=False 时只在会话中新增/修改记录，由调用方批量写入后
+        调用 commit() 一次性提交。
+        """
         session = self._get_session()
+        self._multipliers.pop((market, code), None)
 
         contract = self.get_contract(market, code)
         if contract is None:
             contract = DerivativeContract(market=market, code=code)
             session.add(contract)
+            self._contracts[(market, code)] = contract
 
         # 更新字段
         if stock_name is not None:
@@ -200,11 +301,16 @@ class DerivativeService:
         contract.data_source = data_source
         contract.updated_at = datetime.now()
 
-        session.commit()
+        if commit:
+            session.commit()
         return contract
 
+    def commit(self) -> None:
+        """提交以 commit=False 累积的合约写入"""
+        self._get_session().commit()
+
     def fetch_from_futu(
-        self, market: str, code: str, futu_ctx=None
+        self, market: str, code: str, futu_ctx=None, commit: bool = True
     ) -> Optional[DerivativeContract]:
         """
         从 Futu API 获取合约信息。
@@ -213,6 +319,7 @@ class DerivativeService:
             market: 市场 (HK/US)
             code: 期权/窝轮代码
             futu_ctx: OpenQuoteContext 实例
+            commit: 是否立即提交 (False 时由调用方批量提交)
 
         Returns:
             DerivativeContract or None
@@ -231,88 +338,244 @@ class DerivativeService:
                 logger.warning(f"Failed to get snapshot for {full_code}: {data}")
                 return None
 
-            row = data.iloc[0]
+            return self._snapshot_to_contract(data.iloc[0], market, code, commit)
 
-            # 解析代码信息
-            parsed = parse_option_code(market, code)
+        except Exception as e:
+            logger.error(f"Error fetching from Futu API: {e}")
+            return None
 
-            # 根据市场类型提取信息
-            if market == "HK":
-                # 港股窝轮
-                wrt_valid = row.get("wrt_valid", False)
-                if not wrt_valid:
-                    logger.info(f"{full_code} is not a valid warrant")
-                    return None
+    def fetch_from_futu_batch(
+        self, codes: list[tuple[str, str]], futu_ctx=None, commit: bool = True
+    ) -> dict[tuple[str, str], DerivativeContract]:
+        """
+        通过一次快照请求批量获取合约信息。
 
-                conversion_ratio = row.get("wrt_conversion_ratio")
-                if conversion_ratio and conversion_ratio > 0:
-                    conversion_ratio = Decimal(str(conversion_ratio))
-                else:
-                    conversion_ratio = None
-
-                contract = self.save_contract(
-                    market=market,
-                    code=code,
-                    stock_name=row.get("name"),
-                    contract_type="WARRANT",
-                    underlying_code=row.get("stock_owner"),
-                    conversion_ratio=conversion_ratio,
-                    option_type=parsed.get("option_type") if parsed else None,
-                    strike_price=row.get("wrt_strike_price"),
-                    expiry_date=parsed.get("expiry_date") if parsed else None,
-                    lot_size=row.get("lot_size"),
-                    data_source="FUTU",
-                )
-                logger.info(
-                    f"Fetched HK warrant {full_code}: ratio={conversion_ratio}"
-                )
-                return contract
-
-            elif market == "US":
-                # 美股期权
-                option_valid = row.get("option_valid", False)
-                if not option_valid:
-                    logger.info(f"{full_code} is not a valid option")
-                    return None
-
-                contract_size = row.get("option_contract_size")
-                if contract_size and contract_size > 0:
-                    contract_multiplier = Decimal(str(contract_size))
+        get_market_snapshot 单次最多 SNAPSHOT_BATCH_SIZE 个代码，超出时分批请求。
+        下一批的快照请求在后台线程提前发出，当前批的解析和 flush 在会话
+        所在线程进行，API 等待与数据库写入相互重叠。
+        若整批请求失败（例如批中含无效代码），退回逐个代码请求快照。
+        每批写入在各自的 SAVEPOINT 中 flush，一条坏数据只丢弃自身。
+
+        Args:
+            codes: List of (market, code) tuples
+            futu_ctx: OpenQuoteContext 实例
+            commit: 是否立即提交 (False 时由调用方批量提交)
+
+        Returns:
+            Dict mapping (market, code) to DerivativeContract (仅包含成功获取的)
+        """
+        if futu_ctx is None:
+            logger.warning("No Futu context provided, cannot fetch from API")
+            return {}
+
+        from futu import RET_OK
+
+        keys = list(dict.fromkeys(codes))
+        chunks = [
+            keys[i : i + SNAPSHOT_BATCH_SIZE]
+            for i in range(0, len(keys), SNAPSHOT_BATCH_SIZE)
+        ]
+        results = {}
+        if not chunks:
+            return results
+
+        # 会话不是线程安全的：后台线程只负责 API 请求
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = pool.submit(self._request_snapshot, futu_ctx, chunks[0])
+            for idx, chunk in enumerate(chunks):
+                ret, data = pending.result()
+                if idx + 1 < len(chunks):
+                    pending = pool.submit(
+                        self._request_snapshot, futu_ctx, chunks[idx + 1]
+                    )
+
+                if ret != RET_OK or data is None:
+                    logger.warning(
+                        f"Batch snapshot failed for {len(chunk)} codes, "
+                        f"falling back to per-code requests: {data}"
+                    )
+                    rows = []
+                    for market, code in chunk:
+                        ret, data = self._request_snapshot(futu_ctx, [(market, code)])
+                        if ret != RET_OK or data is None or len(data) == 0:
+                            logger.warning(
+                                f"Failed to get snapshot for {market}.{code}: {data}"
+                            )
+                            continue
+                        rows.extend(data.to_dict("records"))
                 else:
-                    contract_multiplier = DEFAULT_US_OPTION_MULTIPLIER
-
-                contract = self.save_contract(
-                    market=market,
-                    code=code,
-                    stock_name=row.get("name"),
-                    contract_type="OPTION",
-                    underlying_code=row.get("stock_owner"),
-                    contract_multiplier=contract_multiplier,
-                    option_type=parsed.get("option_type") if parsed else None,
-                    strike_price=row.get("option_strike_price"),
-                    expiry_date=parsed.get("expiry_date") if parsed else None,
-                    lot_size=row.get("lot_size"),
-                    data_source="FUTU",
-                )
-                logger.info(
-                    f"Fetched US option {full_code}: multiplier={contract_multiplier}"
-                )
-                return contract
+                    rows = data.to_dict("records")
 
+                # 在下一批请求返回前把本批写入发给数据库
+                results.update(self._save_isolated(rows, self._save_snapshot_row))
+
+        if commit:
+            self.commit()
+        return results
+
+    def _save_snapshot_row(self, row) -> tuple:
+        """解析并保存一行快照，返回 ((market, code), 合约或 None)"""
+        market, _, code = str(row.get("code", "")).partition(".")
+        try:
+            contract = self._snapshot_to_contract(row, market, code, False)
         except Exception as e:
-            logger.error(f"Error fetching from Futu API: {e}")
-            return None
+            logger.error(f"Error parsing snapshot for {market}.{code}: {e}")
+            contract = None
+        return (market, code), contract
+
+    def _save_isolated(self, items: list, save) -> dict:
+        """
+        在 SAVEPOINT 中批量保存并 flush，一条坏数据只丢弃自身。
+
+        整批在一个 SAVEPOINT 中写入；flush 失败（如 IntegrityError）时回滚
+        该 SAVEPOINT，再为每条记录单独建 SAVEPOINT 重试，此前批次已写入的
+        合约和外层事务都不受影响。
+
+        Args:
+            items: 待保存的数据
+            save: 保存单条数据的函数，返回 ((market, code), 合约或 None)
+
+        Returns:
+            Dict mapping (market, code) to DerivativeContract (仅包含成功写入的)
+        """
+        session = self._get_session()
+        try:
+            with session.begin_nested():
+                saved = [save(item) for item in items]
+            return {key: contract for key, contract in saved if contract}
+        except Exception as e:
+            logger.warning(
+                f"Flushing {len(items)} contracts failed, retrying per code: {e}"
+            )
+            self._drop_rolled_back()
+
+        results = {}
+        for item in items:
+            key = None
+            try:
+                with session.begin_nested():
+                    key, contract = save(item)
+            except Exception as e:
+                logger.error(f"Error saving contract {key}: {e}")
+                self._drop_rolled_back()
+                continue
+            if contract:
+                results[key] = contract
+        return results
+
+    def _drop_rolled_back(self) -> None:
+        """SAVEPOINT 回滚后，从缓存中移除已被移出会话的新建合约"""
+        session = self._get_session()
+        for key in [k for k, c in self._contracts.items() if c not in session]:
+            del self._contracts[key]
+            self._multipliers.pop(key, None)
+
+    @staticmethod
+    def _request_snapshot(futu_ctx, chunk: list[tuple[str, str]]):
+        """请求一批快照，异常转换为 (None, error) 以便走逐个回退"""
+        try:
+            return futu_ctx.get_market_snapshot([f"{m}.{c}" for m, c in chunk])
+        except Exception as e:
+            return None, e
+
+    def _snapshot_to_contract(
+        self, row, market: str, code: str, commit: bool
+    ) -> Optional[DerivativeContract]:
+        """
+        将一行 Futu 快照数据解析并保存为合约记录。
+
+        Args:
+            row: 快照行 (pandas Series 或 dict)
+            market: 市场 (HK/US)
+            code: 期权/窝轮代码
+            commit: 是否立即提交
+
+        Returns:
+            DerivativeContract or None (非有效窝轮/期权)
+        """
+        full_code = f"{market}.{code}"
+
+        # 解析代码信息
+        parsed = parse_option_code(market, code)
+
+        # 根据市场类型提取信息
+        if market == "HK":
+            # 港股窝轮
+            wrt_valid = row.get("wrt_valid", False)
+            if not wrt_valid:
+                logger.info(f"{full_code} is not a valid warrant")
+                return None
+
+            conversion_ratio = row.get("wrt_conversion_ratio")
+            if conversion_ratio and conversion_ratio > 0:
+                conversion_ratio = Decimal(str(conversion_ratio))
+            else:
+                conversion_ratio = None
+
+            contract = self.save_contract(
+                market=market,
+                code=code,
+                stock_name=row.get("name"),
+                contract_type="WARRANT",
+                underlying_code=row.get("stock_owner"),
+                conversion_ratio=conversion_ratio,
+                option_type=parsed.get("option_type") if parsed else None,
+                strike_price=row.get("wrt_strike_price"),
+                expiry_date=parsed.get("expiry_date") if parsed else None,
+                lot_size=row.get("lot_size"),
+                data_source="FUTU",
+                commit=commit,
+            )
+            logger.info(f"Fetched HK warrant {full_code}: ratio={conversion_ratio}")
+            return contract
+
+        elif market == "US":
+            # 美股期权
+            option_valid = row.get("option_valid", False)
+            if not option_valid:
+                logger.info(f"{full_code} is not a valid option")
+                return None
+
+            contract_size = row.get("option_contract_size")
+            if contract_size and contract_size > 0:
+                contract_multiplier = Decimal(str(contract_size))
+            else:
+                contract_multiplier = DEFAULT_US_OPTION_MULTIPLIER
+
+            contract = self.save_contract(
+                market=market,
+                code=code,
+                stock_name=row.get("name"),
+                contract_type="OPTION",
+                underlying_code=row.get("stock_owner"),
+                contract_multiplier=contract_multiplier,
+                option_type=parsed.get("option_type") if parsed else None,
+                strike_price=row.get("option_strike_price"),
+                expiry_date=parsed.get("expiry_date") if parsed else None,
+                lot_size=row.get("lot_size"),
+                data_source="FUTU",
+                commit=commit,
+            )
+            logger.info(
+                f"Fetched US option {full_code}: multiplier={contract_multiplier}"
+            )
+            return contract
 
         return None
 
     def auto_populate_from_code(
-        self, market: str, code: str, stock_name: Optional[str] = None
+        self,
+        market: str,
+        code: str,
+        stock_name: Optional[str] = None,
+        commit: bool = True,
     ) -> Optional[DerivativeContract]:
         """
         从代码自动解析并创建合约记录。
 
         用于无法从 API 获取数据时的备选方案。
         美股期权使用默认乘数 100，港股窝轮使用默认比率 1。
+        commit=False 时由调用方批量提交。
         """
         if not is_derivative_code(market, code):
             return None
@@ -333,6 +596,7 @@ class DerivativeService:
                 strike_price=parsed.get("strike_price") if parsed else None,
                 expiry_date=parsed.get("expiry_date") if parsed else None,
                 data_source="AUTO",
+                commit=commit,
             )
         elif contract_type == "WARRANT":
             # 港股窝轮 - 使用默认值
@@ -347,6 +611,7 @@ class DerivativeService:
                 strike_price=parsed.get("strike_price") if parsed else None,
                 expiry_date=parsed.get("expiry_date") if parsed else None,
                 data_source="AUTO",
+                commit=commit,
             )
 
         return None
@@ -364,30 +629,29 @@ class DerivativeService:
         Returns:
             Dict mapping "market.code" to DerivativeContract
         """
-        results = {}
-
-        for market, code in codes:
-            full_code = f"{market}.{code}"
-
-            # 先查数据库
-            contract = self.get_contract(market, code)
-            if contract:
-                results[full_code] = contract
-                continue
-
-            # 尝试从 API 获取
-            if futu_ctx:
-                contract = self.fetch_from_futu(market, code, futu_ctx)
-                if contract:
-                    results[full_code] = contract
-                    continue
-
-            # 自动解析创建
-            contract = self.auto_populate_from_code(market, code)
-            if contract:
-                results[full_code] = contract
+        # 先查数据库
+        found = self.get_contracts(codes)
+        missing = [key for key in dict.fromkeys(codes) if key not in found]
+
+        # 尝试从 API 一次性获取
+        if futu_ctx and missing:
+            found.update(self.fetch_from_futu_batch(missing, futu_ctx, commit=False))
+
+        # 自动解析创建
+        found.update(
+            self._save_isolated(
+                [key for key in missing if key not in found],
+                lambda key: (key, self.auto_populate_from_code(*key, commit=False)),
+            )
+        )
 
-        return results
+        # 所有写入一次提交
+        self.commit()
+        return {
+            f"{market}.{code}": found[(market, code)]
+            for market, code in codes
+            if (market, code) in found
+        }
 
     def list_contracts(
         self,
@@ -445,23 +709,34 @@ def sync_derivative_contracts_for_trades(
         service = DerivativeService(session)
         synced = 0
 
-        for market, code, stock_name in derivative_codes:
-            # 检查是否已存在
-            existing = service.get_contract(market, code)
-            if existing:
-                continue
+        # 一次查询预加载已存在的合约
+        existing = set(service.get_contracts([(m, c) for m, c, _ in derivative_codes]))
+        missing = [(m, c, n) for m, c, n in derivative_codes if (m, c) not in existing]
 
-            # 尝试从 API 获取
-            contract = None
-            if futu_ctx:
-                contract = service.fetch_from_futu(market, code, futu_ctx)
+        # 尝试从 API 一次性获取
+        fetched = {}
+        if futu_ctx and missing:
+            fetched = service.fetch_from_futu_batch(
+                [(m, c) for m, c, _ in missing], futu_ctx, commit=False
+            )
 
-            # 备选：自动解析
-            if not contract:
-                contract = service.auto_populate_from_code(market, code, stock_name)
+        # 备选：自动解析 (同一代码可能以不同名称重复出现，取首次出现的名称)
+        names: dict[tuple[str, str], str] = {}
+        for market, code, stock_name in missing:
+            names.setdefault((market, code), stock_name)
+        populated = service._save_isolated(
+            [key for key in names if key not in fetched],
+            lambda key: (
+                key,
+                service.auto_populate_from_code(*key, names[key], commit=False),
+            ),
+        )
 
-            if contract:
+        for market, code in names:
+            if (market, code) in fetched or (market, code) in populated:
                 synced += 1
                 logger.info(f"Synced contract: {market}.{code}")
 
+        # 所有写入一次提交
+        service.commit()
         return synced
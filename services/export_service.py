@@ -4,23 +4,55 @@ Data export service.
 Exports positions, trades, and kline data to various formats:
 - CSV
 - Excel (multiple worksheets)
-- JSON
+- JSON (array) / NDJSON (one record per line)
+- Parquet / Feather (columnar, compressed; requires pyarrow)
 """
 
+import hashlib
+import io
 import json
+import logging
+import os
+import shutil
+import textwrap
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
+from itertools import chain
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterable, Iterator, Optional, TextIO, Union
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import select
+from sqlalchemy import Select, func, select
 from sqlalchemy.orm import Session
 
 from db.database import SessionLocal, get_session
 from db.models import Account, Kline, Position, Trade, WatchlistItem
 
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip when streaming exports
+STREAM_CHUNK_SIZE = 10_000
+
+# Rows fetched per round trip by the raw-cursor kline CSV path
+CURSOR_FETCH_ROWS = 50_000
+
+# Largest slice of a DataFrame serialized to CSV in one call
+CSV_WRITE_CHUNK_ROWS = 100_000
+
+# File buffer for the pandas CSV writer
+CSV_BUFFER_SIZE = 1 << 20
+
+# CSV/JSON/NDJSON compression codecs and the suffix appended to the file name
+COMPRESSION_EXTENSIONS = {"gzip": "gz", "zstd": "zst", "lz4": "lz4"}
+
+# Seconds an ExportService reuses a user's account IDs
+_ACCOUNT_IDS_TTL = 60
+
 
 class ExportFormat(str, Enum):
     """Supported export formats."""
@@ -28,6 +60,13 @@ class ExportFormat(str, Enum):
     CSV = "csv"
     EXCEL = "xlsx"
     JSON = "json"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+    FEATHER = "feather"
+
+
+# Formats written as (optionally compressed) text streams
+_TEXT_FORMATS = (ExportFormat.CSV, ExportFormat.JSON, ExportFormat.NDJSON)
 
 
 @dataclass
@@ -40,6 +79,8 @@ class ExportConfig:
     datetime_format: str = "%Y-%m-%d %H:%M:%S"
     decimal_places: int = 4
     encoding: str = "utf-8"
+    compression: Optional[str] = None  # "gzip", "zstd" or "lz4" for text formats
+    cache_dir: Optional[Path] = None  # reuse unchanged exports (see _cached_export)
 
 
 @dataclass
@@ -51,6 +92,7 @@ class ExportResult:
     file_path: Optional[Path] = None
     records_exported: int = 0
     error: Optional[str] = None
+    file_size: Optional[int] = None  # bytes on disk, summed for multi-file exports
 
 
 @dataclass
@@ -61,6 +103,268 @@ class DateRange:
     end_date: Optional[datetime] = None
 
 
+# Numeric export columns, converted column-wise from Decimal/NULL
+POSITION_NUM_COLS = (
+    "qty",
+    "can_sell_qty",
+    "cost_price",
+    "market_price",
+    "market_val",
+    "pl_val",
+    "pl_ratio",
+)
+TRADE_NUM_COLS = ("qty", "price", "amount", "fee")
+KLINE_FLOAT_COLS = ("open", "high", "low", "close", "amount")
+KLINE_INT_COLS = ("volume",)
+KLINE_MA_COLS = ("ma5", "ma10", "ma20", "ma60")
+
+# Timestamp columns, built as datetime64 without per-value type inference
+DATETIME_COLS = ("trade_time", "created_at")
+
+# Low-cardinality text columns stored as categoricals in columnar exports
+CATEGORY_COLS = (
+    "market",
+    "code",
+    "stock_name",
+    "currency",
+    "trd_side",
+    "position_side",
+)
+
+# Export column lists, selected directly so rows skip ORM object construction
+_POSITION_COLUMNS = (
+    Position.id,
+    Position.account_id,
+    Position.snapshot_date,
+    Position.market,
+    Position.code,
+    Position.stock_name,
+    Position.qty,
+    Position.can_sell_qty,
+    Position.cost_price,
+    Position.market_price,
+    Position.market_val,
+    Position.pl_val,
+    Position.pl_ratio,
+    Position.position_side,
+    Position.created_at,
+)
+
+_TRADE_COLUMNS = (
+    Trade.id,
+    Trade.account_id,
+    Trade.deal_id,
+    Trade.order_id,
+    Trade.trade_time,
+    Trade.market,
+    Trade.code,
+    Trade.stock_name,
+    Trade.trd_side,
+    Trade.qty,
+    Trade.price,
+    Trade.amount,
+    Trade.fee,
+    Trade.currency,
+)
+
+_KLINE_COLUMNS = (
+    Kline.trade_date,
+    Kline.market,
+    Kline.code,
+    Kline.open,
+    Kline.high,
+    Kline.low,
+    Kline.close,
+    Kline.volume,
+    Kline.amount,
+    Kline.ma5,
+    Kline.ma10,
+    Kline.ma20,
+    Kline.ma60,
+)
+
+_WATCHLIST_COLUMNS = (
+    WatchlistItem.id,
+    WatchlistItem.market,
+    WatchlistItem.code,
+    WatchlistItem.stock_name,
+    WatchlistItem.group_name,
+    WatchlistItem.notes,
+    WatchlistItem.sort_order,
+    WatchlistItem.is_active,
+    WatchlistItem.created_at,
+)
+
+
+def _iter_row_chunks(
+    session: Session,
+    query: Select,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[dict[str, tuple]]:
+    """Iterate column query results in fixed-size partitions.
+
+    Uses a server-side cursor (where supported) so only one partition of
+    rows is alive at a time. Each partition of Row tuples is transposed
+    with ``zip(*rows)``, avoiding a key lookup per cell through row
+    mappings.
+
+    Args:
+        session: Database session
+        query: Column select statement
+        chunk_size: Rows per partition
+
+    Yields:
+        Dicts of column name -> tuple of values for one partition
+    """
+    result = session.execute(
+        query.execution_options(stream_results=True, yield_per=chunk_size)
+    )
+    names = list(result.keys())
+    for rows in result.partitions(chunk_size):
+        yield dict(zip(names, zip(*rows)))
+
+
+def _iter_cursor_chunks(
+    session: Session,
+    query: Select,
+    chunk_size: int = CURSOR_FETCH_ROWS,
+) -> Iterator[dict[str, tuple]]:
+    """Iterate column query results straight from the DB-API cursor.
+
+    SQLAlchemy still compiles the statement and binds its parameters, but
+    rows are read with ``cursor.fetchmany`` so no Row objects or result
+    type processors are involved. Values therefore arrive as the driver
+    returns them (e.g. SQLite dates as ISO strings, Numeric as float).
+
+    The statement runs with ``stream_results`` so drivers that support it
+    use a server-side (named) cursor and memory stays bounded by one
+    batch. Batches are read through the result's cursor strategy, which
+    first hands back any rows it buffered while opening the cursor.
+
+    Args:
+        session: Database session
+        query: Column select statement
+        chunk_size: Rows per ``fetchmany`` call
+
+    Yields:
+        Dicts of column name -> tuple of values for one batch
+    """
+    result = session.connection().execute(query.execution_options(stream_results=True))
+    try:
+        names = list(result.keys())
+        # the strategy swaps itself out once the cursor is exhausted
+        while batch := result.cursor_strategy.fetchmany(
+            result, result.cursor, chunk_size
+        ):
+            yield dict(zip(names, zip(*batch)))
+    finally:
+        result.close()
+
+
+def _frame_from_rows(
+    rows: list,
+    float_columns: tuple[str, ...] = (),
+    int_columns: tuple[str, ...] = (),
+    nullable_columns: tuple[str, ...] = (),
+) -> pd.DataFrame:
+    """Build a DataFrame from row mappings, see _frame_from_columns."""
+    if not rows:
+        return pd.DataFrame()
+    columns = {col: [row[col] for row in rows] for col in rows[0].keys()}
+    return _frame_from_columns(columns, float_columns, int_columns, nullable_columns)
+
+
+def _frame_from_columns(
+    columns: dict,
+    float_columns: tuple[str, ...] = (),
+    int_columns: tuple[str, ...] = (),
+    nullable_columns: tuple[str, ...] = (),
+) -> pd.DataFrame:
+    """Build a DataFrame from per-column value sequences.
+
+    Numeric columns are converted from Decimal/NULL straight into
+    preallocated numpy arrays with ``np.fromiter``, and DATETIME_COLS are
+    declared as ``datetime64[us]``, so neither needs dtype inference
+    (datetime columns also keep their dtype in chunks that are all NULL).
+    Follows the ``float(x) if x else 0`` rule the exports have always
+    used: NULL becomes 0 in float and int columns, while nullable columns
+    map both NULL and 0 to NaN.
+
+    Column sets may name columns the query did not select, so one set can
+    be shared by exports that select only part of it.
+
+    Args:
+        columns: Column name -> equally long sequences of raw values
+        float_columns: Columns exported as float64
+        int_columns: Columns exported as int64
+        nullable_columns: Float columns where 0 means "no value"
+
+    Returns:
+        DataFrame with columns in query order
+    """
+    if not columns:
+        return pd.DataFrame()
+
+    n = len(next(iter(columns.values())))
+    data = {}
+    for col, values in columns.items():
+        if col in float_columns:
+            data[col] = np.fromiter(
+                (float(v) if v else 0.0 for v in values), dtype=np.float64, count=n
+            )
+        elif col in int_columns:
+            data[col] = np.fromiter(
+                (int(v) if v else 0 for v in values), dtype=np.int64, count=n
+            )
+        elif col in nullable_columns:
+            data[col] = np.fromiter(
+                (float(v) if v else np.nan for v in values), dtype=np.float64, count=n
+            )
+        elif col in DATETIME_COLS:
+            data[col] = pd.array(values, dtype="datetime64[us]")
+        else:
+            data[col] = values
+    return pd.DataFrame(data)
+
+
+def _prefetch(frames: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Yield frames while a worker thread already fetches the next one.
+
+    Overlaps the database round trip for one partition with writing the
+    previous one to disk. At most one frame is fetched ahead, and the
+    iterator is only ever advanced by one thread at a time. Exceptions
+    raised by the iterator surface in the caller.
+
+    Closing the generator (or exhausting it) waits for an in-flight fetch
+    to finish, so a consumer that fails mid-export must ``close()`` it
+    before the session behind ``frames`` is rolled back or closed;
+    otherwise the worker could still be using that session.
+    """
+    done = object()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(next, frames, done)
+        try:
+            while (df := future.result()) is not done:
+                future = pool.submit(next, frames, done)
+                yield df
+        finally:
+            if not future.cancel():
+                with suppress(Exception):
+                    future.result()
+
+
+def _split_frames(
+    frames: Iterable[pd.DataFrame], max_rows: int
+) -> Iterator[pd.DataFrame]:
+    """Yield frames, slicing any longer than max_rows into row ranges."""
+    for df in frames:
+        if len(df) <= max_rows:
+            yield df
+            continue
+        for start in range(0, len(df), max_rows):
+            yield df.iloc[start : start + max_rows]
+
+
 class ExportService:
     """Service for exporting data to various formats.
 
@@ -79,6 +383,10 @@ class ExportService:
         self.session = session
         self.config = config or ExportConfig()
 
+        # user_id -> (monotonic time loaded, account IDs); per instance, so
+        # account changes are picked up by the next export command
+        self._account_ids_cache: dict[int, tuple[float, tuple[int, ...]]] = {}
+
         # Create output directory if it doesn't exist
         self.config.output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -92,11 +400,21 @@ class ExportService:
             return self.session
         return SessionLocal()
 
+    @staticmethod
+    def _make_default_name(prefix: str, key: object) -> str:
+        """Build a default export filename like ``positions_1_20240115_103000``."""
+        return f"{prefix}_{key}_{datetime.now():%Y%m%d_%H%M%S}"
+
     def _get_user_account_ids(self, session: Session, user_id: int) -> list[int]:
-        """Get account IDs for a user."""
+        """Get account IDs for a user (cached per service for up to a minute)."""
+        cached = self._account_ids_cache.get(user_id)
+        if cached and time.monotonic() - cached[0] < _ACCOUNT_IDS_TTL:
+            return list(cached[1])
+
         query = select(Account.id).where(Account.user_id == user_id)
-        result = session.execute(query).scalars().all()
-        return list(result)
+        account_ids = tuple(session.execute(query).scalars())
+        self._account_ids_cache[user_id] = (time.monotonic(), account_ids)
+        return list(account_ids)
 
     def export_positions(
         self,
@@ -132,53 +450,21 @@ class ExportService:
                 )
 
             # Build query - filter by account_ids
-            query = select(Position).where(Position.account_id.in_(account_ids))
-            positions = session.execute(query).scalars().all()
-
-            if not positions:
-                return ExportResult(
-                    success=True,
-                    format=format,
-                    records_exported=0,
-                    error="No positions found",
-                )
-
-            # Convert to DataFrame
-            data = []
-            for pos in positions:
-                data.append(
-                    {
-                        "id": pos.id,
-                        "account_id": pos.account_id,
-                        "snapshot_date": pos.snapshot_date,
-                        "market": pos.market,
-                        "code": pos.code,
-                        "stock_name": pos.stock_name,
-                        "qty": float(pos.qty) if pos.qty else 0,
-                        "can_sell_qty": (
-                            float(pos.can_sell_qty) if pos.can_sell_qty else 0
-                        ),
-                        "cost_price": float(pos.cost_price) if pos.cost_price else 0,
-                        "market_price": (
-                            float(pos.market_price) if pos.market_price else 0
-                        ),
-                        "market_val": float(pos.market_val) if pos.market_val else 0,
-                        "pl_val": float(pos.pl_val) if pos.pl_val else 0,
-                        "pl_ratio": float(pos.pl_ratio) if pos.pl_ratio else 0,
-                        "position_side": pos.position_side,
-                        "created_at": pos.created_at,
-                    }
-                )
-
-            df = pd.DataFrame(data)
-
-            # Generate filename
-            if not filename:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"positions_{user_id}_{timestamp}"
-
-            # Export
-            return self._export_dataframe(df, format, filename)
+            query = select(*_POSITION_COLUMNS).where(
+                Position.account_id.in_(account_ids)
+            )
+            filename = filename or self._make_default_name("positions", user_id)
+
+            # Not cached: sync rewrites positions in place and they carry no
+            # updated_at, so there is no cheap way to tell a stale entry
+            return self._export_query(
+                session,
+                query,
+                format,
+                filename,
+                empty_error="No positions found",
+                float_columns=POSITION_NUM_COLS,
+            )
 
         except Exception as e:
             return ExportResult(
@@ -223,7 +509,7 @@ class ExportService:
                 )
 
             # Build query
-            query = select(Trade).where(Trade.account_id.in_(account_ids))
+            query = select(*_TRADE_COLUMNS).where(Trade.account_id.in_(account_ids))
 
             if date_range:
                 if date_range.start_date:
@@ -231,48 +517,20 @@ class ExportService:
                 if date_range.end_date:
                     query = query.where(Trade.trade_time <= date_range.end_date)
 
+            # Trades are only ever inserted, so count and newest id version them
+            version = select(func.count(), func.max(Trade.id)).where(query.whereclause)
             query = query.order_by(Trade.trade_time.desc())
-            trades = session.execute(query).scalars().all()
-
-            if not trades:
-                return ExportResult(
-                    success=True,
-                    format=format,
-                    records_exported=0,
-                    error="No trades found",
-                )
-
-            # Convert to DataFrame
-            data = []
-            for trade in trades:
-                data.append(
-                    {
-                        "id": trade.id,
-                        "account_id": trade.account_id,
-                        "deal_id": trade.deal_id,
-                        "order_id": trade.order_id,
-                        "trade_time": trade.trade_time,
-                        "market": trade.market,
-                        "code": trade.code,
-                        "stock_name": trade.stock_name,
-                        "trd_side": trade.trd_side,
-                        "qty": float(trade.qty) if trade.qty else 0,
-                        "price": float(trade.price) if trade.price else 0,
-                        "amount": float(trade.amount) if trade.amount else 0,
-                        "fee": float(trade.fee) if trade.fee else 0,
-                        "currency": trade.currency,
-                    }
-                )
-
-            df = pd.DataFrame(data)
-
-            # Generate filename
-            if not filename:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"trades_{user_id}_{timestamp}"
-
-            # Export
-            return self._export_dataframe(df, format, filename)
+            filename = filename or self._make_default_name("trades", user_id)
+
+            return self._export_query(
+                session,
+                query,
+                format,
+                filename,
+                empty_error="No trades found",
+                version=version,
+                float_columns=TRADE_NUM_COLS,
+            )
 
         except Exception as e:
             return ExportResult(
@@ -312,7 +570,7 @@ class ExportService:
                 stock_code = code
 
             # Build query
-            query = select(Kline)
+            query = select(*_KLINE_COLUMNS)
             if market:
                 query = query.where(Kline.market == market)
             query = query.where(Kline.code == stock_code)
@@ -325,55 +583,33 @@ class ExportService:
                 if date_range.end_date:
                     query = query.where(Kline.trade_date <= date_range.end_date.date())
 
-            query = query.order_by(Kline.trade_date.desc())
+            version = select(func.count(), func.max(Kline.updated_at)).where(
+                query.whereclause
+            )
 
+            # Export in ascending date order; with a limit, keep the latest N
             if limit:
-                query = query.limit(limit)
-
-            klines = session.execute(query).scalars().all()
-
-            if not klines:
-                return ExportResult(
-                    success=True,
-                    format=format,
-                    records_exported=0,
-                    error="No kline data found",
-                )
-
-            # Convert to DataFrame
-            data = []
-            for kline in klines:
-                data.append(
-                    {
-                        "trade_date": kline.trade_date,
-                        "market": kline.market,
-                        "code": kline.code,
-                        "open": float(kline.open) if kline.open else 0,
-                        "high": float(kline.high) if kline.high else 0,
-                        "low": float(kline.low) if kline.low else 0,
-                        "close": float(kline.close) if kline.close else 0,
-                        "volume": int(kline.volume) if kline.volume else 0,
-                        "amount": float(kline.amount) if kline.amount else 0,
-                        "ma5": float(kline.ma5) if kline.ma5 else None,
-                        "ma10": float(kline.ma10) if kline.ma10 else None,
-                        "ma20": float(kline.ma20) if kline.ma20 else None,
-                        "ma60": float(kline.ma60) if kline.ma60 else None,
-                    }
-                )
-
-            df = pd.DataFrame(data)
-
-            # Sort by date ascending for export
-            df = df.sort_values("trade_date")
+                latest = query.order_by(Kline.trade_date.desc()).limit(limit).subquery()
+                query = select(latest).order_by(latest.c.trade_date)
+            else:
+                query = query.order_by(Kline.trade_date)
 
-            # Generate filename
-            if not filename:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                safe_code = code.replace(".", "_")
-                filename = f"klines_{safe_code}_{timestamp}"
+            filename = filename or self._make_default_name(
+                "klines", code.replace(".", "_")
+            )
 
-            # Export
-            return self._export_dataframe(df, format, filename)
+            return self._export_query(
+                session,
+                query,
+                format,
+                filename,
+                empty_error="No kline data found",
+                version=version,
+                float_columns=KLINE_FLOAT_COLS,
+                int_columns=KLINE_INT_COLS,
+                nullable_columns=KLINE_MA_COLS,
+                raw_cursor=format == ExportFormat.CSV,
+            )
 
         except Exception as e:
             return ExportResult(
@@ -402,46 +638,23 @@ class ExportService:
             session = self._get_session()
 
             # Build query
-            query = select(WatchlistItem).where(
+            query = select(*_WATCHLIST_COLUMNS).where(
                 WatchlistItem.user_id == user_id,
                 WatchlistItem.is_active == True,
             )
-            watchlist = session.execute(query).scalars().all()
-
-            if not watchlist:
-                return ExportResult(
-                    success=True,
-                    format=format,
-                    records_exported=0,
-                    error="No watchlist items found",
-                )
-
-            # Convert to DataFrame
-            data = []
-            for item in watchlist:
-                data.append(
-                    {
-                        "id": item.id,
-                        "market": item.market,
-                        "code": item.code,
-                        "stock_name": item.stock_name,
-                        "group_name": item.group_name,
-                        "notes": item.notes,
-                        "sort_order": item.sort_order,
-                        "is_active": item.is_active,
-                        "created_at": item.created_at,
-                    }
-                )
-
-            df = pd.DataFrame(data)
-
-            # Generate filename
-            if not filename:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"watchlist_{user_id}_{timestamp}"
-
-            # Export
-            return self._export_dataframe(df, format, filename)
+            version = select(func.count(), func.max(WatchlistItem.updated_at)).where(
+                query.whereclause
+            )
+            filename = filename or self._make_default_name("watchlist", user_id)
+
+            return self._export_query(
+                session,
+                query,
+                format,
+                filename,
+                empty_error="No watchlist items found",
+                version=version,
+            )
 
         except Exception as e:
             return ExportResult(
@@ -471,80 +684,30 @@ class ExportService:
         try:
             session = self._get_session()
 
-            # Get account IDs
-            account_ids = self._get_user_account_ids(session, user_id)
+            # Filter by the user's accounts inside each query instead of
+            # looking the IDs up first: one round trip fewer, and the
+            # loaders can all start at once
+            account_ids = select(Account.id).where(Account.user_id == user_id)
 
             # Collect all data
-            dataframes = {}
-
-            # Positions
-            if account_ids:
-                positions_query = select(Position).where(
-                    Position.account_id.in_(account_ids)
-                )
-                positions = session.execute(positions_query).scalars().all()
-                if positions:
-                    positions_data = [
-                        {
-                            "market": p.market,
-                            "code": p.code,
-                            "stock_name": p.stock_name,
-                            "qty": float(p.qty) if p.qty else 0,
-                            "cost_price": float(p.cost_price) if p.cost_price else 0,
-                            "market_price": (
-                                float(p.market_price) if p.market_price else 0
-                            ),
-                            "market_val": float(p.market_val) if p.market_val else 0,
-                            "pl_val": float(p.pl_val) if p.pl_val else 0,
-                            "pl_ratio": float(p.pl_ratio) if p.pl_ratio else 0,
-                        }
-                        for p in positions
-                    ]
-                    dataframes["positions"] = pd.DataFrame(positions_data)
-
-                # Trades
-                trades_query = (
-                    select(Trade)
-                    .where(Trade.account_id.in_(account_ids))
-                    .order_by(Trade.trade_time.desc())
-                )
-                trades = session.execute(trades_query).scalars().all()
-                if trades:
-                    trades_data = [
-                        {
-                            "trade_time": t.trade_time,
-                            "market": t.market,
-                            "code": t.code,
-                            "stock_name": t.stock_name,
-                            "trd_side": t.trd_side,
-                            "qty": float(t.qty) if t.qty else 0,
-                            "price": float(t.price) if t.price else 0,
-                            "amount": float(t.amount) if t.amount else 0,
-                            "fee": float(t.fee) if t.fee else 0,
-                        }
-                        for t in trades
-                    ]
-                    dataframes["trades"] = pd.DataFrame(trades_data)
-
-            # Watchlist
-            watchlist_query = select(WatchlistItem).where(
-                WatchlistItem.user_id == user_id,
-                WatchlistItem.is_active == True,
-            )
-            watchlist = session.execute(watchlist_query).scalars().all()
-            if watchlist:
-                watchlist_data = [
-                    {
-                        "market": w.market,
-                        "code": w.code,
-                        "stock_name": w.stock_name,
-                        "group_name": w.group_name,
-                        "notes": w.notes,
-                        "created_at": w.created_at,
+            loaders = [
+                ("positions", self._load_positions_df, account_ids),
+                ("trades", self._load_trades_df, account_ids),
+                ("watchlist", self._load_watchlist_df, user_id),
+            ]
+
+            if self._can_load_in_parallel():
+                # Independent queries, each on its own session/connection
+                with ThreadPoolExecutor(max_workers=len(loaders)) as pool:
+                    futures = {
+                        name: pool.submit(self._load_in_new_session, loader, arg)
+                        for name, loader, arg in loaders
                     }
-                    for w in watchlist
-                ]
-                dataframes["watchlist"] = pd.DataFrame(watchlist_data)
+                    loaded = {name: future.result() for name, future in futures.items()}
+            else:
+                loaded = {name: loader(session, arg) for name, loader, arg in loaders}
+
+            dataframes = {name: df for name, df in loaded.items() if df is not None}
 
             if not dataframes:
                 return ExportResult(
@@ -555,13 +718,13 @@ class ExportService:
                 )
 
             # Generate filename
-            if not filename:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"portfolio_{user_id}_{timestamp}"
+            filename = filename or self._make_default_name("portfolio", user_id)
 
             # Export based on format
             if format == ExportFormat.EXCEL:
                 return self._export_multi_sheet_excel(dataframes, filename)
+            elif format in (ExportFormat.PARQUET, ExportFormat.FEATHER):
+                return self._export_multi_file(dataframes, format, filename)
             else:
                 # For CSV/JSON, export positions only as main data
                 main_df = dataframes.get("positions", list(dataframes.values())[0])
@@ -574,6 +737,272 @@ class ExportService:
                 error=str(e),
             )
 
+    def _can_load_in_parallel(self) -> bool:
+        """Check whether export_all may run its queries on separate sessions.
+
+        Only when no session was injected (so loaders can open their own)
+        and the database is not SQLite, whose single-writer file locking
+        gains nothing from concurrent connections.
+        """
+        if self.session is not None:
+            return False
+        return SessionLocal.kw["bind"].dialect.name != "sqlite"
+
+    @staticmethod
+    def _load_in_new_session(
+        loader: Callable[[Session, object], Optional[pd.DataFrame]], arg: object
+    ) -> Optional[pd.DataFrame]:
+        """Run a loader on a dedicated session (used from worker threads)."""
+        with SessionLocal() as session:
+            return loader(session, arg)
+
+    def _load_positions_df(
+        self, session: Session, account_ids: Union[list[int], Select]
+    ) -> Optional[pd.DataFrame]:
+        """Load the positions sheet for export_all, or None if empty.
+
+        ``account_ids`` is a list of IDs or a select of ``Account.id``.
+        """
+        query = select(
+            Position.market,
+            Position.code,
+            Position.stock_name,
+            Position.qty,
+            Position.cost_price,
+            Position.market_price,
+            Position.market_val,
+            Position.pl_val,
+            Position.pl_ratio,
+        ).where(Position.account_id.in_(account_ids))
+        return self._load_frame(session, query, float_columns=POSITION_NUM_COLS)
+
+    def _load_trades_df(
+        self, session: Session, account_ids: Union[list[int], Select]
+    ) -> Optional[pd.DataFrame]:
+        """Load the trades sheet for export_all, or None if empty.
+
+        ``account_ids`` is a list of IDs or a select of ``Account.id``.
+        """
+        query = (
+            select(
+                Trade.trade_time,
+                Trade.market,
+                Trade.code,
+                Trade.stock_name,
+                Trade.trd_side,
+                Trade.qty,
+                Trade.price,
+                Trade.amount,
+                Trade.fee,
+            )
+            .where(Trade.account_id.in_(account_ids))
+            .order_by(Trade.trade_time.desc())
+        )
+        return self._load_frame(session, query, float_columns=TRADE_NUM_COLS)
+
+    def _load_watchlist_df(
+        self, session: Session, user_id: int
+    ) -> Optional[pd.DataFrame]:
+        """Load the watchlist sheet for export_all, or None if empty."""
+        query = select(
+            WatchlistItem.market,
+            WatchlistItem.code,
+            WatchlistItem.stock_name,
+            WatchlistItem.group_name,
+            WatchlistItem.notes,
+            WatchlistItem.created_at,
+        ).where(
+            WatchlistItem.user_id == user_id,
+            WatchlistItem.is_active == True,
+        )
+        return self._load_frame(session, query)
+
+    def _load_frame(
+        self,
+        session: Session,
+        query: Select,
+        float_columns: tuple[str, ...] = (),
+    ) -> Optional[pd.DataFrame]:
+        """Load a whole query result as one DataFrame, or None if empty.
+
+        Rows are fetched and converted in STREAM_CHUNK_SIZE partitions, so
+        only the typed column arrays accumulate, not the raw rows.
+        """
+        frames = list(self._iter_frames(session, query, float_columns))
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+    def _iter_frames(
+        self,
+        session: Session,
+        query: Select,
+        float_columns: tuple[str, ...] = (),
+        int_columns: tuple[str, ...] = (),
+        nullable_columns: tuple[str, ...] = (),
+        raw_cursor: bool = False,
+    ) -> Iterator[pd.DataFrame]:
+        """Stream a column query as one DataFrame per partition.
+
+        Numeric columns are converted per chunk with fixed dtypes so every
+        chunk serializes the same way.
+
+        ``raw_cursor`` reads batches of CURSOR_FETCH_ROWS from the DB-API
+        cursor instead of a streamed ORM result. It skips SQLAlchemy's per
+        row overhead while still using a server-side cursor, but non-numeric
+        values keep the driver's own types, so it is only used for kline
+        CSV, where they render the same text.
+
+        Except on SQLite, the next partition is fetched by a worker thread
+        while the caller writes the current one (see _prefetch).
+
+        Args:
+            session: Database session
+            query: Column select statement
+            float_columns: Columns exported as float64 (NULL -> 0.0)
+            int_columns: Columns exported as int64 (NULL -> 0)
+            nullable_columns: Float columns where NULL and 0 become NaN
+            raw_cursor: Fetch through the DB-API cursor
+
+        Returns:
+            Iterator of DataFrames of at most STREAM_CHUNK_SIZE (or
+            CURSOR_FETCH_ROWS) rows
+        """
+        if raw_cursor:
+            chunks = _iter_cursor_chunks(session, query, CURSOR_FETCH_ROWS)
+        else:
+            chunks = _iter_row_chunks(session, query, STREAM_CHUNK_SIZE)
+        frames = (
+            _frame_from_columns(columns, float_columns, int_columns, nullable_columns)
+            for columns in chunks
+        )
+
+        # SQLite connections are bound to their creating thread by default
+        if session.get_bind().dialect.name == "sqlite":
+            return frames
+        return _prefetch(frames)
+
+    def _export_query(
+        self,
+        session: Session,
+        query: Select,
+        format: ExportFormat,
+        filename: str,
+        empty_error: str,
+        version: Optional[Select] = None,
+        **frame_options,
+    ) -> ExportResult:
+        """Stream a column query into an export file.
+
+        Args:
+            session: Database session
+            query: Column select statement
+            format: Export format
+            filename: Base filename (without extension)
+            empty_error: Message for the result when the query has no rows
+            version: Aggregate query identifying the data version; enables
+                the export cache when ``config.cache_dir`` is set
+            **frame_options: Column typing options for _iter_frames
+
+        Returns:
+            ExportResult with export details
+        """
+
+        def export() -> ExportResult:
+            frames = self._iter_frames(session, query, **frame_options)
+            try:
+                first = next(frames, None)
+                if first is None:
+                    return ExportResult(
+                        success=True,
+                        format=format,
+                        records_exported=0,
+                        error=empty_error,
+                    )
+                return self._export_frames(chain([first], frames), format, filename)
+            finally:
+                # stop any prefetch worker before the session is used again
+                frames.close()
+
+        if version is None or self.config.cache_dir is None:
+            return export()
+        return self._cached_export(session, query, version, format, filename, export)
+
+    def _cached_export(
+        self,
+        session: Session,
+        query: Select,
+        version: Select,
+        format: ExportFormat,
+        filename: str,
+        export: Callable[[], ExportResult],
+    ) -> ExportResult:
+        """Serve an export from ``config.cache_dir``, or run and cache it.
+
+        The key hashes the export SQL with its parameters, the options that
+        shape the output, and the row returned by ``version`` (row count
+        plus newest id or updated_at of the exported rows), which changes
+        whenever the data does. A hit copies the cached file to the output
+        path without running the export query or building any DataFrame.
+        Entries are named ``<key>_<records><suffix>``; empty and failed
+        exports are not cached.
+
+        Args:
+            session: Database session
+            query: Export query
+            version: Aggregate query over the exported rows
+            format: Export format
+            filename: Base filename (without extension)
+            export: Runs the export on a miss
+
+        Returns:
+            ExportResult with export details
+        """
+        compiled = query.compile(session.get_bind())
+        key = hashlib.blake2b(
+            "|".join(
+                str(part)
+                for part in (
+                    compiled,
+                    compiled.params,
+                    format.value,
+                    self.config.compression,
+                    self.config.datetime_format,
+                    tuple(session.execute(version).one()),
+                )
+            ).encode(),
+            digest_size=16,
+        ).hexdigest()
+
+        cache_dir = Path(self.config.cache_dir)
+        cached = next(cache_dir.glob(f"{key}_*"), None)
+        if cached is not None:
+            records, _, ext = cached.name[len(key) + 1 :].partition(".")
+            file_path = self.config.output_dir / f"{filename}.{ext}"
+            shutil.copyfile(cached, file_path)
+            return ExportResult(
+                success=True,
+                format=format,
+                file_path=file_path,
+                records_exported=int(records),
+                file_size=file_path.stat().st_size,
+            )
+
+        result = export()
+        if result.success and result.records_exported and result.file_path:
+            suffix = result.file_path.name[len(filename) :]
+            entry = cache_dir / f"{key}_{result.records_exported}{suffix}"
+            # Copy under a name the lookup glob cannot match, then publish
+            tmp_path = cache_dir / f"tmp_{os.getpid()}_{entry.name}"
+            try:
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(result.file_path, tmp_path)
+                os.replace(tmp_path, entry)
+            except OSError as e:
+                logger.warning(f"Failed to cache export {filename}: {e}")
+                tmp_path.unlink(missing_ok=True)
+        return result
+
     def _export_dataframe(
         self,
         df: pd.DataFrame,
@@ -587,45 +1016,58 @@ class ExportService:
             format: Export format
             filename: Base filename (without extension)
 
+        Returns:
+            ExportResult with export details
+        """
+        return self._export_frames([df], format, filename)
+
+    def _export_frames(
+        self,
+        frames: Iterable[pd.DataFrame],
+        format: ExportFormat,
+        filename: str,
+    ) -> ExportResult:
+        """Export a sequence of DataFrame chunks to a single file.
+
+        CSV, JSON and NDJSON are written chunk by chunk to an open file, so
+        only one chunk is held in memory, and are compressed on the fly when
+        ``config.compression`` is set. Excel, Parquet and Feather need the
+        whole table at once and concatenate the chunks first.
+
+        Args:
+            frames: DataFrame chunks sharing the same columns
+            format: Export format
+            filename: Base filename (without extension)
+
         Returns:
             ExportResult with export details
         """
         try:
             # Determine file path
             extension = format.value
+            compression = self.config.compression
+            if compression and format in _TEXT_FORMATS:
+                if compression not in COMPRESSION_EXTENSIONS:
+                    raise ValueError(f"Unsupported compression: {compression}")
+                extension += "." + COMPRESSION_EXTENSIONS[compression]
             file_path = self.config.output_dir / f"{filename}.{extension}"
 
             # Export based on format
             if format == ExportFormat.CSV:
-                df.to_csv(
-                    file_path,
-                    index=False,
-                    encoding=self.config.encoding,
-                    date_format=self.config.datetime_format,
-                )
+                records = self._write_csv(frames, file_path)
             elif format == ExportFormat.EXCEL:
-                df.to_excel(
-                    file_path,
-                    index=False,
-                    engine="openpyxl",
-                )
+                df = pd.concat(frames, ignore_index=True)
+                with self._excel_writer(file_path) as writer:
+                    df.to_excel(writer, index=False)
+                records = len(df)
             elif format == ExportFormat.JSON:
-                # Convert datetime columns to strings
-                df_json = df.copy()
-                for col in df_json.columns:
-                    if pd.api.types.is_datetime64_any_dtype(df_json[col]):
-                        df_json[col] = df_json[col].dt.strftime(
-                            self.config.datetime_format
-                        )
-
-                with open(file_path, "w", encoding=self.config.encoding) as f:
-                    json.dump(
-                        df_json.to_dict(orient="records"),
-                        f,
-                        ensure_ascii=False,
-                        indent=2,
-                        default=str,
-                    )
+                records = self._write_json(frames, file_path)
+            elif format == ExportFormat.NDJSON:
+                records = self._write_ndjson(frames, file_path)
+            elif format in (ExportFormat.PARQUET, ExportFormat.FEATHER):
+                df = pd.concat(frames, ignore_index=True)
+                self._write_columnar(df, format, file_path)
+                records = len(df)
             else:
                 return ExportResult(
                     success=False,
@@ -637,7 +1079,249 @@ class ExportService:
                 success=True,
                 format=format,
                 file_path=file_path,
-                records_exported=len(df),
+                records_exported=records,
+                file_size=file_path.stat().st_size,
+            )
+
+        except Exception as e:
+            return ExportResult(
+                success=False,
+                format=format,
+                error=str(e),
+            )
+
+    def _write_csv(self, frames: Iterable[pd.DataFrame], file_path: Path) -> int:
+        """Append DataFrame chunks to a CSV file, writing the header once.
+
+        Every export goes through pandas' writer, so the file formatting does
+        not depend on its size. Frames longer than CSV_WRITE_CHUNK_ROWS are
+        written in slices, and the file is opened with a CSV_BUFFER_SIZE
+        buffer so slices reach the disk in large writes.
+
+        Returns:
+            Number of rows written
+        """
+        records = 0
+        with self._open_text(file_path, buffering=CSV_BUFFER_SIZE, newline="") as f:
+            for df in _split_frames(frames, CSV_WRITE_CHUNK_ROWS):
+                df.to_csv(
+                    f,
+                    index=False,
+                    header=records == 0,
+                    date_format=self.config.datetime_format,
+                )
+                records += len(df)
+        return records
+
+    def _open_text(
+        self, file_path: Path, buffering: int = -1, newline: Optional[str] = None
+    ) -> TextIO:
+        """Open an output file for writing text, compressed if configured.
+
+        Compression uses pyarrow's gzip, zstd and lz4 (frame) codecs, so
+        no extra packages are required.
+        """
+        if not self.config.compression:
+            return open(
+                file_path,
+                "w",
+                buffering=buffering,
+                encoding=self.config.encoding,
+                newline=newline,
+            )
+
+        import pyarrow as pa
+
+        stream = pa.output_stream(str(file_path), compression=self.config.compression)
+        return io.TextIOWrapper(stream, encoding=self.config.encoding, newline=newline)
+
+    def _format_datetimes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return df with datetime columns formatted as strings.
+
+        The result is a shallow copy: under copy-on-write only the replaced
+        datetime columns are new, the rest share the caller's buffers, and
+        the caller's frame is left untouched.
+        """
+        datetime_cols = [
+            col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col])
+        ]
+        if not datetime_cols:
+            return df
+        df = df.copy(deep=False)
+        for col in datetime_cols:
+            df[col] = df[col].dt.strftime(self.config.datetime_format)
+        return df
+
+    def _write_json(self, frames: Iterable[pd.DataFrame], file_path: Path) -> int:
+        """Write DataFrame chunks as one JSON array of records.
+
+        Output matches ``json.dump(records, indent=2)`` over the full data.
+        Chunks are encoded with orjson when it is installed, otherwise with
+        the stdlib encoder one record at a time.
+
+        Returns:
+            Number of records written
+        """
+        try:
+            import orjson
+        except ImportError:
+            orjson = None
+
+        records = 0
+        with self._open_text(file_path) as f:
+            f.write("[")
+            for df in frames:
+                if df.empty:
+                    continue
+
+                df_json = self._format_datetimes(df)
+
+                if orjson is not None:
+                    # orjson writes NaN as null; strip the chunk's own brackets
+                    encoded = orjson.dumps(
+                        df_json.to_dict(orient="records"),
+                        default=str,
+                        option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+                    )
+                    f.write("," if records else "")
+                    f.write(encoded[1:-2].decode())
+                    records += len(df_json)
+                    continue
+
+                # Missing values become null (NaN is not valid JSON)
+                df_json = df_json.astype(object).where(df_json.notna(), None)
+
+                for record in df_json.to_dict(orient="records"):
+                    encoded = json.dumps(
+                        record, ensure_ascii=False, indent=2, default=str
+                    )
+                    f.write("," if records else "")
+                    f.write("\n" + textwrap.indent(encoded, "  "))
+                    records += 1
+            f.write("\n]" if records else "]")
+        return records
+
+    def _excel_writer(self, file_path: Path) -> pd.ExcelWriter:
+        """Open an Excel writer, preferring xlsxwriter over openpyxl.
+
+        xlsxwriter writes large sheets considerably faster. Cell text is
+        kept literal: strings are never turned into URLs or formulas.
+        ``constant_memory`` is not used because pandas writes cells
+        column by column, which that mode silently drops.
+        """
+        try:
+            import xlsxwriter  # noqa: F401
+        except ImportError:
+            return pd.ExcelWriter(file_path, engine="openpyxl")
+
+        return pd.ExcelWriter(
+            file_path,
+            engine="xlsxwriter",
+            engine_kwargs={
+                "options": {"strings_to_urls": False, "strings_to_formulas": False}
+            },
+        )
+
+    def _write_columnar(
+        self, df: pd.DataFrame, format: ExportFormat, file_path: Path
+    ) -> None:
+        """Write a DataFrame as compressed Parquet or Feather.
+
+        CATEGORY_COLS are converted to categoricals first, so they are
+        stored dictionary-encoded and read back as ``category`` dtype.
+        """
+        categories = [col for col in CATEGORY_COLS if col in df.columns]
+        if categories:
+            df = df.astype(dict.fromkeys(categories, "category"))
+
+        if format == ExportFormat.PARQUET:
+            df.to_parquet(file_path, engine="pyarrow", compression="zstd", index=False)
+        else:
+            df.to_feather(file_path, compression="lz4")
+
+    def _write_ndjson(self, frames: Iterable[pd.DataFrame], file_path: Path) -> int:
+        """Write DataFrame chunks as newline-delimited JSON records.
+
+        Each line holds the same compact record the JSON export would
+        contain, so files can be appended to and read back line by line.
+
+        Returns:
+            Number of records written
+        """
+        try:
+            import orjson
+        except ImportError:
+            orjson = None
+
+        records = 0
+        with self._open_text(file_path) as f:
+            for df in frames:
+                df_json = self._format_datetimes(df)
+                if orjson is not None:
+                    encoded = b"".join(
+                        orjson.dumps(
+                            record,
+                            default=str,
+                            option=orjson.OPT_APPEND_NEWLINE
+                            | orjson.OPT_SERIALIZE_NUMPY,
+                        )
+                        for record in df_json.to_dict(orient="records")
+                    )
+                    f.write(encoded.decode())
+                else:
+                    # Missing values become null (NaN is not valid JSON)
+                    df_json = df_json.astype(object).where(df_json.notna(), None)
+                    f.writelines(
+                        json.dumps(
+                            record,
+                            ensure_ascii=False,
+                            separators=(",", ":"),
+                            default=str,
+                        )
+                        + "\n"
+                        for record in df_json.to_dict(orient="records")
+                    )
+                records += len(df_json)
+        return records
+
+    def _export_multi_file(
+        self,
+        dataframes: dict[str, pd.DataFrame],
+        format: ExportFormat,
+        filename: str,
+    ) -> ExportResult:
+        """Export multiple DataFrames as one columnar file each.
+
+        Parquet and Feather have no worksheets, so each table is written to
+        ``<filename>/<table>.<ext>`` inside the output directory.
+
+        Args:
+            dataframes: Dictionary of table_name -> DataFrame
+            format: PARQUET or FEATHER
+            filename: Directory name (created under output_dir)
+
+        Returns:
+            ExportResult whose file_path is the directory and whose
+            file_size is the total size of the files written
+        """
+        try:
+            dir_path = self.config.output_dir / filename
+            dir_path.mkdir(parents=True, exist_ok=True)
+
+            total_records = 0
+            total_size = 0
+            for table_name, df in dataframes.items():
+                file_path = dir_path / f"{table_name}.{format.value}"
+                self._write_columnar(df.reset_index(drop=True), format, file_path)
+                total_records += len(df)
+                total_size += file_path.stat().st_size
+
+            return ExportResult(
+                success=True,
+                format=format,
+                file_path=dir_path,
+                records_exported=total_records,
+                file_size=total_size,
             )
 
         except Exception as e:
@@ -664,7 +1348,7 @@ class ExportService:
         try:
             file_path = self.config.output_dir / f"{filename}.xlsx"
 
-            with pd.ExcelWriter(file_path, engine="openpyxl") as writer:
+            with self._excel_writer(file_path) as writer:
                 total_records = 0
                 for sheet_name, df in dataframes.items():
                     df.to_excel(writer, sheet_name=sheet_name, index=False)
@@ -675,6 +1359,7 @@ class ExportService:
                 format=ExportFormat.EXCEL,
                 file_path=file_path,
                 records_exported=total_records,
+                file_size=file_path.stat().st_size,
             )
 
         except Exception as e:
@@ -0,0 +1,118 @@
+"""
+On-disk K-line cache for Investment Analyzer.
+
+Stores fetched K-line DataFrames keyed by (code, days, date) so repeated
+chart runs on the same day skip the network fetch. Entries expire after
+``settings.kline.cache_hours``.
+
+Usage:
+    from services.kline_cache import KlineCache
+
+    cache = KlineCache()
+    df = cache.get("HK.00700", days=120)
+    if df is None:
+        result = kline_fetcher.fetch("HK.00700", days=120)
+        cache.set("HK.00700", 120, result.df)
+"""
+
+import hashlib
+import logging
+import os
+import time
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class KlineCache:
+    """
+    File-based K-line DataFrame cache with a time-to-live.
+
+    Each entry is a pickled DataFrame named by an MD5 of
+    ``code|days|today``, so the cache naturally rolls over each day.
+    Writes go through a temporary file and ``os.replace`` so concurrent
+    fetch threads never observe a partially written entry.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        ttl_hours: Optional[float] = None,
+    ):
+        """
+        Initialize K-line cache.
+
+        Args:
+            cache_dir: Directory for cache files (default: settings.kline.cache_dir)
+            ttl_hours: Entry lifetime in hours (default: settings.kline.cache_hours)
+        """
+        self.cache_dir = Path(cache_dir or settings.kline.cache_dir)
+        hours = settings.kline.cache_hours if ttl_hours is None else ttl_hours
+        self.ttl_seconds = hours * 3600
+
+    def _path(self, code: str, days: int) -> Path:
+        """Get cache file path for a (code, days) pair."""
+        key = hashlib.md5(f"{code}|{days}|{date.today()}".encode()).hexdigest()
+        return self.cache_dir / f"{key}.pkl"
+
+    def get(self, code: str, days: int) -> Optional[pd.DataFrame]:
+        """
+        Get a cached DataFrame if present and not expired.
+
+        Args:
+            code: Stock code (e.g., "HK.00700")
+            days: Number of days the DataFrame was fetched with
+
+        Returns:
+            Cached DataFrame, or None on miss/expiry
+        """
+        path = self._path(code, days)
+        try:
+            if time.time() - path.stat().st_mtime >= self.ttl_seconds:
+                return None
+            return pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable K-line cache for {code}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def set(self, code: str, days: int, df: pd.DataFrame) -> None:
+        """
+        Store a DataFrame in the cache.
+
+        Args:
+            code: Stock code
+            days: Number of days the DataFrame was fetched with
+            df: K-line DataFrame
+        """
+        path = self._path(code, days)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{id(df)}.tmp")
+            df.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to cache K-line data for {code}: {e}")
+
+    def clear(self) -> int:
+        """
+        Remove all cache entries.
+
+        Returns:
+            Number of files removed
+        """
+        if not self.cache_dir.exists():
+            return 0
+        removed = 0
+        for path in self.cache_dir.glob("*.pkl"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
@@ -24,12 +24,13 @@ Usage:
 """
 
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
-from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import and_, select
+from sqlalchemy import and_, event, insert, inspect, literal_column, or_, select, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
@@ -46,12 +47,64 @@ from db.models import (
 )
 from fetchers import FutuFetcher, KlineFetcher, Market
 from fetchers.base import AccountInfo, PositionInfo, TradeInfo, WatchlistInfo
-from fetchers.kline_fetcher import KlineData
+from fetchers.kline_fetcher import KlineData, KlineFetchResult
 
 logger = logging.getLogger(__name__)
 
+# Position columns refreshed when a snapshot row is synced again
+POSITION_UPSERT_COLUMNS = (
+    "stock_name",
+    "qty",
+    "can_sell_qty",
+    "cost_price",
+    "market_price",
+    "market_val",
+    "pl_val",
+    "pl_ratio",
+    "position_side",
+)
+
+# Concurrent K-line fetches in sync_klines (requests are network-bound)
+KLINE_FETCH_WORKERS = 8
+
+# K-line rows per INSERT ... ON CONFLICT statement (13 bound columns per row
+# keeps a full chunk under PostgreSQL's 65,535 parameter limit)
+KLINE_UPSERT_CHUNK = 5_000
+
+# K-line columns refreshed when a bar is synced again
+KLINE_UPSERT_COLUMNS = (
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "amount",
+    "turnover_rate",
+    "change_pct",
+)
+
+# Account snapshot columns refreshed when a day's snapshot is synced again
+SNAPSHOT_UPSERT_COLUMNS = (
+    "total_assets",
+    "cash",
+    "market_val",
+    "frozen_cash",
+    "buying_power",
+    "max_power_short",
+    "currency",
+)
 
-@dataclass
+# Concurrent Futu account info requests in _sync_account_snapshots
+ACCOUNT_INFO_WORKERS = 4
+
+# Seconds a last-sync lookup is served from memory before re-querying
+LAST_SYNC_CACHE_TTL = 30
+
+# SyncLog columns kept in the last-sync cache
+SYNC_LOG_COLUMNS = tuple(SyncLog.__table__.columns.keys())
+
+
+@dataclass(slots=True)
 class SyncResult:
     """Result of a sync operation."""
 
@@ -114,12 +167,17 @@ class SyncService:
         """
         self.futu_fetcher = futu_fetcher
         self.kline_fetcher = kline_fetcher or KlineFetcher()
+        # (user_id, sync_type) -> (SyncLog column values, monotonic time cached)
+        self._last_sync_cache: dict[tuple[int, str], tuple[dict, float]] = {}
+        # Session.info key for logs waiting on their transaction's commit
+        self._pending_logs_key = ("pending_sync_logs", id(self))
 
     def sync_positions(
         self,
         user_id: int,
         snapshot_date: Optional[date] = None,
         session: Optional[Session] = None,
+        accounts: Optional[list[Account]] = None,
     ) -> SyncResult:
         """
         Sync positions for a user's accounts.
@@ -130,6 +188,8 @@ class SyncService:
             user_id: User ID to sync positions for
             snapshot_date: Date for snapshot (default: today)
             session: Optional existing session
+            accounts: Active accounts already loaded for the user (skips the
+                user/account lookup)
 
         Returns:
             SyncResult with sync status
@@ -138,21 +198,20 @@ class SyncService:
             return SyncResult.error("POSITIONS", "FutuFetcher not configured")
 
         start_time = datetime.now()
+        started = time.monotonic()  # start_time is wall clock for the sync log
         snapshot_date = snapshot_date or date.today()
 
         def _sync(sess: Session) -> SyncResult:
-            # Get user and accounts
-            user = sess.get(User, user_id)
-            if not user:
+            # Get user and accounts (reuse the caller's lookup when given)
+            active_accounts = (
+                accounts
+                if accounts is not None
+                else self._get_active_accounts(sess, user_id)
+            )
+            if active_accounts is None:
                 return SyncResult.error("POSITIONS", f"User {user_id} not found")
 
-            accounts = sess.scalars(
-                select(Account).where(
-                    and_(Account.user_id == user_id, Account.is_active == True)
-                )
-            ).all()
-
-            if not accounts:
+            if not active_accounts:
                 return SyncResult.error(
                     "POSITIONS", f"No active accounts for user {user_id}"
                 )
@@ -161,7 +220,7 @@ class SyncService:
             total_skipped = 0
             account_details = {}
 
-            for account in accounts:
+            for account in active_accounts:
                 # Skip manual accounts (futu_acc_id=0) — no Futu data to sync
                 if not account.futu_acc_id:
                     continue
@@ -178,53 +237,50 @@ class SyncService:
                     }
                     continue
 
-                synced = 0
-                skipped = 0
+                # One row per (market, code); a repeated code keeps the last
+                rows = {
+                    (pos_info.market.value, pos_info.code): dict(
+                        account_id=account.id,
+                        snapshot_date=snapshot_date,
+                        market=pos_info.market.value,
+                        code=pos_info.code,
+                        stock_name=pos_info.stock_name,
+                        qty=pos_info.qty,
+                        can_sell_qty=pos_info.can_sell_qty,
+                        cost_price=pos_info.cost_price,
+                        market_price=pos_info.market_price,
+                        market_val=pos_info.market_val,
+                        pl_val=pos_info.pl_val,
+                        pl_ratio=pos_info.pl_ratio,
+                        position_side=pos_info.position_side.value,
+                    )
+                    for pos_info in result.data
+                }
 
-                for pos_info in result.data:
-                    # Check if position already exists for this date
-                    existing = sess.scalars(
-                        select(Position).where(
+                # Positions already stored for this date are counted as updates
+                existing = set(
+                    sess.execute(
+                        select(Position.market, Position.code).where(
                             and_(
                                 Position.account_id == account.id,
                                 Position.snapshot_date == snapshot_date,
-                                Position.market == pos_info.market.value,
-                                Position.code == pos_info.code,
                             )
                         )
-                    ).first()
-
-                    if existing:
-                        # Update existing position
-                        existing.qty = pos_info.qty
-                        existing.can_sell_qty = pos_info.can_sell_qty
-                        existing.cost_price = pos_info.cost_price
-                        existing.market_price = pos_info.market_price
-                        existing.market_val = pos_info.market_val
-                        existing.pl_val = pos_info.pl_val
-                        existing.pl_ratio = pos_info.pl_ratio
-                        existing.stock_name = pos_info.stock_name
-                        existing.position_side = pos_info.position_side.value
-                        skipped += 1
-                    else:
-                        # Create new position
-                        position = Position(
-                            account_id=account.id,
-                            snapshot_date=snapshot_date,
-                            market=pos_info.market.value,
-                            code=pos_info.code,
-                            stock_name=pos_info.stock_name,
-                            qty=pos_info.qty,
-                            can_sell_qty=pos_info.can_sell_qty,
-                            cost_price=pos_info.cost_price,
-                            market_price=pos_info.market_price,
-                            market_val=pos_info.market_val,
-                            pl_val=pos_info.pl_val,
-                            pl_ratio=pos_info.pl_ratio,
-                            position_side=pos_info.position_side.value,
-                        )
-                        sess.add(position)
-                        synced += 1
+                    ).tuples()
+                )
+                skipped = len(rows.keys() & existing)
+                synced = len(rows) - skipped
+
+                # Insert or update the whole account in one statement
+                if rows:
+                    stmt = pg_insert(Position).values(list(rows.values()))
+                    stmt = stmt.on_conflict_do_update(
+                        constraint="uq_positions_account_date_code",
+                        set_={
+                            col: stmt.excluded[col] for col in POSITION_UPSERT_COLUMNS
+                        },
+                    )
+                    sess.execute(stmt)
 
                 total_synced += synced
                 total_skipped += skipped
@@ -234,10 +290,10 @@ class SyncService:
                 }
 
             # Also sync account snapshots
-            self._sync_account_snapshots(sess, accounts, snapshot_date)
+            self._sync_account_snapshots(sess, active_accounts, snapshot_date)
 
             # Log sync operation
-            duration = (datetime.now() - start_time).total_seconds()
+            duration = time.monotonic() - started
             self._log_sync(
                 sess,
                 user_id=user_id,
@@ -268,6 +324,7 @@ class SyncService:
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         session: Optional[Session] = None,
+        accounts: Optional[list[Account]] = None,
     ) -> SyncResult:
         """
         Sync trades for a user's accounts.
@@ -281,6 +338,8 @@ class SyncService:
             start_date: Start date (overrides days)
             end_date: End date (default: today)
             session: Optional existing session
+            accounts: Active accounts already loaded for the user (skips the
+                user/account lookup)
 
         Returns:
             SyncResult with sync status
@@ -289,6 +348,7 @@ class SyncService:
             return SyncResult.error("TRADES", "FutuFetcher not configured")
 
         start_time = datetime.now()
+        started = time.monotonic()
 
         # Calculate date range
         if end_date is None:
@@ -297,18 +357,16 @@ class SyncService:
             start_date = end_date - timedelta(days=days)
 
         def _sync(sess: Session) -> SyncResult:
-            # Get user and accounts
-            user = sess.get(User, user_id)
-            if not user:
+            # Get user and accounts (reuse the caller's lookup when given)
+            active_accounts = (
+                accounts
+                if accounts is not None
+                else self._get_active_accounts(sess, user_id)
+            )
+            if active_accounts is None:
                 return SyncResult.error("TRADES", f"User {user_id} not found")
 
-            accounts = sess.scalars(
-                select(Account).where(
-                    and_(Account.user_id == user_id, Account.is_active == True)
-                )
-            ).all()
-
-            if not accounts:
+            if not active_accounts:
                 return SyncResult.error(
                     "TRADES", f"No active accounts for user {user_id}"
                 )
@@ -317,7 +375,7 @@ class SyncService:
             total_skipped = 0
             account_details = {}
 
-            for account in accounts:
+            for account in active_accounts:
                 # Skip manual accounts (futu_acc_id=0) — no Futu data to sync
                 if not account.futu_acc_id:
                     continue
@@ -338,26 +396,24 @@ class SyncService:
                     }
                     continue
 
-                synced = 0
-                skipped = 0
-
-                for trade_info in result.data:
-                    # Check if trade already exists (by deal_id)
-                    existing = sess.scalars(
-                        select(Trade).where(
+                # Look up which deal_ids are already stored in one query
+                incoming_ids = [t.deal_id for t in result.data]
+                existing = set(
+                    sess.scalars(
+                        select(Trade.deal_id).where(
                             and_(
                                 Trade.account_id == account.id,
-                                Trade.deal_id == trade_info.deal_id,
+                                Trade.deal_id.in_(incoming_ids),
                             )
                         )
-                    ).first()
+                    ).all()
+                )
 
-                    if existing:
-                        skipped += 1
+                new_rows = {}
+                for trade_info in result.data:
+                    if trade_info.deal_id in existing or trade_info.deal_id in new_rows:
                         continue
-
-                    # Create new trade
-                    trade = Trade(
+                    new_rows[trade_info.deal_id] = dict(
                         account_id=account.id,
                         deal_id=trade_info.deal_id,
                         order_id=trade_info.order_id,
@@ -372,8 +428,17 @@ class SyncService:
                         fee=trade_info.fee,
                         currency=trade_info.currency,
                     )
-                    sess.add(trade)
-                    synced += 1
+
+                # DO NOTHING covers deals inserted concurrently since the lookup
+                if new_rows:
+                    sess.execute(
+                        pg_insert(Trade)
+                        .values(list(new_rows.values()))
+                        .on_conflict_do_nothing(constraint="uq_trades_account_deal")
+                    )
+
+                synced = len(new_rows)
+                skipped = len(result.data) - synced
 
                 total_synced += synced
                 total_skipped += skipped
@@ -383,7 +448,7 @@ class SyncService:
                 }
 
             # Log sync operation
-            duration = (datetime.now() - start_time).total_seconds()
+            duration = time.monotonic() - started
             self._log_sync(
                 sess,
                 user_id=user_id,
@@ -438,7 +503,7 @@ class SyncService:
                 error_message="FutuFetcher not available",
             )
 
-        start_time = datetime.now()
+        started = time.monotonic()
 
         def _sync(sess: Session) -> SyncResult:
             synced = 0
@@ -469,31 +534,43 @@ class SyncService:
                 item: WatchlistInfo
                 futu_codes.add((item.market.value, item.code))
 
-            # Get all existing DB items for this user (keyed by market+code)
-            db_items = sess.scalars(
-                select(WatchlistItem).where(
-                    WatchlistItem.user_id == user_id
-                )
+            # Get all existing DB items for this user (keyed by market+code);
+            # plain rows, since every change below is a Core statement
+            db_rows = sess.execute(
+                select(
+                    WatchlistItem.id,
+                    WatchlistItem.market,
+                    WatchlistItem.code,
+                    WatchlistItem.stock_name,
+                    WatchlistItem.is_active,
+                ).where(WatchlistItem.user_id == user_id)
             ).all()
-            db_map = {(item.market, item.code): item for item in db_items}
+            db_map = {(row.market, row.code): row for row in db_rows}
 
-            # Sync each Futu item
+            # Sync each Futu item; inserts and reactivations are batched below
+            new_rows = {}
+            reactivate_rows = {}
             for item in result.data:
                 key = (item.market.value, item.code)
                 existing = db_map.get(key)
 
                 if existing:
-                    if not existing.is_active:
+                    if not existing.is_active and key not in reactivate_rows:
                         # Reactivate previously removed item
-                        existing.is_active = True
-                        existing.stock_name = item.stock_name
-                        existing.group_name = item.group_name
+                        reactivate_rows[key] = dict(
+                            id=existing.id,
+                            is_active=True,
+                            stock_name=item.stock_name,
+                            group_name=item.group_name,
+                        )
                         reactivated += 1
                     else:
                         skipped += 1
+                elif key in new_rows:
+                    # Same stock listed in several Futu groups
+                    skipped += 1
                 else:
-                    # New item
-                    watchlist_item = WatchlistItem(
+                    new_rows[key] = dict(
                         user_id=user_id,
                         market=item.market.value,
                         code=item.code,
@@ -501,21 +578,29 @@ class SyncService:
                         group_name=item.group_name,
                         is_active=True,
                     )
-                    sess.add(watchlist_item)
                     synced += 1
 
+            if new_rows:
+                sess.execute(insert(WatchlistItem), list(new_rows.values()))
+
             # Soft-delete items no longer in Futu
-            for key, db_item in db_map.items():
-                if db_item.is_active and key not in futu_codes:
-                    db_item.is_active = False
+            deactivate_rows = []
+            for key, db_row in db_map.items():
+                if db_row.is_active and key not in futu_codes:
+                    deactivate_rows.append(dict(id=db_row.id, is_active=False))
                     deactivated += 1
                     logger.info(
-                        f"Deactivated watchlist item: {db_item.market}.{db_item.code} ({db_item.stock_name})"
+                        f"Deactivated watchlist item: {db_row.market}.{db_row.code} ({db_row.stock_name})"
                     )
 
+            # Executemany UPDATEs keyed by primary key, one per column set
+            for rows in (list(reactivate_rows.values()), deactivate_rows):
+                if rows:
+                    sess.execute(update(WatchlistItem), rows)
+
             sess.commit()
 
-            duration = (datetime.now() - start_time).total_seconds()
+            duration = time.monotonic() - started
 
             return SyncResult(
                 success=True,
@@ -550,8 +635,8 @@ class SyncService:
         """
         Sync K-line data for specified stocks.
 
-        Fetches K-line data from akshare and saves to database.
-        Supports incremental sync by checking existing dates.
+        Fetches K-line data from akshare and upserts it in batches, so
+        dates that are already stored are updated in place.
 
         Args:
             codes: List of stock codes to sync
@@ -566,79 +651,84 @@ class SyncService:
             SyncResult with sync status
         """
         start_time = datetime.now()
+        started = time.monotonic()
 
         def _sync(sess: Session) -> SyncResult:
-            total_synced = 0
-            total_skipped = 0
             code_details = {}
-
-            for code in codes:
-                # Fetch K-line data
-                result = self.kline_fetcher.fetch(
-                    code=code,
-                    days=days,
-                    start_date=start_date,
-                    end_date=end_date,
-                    adjust=adjust,
-                )
-
+            # Rows waiting to be upserted, keyed by the unique constraint
+            pending: dict[tuple, dict] = {}
+            # (market, code) of fetched rows -> requested code, for the details
+            requested: dict[tuple, str] = {}
+
+            def flush() -> None:
+                # Every pending bar is either new or already stored; only new
+                # and changed bars come back from the upsert
+                for market, stock_code, _ in pending:
+                    code_details[requested[(market, stock_code)]]["updated"] += 1
+                for market, stock_code, inserted in self._upsert_klines(
+                    sess, list(pending.values())
+                ):
+                    if inserted:
+                        counts = code_details[requested[(market, stock_code)]]
+                        counts["synced"] += 1
+                        counts["updated"] -= 1
+                pending.clear()
+
+            def collect(code: str, result: KlineFetchResult) -> None:
                 if not result.success:
                     logger.warning(
                         f"Failed to fetch klines for {code}: {result.error_message}"
                     )
                     code_details[code] = {"error": result.error_message}
-                    continue
+                    return
 
-                synced = 0
-                skipped = 0
+                code_details[code] = {"synced": 0, "updated": 0}
 
                 for kline_data in result.data:
-                    # Check if kline already exists
-                    existing = sess.scalars(
-                        select(Kline).where(
-                            and_(
-                                Kline.market == kline_data.market.value,
-                                Kline.code == kline_data.code,
-                                Kline.trade_date == kline_data.trade_date,
-                            )
-                        )
-                    ).first()
-
-                    if existing:
-                        # Update existing kline
-                        existing.open = kline_data.open
-                        existing.high = kline_data.high
-                        existing.low = kline_data.low
-                        existing.close = kline_data.close
-                        existing.volume = kline_data.volume
-                        existing.amount = kline_data.amount
-                        existing.turnover_rate = kline_data.turnover_rate
-                        existing.change_pct = kline_data.change_pct
-                        skipped += 1
-                    else:
-                        # Create new kline
-                        kline = Kline(
-                            market=kline_data.market.value,
-                            code=kline_data.code,
-                            trade_date=kline_data.trade_date,
-                            open=kline_data.open,
-                            high=kline_data.high,
-                            low=kline_data.low,
-                            close=kline_data.close,
-                            volume=kline_data.volume,
-                            amount=kline_data.amount,
-                            turnover_rate=kline_data.turnover_rate,
-                            change_pct=kline_data.change_pct,
-                        )
-                        sess.add(kline)
-                        synced += 1
+                    market = kline_data.market.value
+                    requested[(market, kline_data.code)] = code
+                    pending[(market, kline_data.code, kline_data.trade_date)] = dict(
+                        market=market,
+                        code=kline_data.code,
+                        trade_date=kline_data.trade_date,
+                        open=kline_data.open,
+                        high=kline_data.high,
+                        low=kline_data.low,
+                        close=kline_data.close,
+                        volume=kline_data.volume,
+                        amount=kline_data.amount,
+                        turnover_rate=kline_data.turnover_rate,
+                        change_pct=kline_data.change_pct,
+                    )
 
-                total_synced += synced
-                total_skipped += skipped
-                code_details[code] = {"synced": synced, "updated": skipped}
+            # Fetch all codes concurrently; rows are still written in code order
+            unique_codes = list(dict.fromkeys(codes))
+            workers = max(1, min(KLINE_FETCH_WORKERS, len(unique_codes)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    code: executor.submit(
+                        self.kline_fetcher.fetch,
+                        code=code,
+                        days=days,
+                        start_date=start_date,
+                        end_date=end_date,
+                        adjust=adjust,
+                    )
+                    for code in unique_codes
+                }
+                for code, future in futures.items():
+                    collect(code, future.result())
+                    if len(pending) >= KLINE_UPSERT_CHUNK:
+                        flush()
+
+            if pending:
+                flush()
+
+            total_synced = sum(d.get("synced", 0) for d in code_details.values())
+            total_skipped = sum(d.get("updated", 0) for d in code_details.values())
 
             # Log sync operation
-            duration = (datetime.now() - start_time).total_seconds()
+            duration = time.monotonic() - started
             self._log_sync(
                 sess,
                 user_id=user_id,
@@ -662,6 +752,47 @@ class SyncService:
             with get_session() as sess:
                 return _sync(sess)
 
+    def _upsert_klines(
+        self, session: Session, rows: list[dict]
+    ) -> list[tuple[str, str, bool]]:
+        """
+        Insert or update K-line rows, KLINE_UPSERT_CHUNK rows per statement.
+
+        Relies on uq_klines_market_code_date, so no row needs to be read
+        first. Stored bars whose values are unchanged are not rewritten.
+        ``ON CONFLICT DO UPDATE`` skips ``Column.onupdate``, hence updated_at
+        is set explicitly.
+
+        Args:
+            session: Database session
+            rows: Column dicts, at most one per (market, code, trade_date)
+
+        Returns:
+            (market, code, inserted) for every row inserted or changed
+        """
+        written = []
+        for start in range(0, len(rows), KLINE_UPSERT_CHUNK):
+            stmt = pg_insert(Kline).values(rows[start : start + KLINE_UPSERT_CHUNK])
+            set_ = {col: stmt.excluded[col] for col in KLINE_UPSERT_COLUMNS}
+            set_["updated_at"] = datetime.now()
+            # Leave unchanged bars alone: no dead tuple, no WAL, no RETURNING
+            changed = or_(
+                *(
+                    Kline.__table__.c[col].is_distinct_from(stmt.excluded[col])
+                    for col in KLINE_UPSERT_COLUMNS
+                )
+            )
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_klines_market_code_date", set_=set_, where=changed
+            ).returning(
+                Kline.market,
+                Kline.code,
+                # xmax is 0 only for rows this statement inserted
+                literal_column("xmax = 0"),
+            )
+            written.extend(session.execute(stmt).tuples())
+        return written
+
     def sync_watchlist_klines(
         self,
         user_id: int,
@@ -680,23 +811,12 @@ class SyncService:
             SyncResult with sync status
         """
 
-        def _get_codes(sess: Session) -> list[str]:
-            items = sess.scalars(
-                select(WatchlistItem).where(
-                    and_(
-                        WatchlistItem.user_id == user_id,
-                        WatchlistItem.is_active == True,
-                    )
-                )
-            ).all()
-            return [item.full_code for item in items]
-
         if session:
-            codes = _get_codes(session)
+            codes = self._get_watchlist_codes(session, user_id)
             return self.sync_klines(codes, days=days, user_id=user_id, session=session)
         else:
             with get_session() as sess:
-                codes = _get_codes(sess)
+                codes = self._get_watchlist_codes(sess, user_id)
                 return self.sync_klines(codes, days=days, user_id=user_id, session=sess)
 
     def sync_position_klines(
@@ -717,34 +837,61 @@ class SyncService:
             SyncResult with sync status
         """
 
-        def _get_codes(sess: Session) -> list[str]:
-            # Get unique codes from today's positions
-            today = date.today()
-            positions = sess.scalars(
-                select(Position)
-                .join(Account)
-                .where(
-                    and_(
-                        Account.user_id == user_id,
-                        Position.snapshot_date == today,
-                    )
-                )
-            ).all()
-
-            # Get unique codes
-            codes = set()
-            for pos in positions:
-                codes.add(f"{pos.market}.{pos.code}")
-            return list(codes)
-
         if session:
-            codes = _get_codes(session)
+            codes = self._get_position_codes(session, user_id)
             return self.sync_klines(codes, days=days, user_id=user_id, session=session)
         else:
             with get_session() as sess:
-                codes = _get_codes(sess)
+                codes = self._get_position_codes(sess, user_id)
                 return self.sync_klines(codes, days=days, user_id=user_id, session=sess)
 
+    def _get_position_codes(self, session: Session, user_id: int) -> list[str]:
+        """
+        Get unique full codes (e.g. "HK.00700") of a user's positions today.
+
+        Args:
+            session: Database session
+            user_id: User ID
+
+        Returns:
+            Sorted list of unique codes
+        """
+        rows = session.execute(
+            select(Position.market, Position.code)
+            .join(Account)
+            .where(
+                and_(
+                    Account.user_id == user_id,
+                    Position.snapshot_date == date.today(),
+                )
+            )
+            .distinct()
+        ).all()
+        return sorted(f"{market}.{code}" for market, code in rows)
+
+    def _get_watchlist_codes(self, session: Session, user_id: int) -> list[str]:
+        """
+        Get unique full codes of a user's active watchlist items.
+
+        Args:
+            session: Database session
+            user_id: User ID
+
+        Returns:
+            Sorted list of unique codes
+        """
+        rows = session.execute(
+            select(WatchlistItem.market, WatchlistItem.code)
+            .where(
+                and_(
+                    WatchlistItem.user_id == user_id,
+                    WatchlistItem.is_active == True,
+                )
+            )
+            .distinct()
+        ).all()
+        return sorted(f"{market}.{code}" for market, code in rows)
+
     def sync_all(
         self,
         user_id: int,
@@ -771,43 +918,35 @@ class SyncService:
         results = {}
 
         def _sync(sess: Session) -> dict[str, SyncResult]:
-            # Sync positions
-            results["positions"] = self.sync_positions(user_id, session=sess)
-
-            # Sync trades
-            results["trades"] = self.sync_trades(user_id, days=trade_days, session=sess)
-
-            # Sync K-lines for positions and watchlist (merged & deduplicated)
-            if include_klines:
-                # Collect codes from positions
-                today = date.today()
-                positions = sess.scalars(
-                    select(Position)
-                    .join(Account)
-                    .where(
-                        and_(
-                            Account.user_id == user_id,
-                            Position.snapshot_date == today,
-                        )
-                    )
-                ).all()
-                all_codes = {f"{pos.market}.{pos.code}" for pos in positions}
-
-                # Collect codes from watchlist
-                watchlist_items = sess.scalars(
-                    select(WatchlistItem).where(
-                        and_(
-                            WatchlistItem.user_id == user_id,
-                            WatchlistItem.is_active == True,
-                        )
-                    )
-                ).all()
-                all_codes.update(item.full_code for item in watchlist_items)
+            # The syncs write through bulk statements and share one
+            # transaction; autoflush would only flush pending sync logs before
+            # every SELECT, so flush once at the end instead
+            with sess.no_autoflush:
+                # Resolve user and active accounts once for positions and trades
+                accounts = self._get_active_accounts(sess, user_id)
+
+                # Sync positions
+                results["positions"] = self.sync_positions(
+                    user_id, session=sess, accounts=accounts
+                )
 
-                results["klines"] = self.sync_klines(
-                    list(all_codes), days=kline_days, user_id=user_id, session=sess
+                # Sync trades
+                results["trades"] = self.sync_trades(
+                    user_id, days=trade_days, session=sess, accounts=accounts
                 )
 
+                # Sync K-lines for positions and watchlist in one pass, so a code
+                # held and watched is fetched and written only once
+                if include_klines:
+                    pos_codes = self._get_position_codes(sess, user_id)
+                    watch_codes = self._get_watchlist_codes(sess, user_id)
+                    all_codes = sorted(set(pos_codes) | set(watch_codes))
+
+                    results["klines"] = self.sync_klines(
+                        all_codes, days=kline_days, user_id=user_id, session=sess
+                    )
+
+            sess.flush()
             return results
 
         if session:
@@ -816,6 +955,30 @@ class SyncService:
             with get_session() as sess:
                 return _sync(sess)
 
+    def _get_active_accounts(
+        self, session: Session, user_id: int
+    ) -> Optional[list[Account]]:
+        """
+        Load a user's active accounts.
+
+        Args:
+            session: Database session
+            user_id: User ID
+
+        Returns:
+            List of active accounts, or None if the user does not exist
+        """
+        if not session.get(User, user_id):
+            return None
+
+        return list(
+            session.scalars(
+                select(Account).where(
+                    and_(Account.user_id == user_id, Account.is_active == True)
+                )
+            ).all()
+        )
+
     def _sync_account_snapshots(
         self,
         session: Session,
@@ -831,58 +994,53 @@ class SyncService:
             snapshot_date: Date for snapshot
 
         Returns:
-            Number of snapshots synced
+            Number of snapshots newly created
         """
-        synced = 0
-
-        for account in accounts:
-            # Fetch account info from Futu
-            result = self.futu_fetcher.get_account_info(acc_id=account.futu_acc_id)
-
-            if not result.success or not result.data:
-                logger.warning(
-                    f"Failed to fetch account info for {account.futu_acc_id}: {result.error_message}"
-                )
-                continue
+        futu_accounts = [a for a in accounts if a.futu_acc_id]
+        if not futu_accounts:
+            return 0
+
+        # accinfo_query takes a single account: overlap the round trips
+        workers = min(len(futu_accounts), ACCOUNT_INFO_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(
+                lambda a: self.futu_fetcher.get_account_info(acc_id=a.futu_acc_id),
+                futu_accounts,
+            )
 
-            acc_info = result.data[0]
+            rows = []
+            for account, result in zip(futu_accounts, results):
+                if not result.success or not result.data:
+                    logger.warning(
+                        f"Failed to fetch account info for {account.futu_acc_id}: {result.error_message}"
+                    )
+                    continue
 
-            # Check if snapshot exists
-            existing = session.scalars(
-                select(AccountSnapshot).where(
-                    and_(
-                        AccountSnapshot.account_id == account.id,
-                        AccountSnapshot.snapshot_date == snapshot_date,
+                acc_info = result.data[0]
+                rows.append(
+                    dict(
+                        account_id=account.id,
+                        snapshot_date=snapshot_date,
+                        total_assets=acc_info.total_assets,
+                        cash=acc_info.cash,
+                        market_val=acc_info.market_val,
+                        frozen_cash=acc_info.frozen_cash,
+                        buying_power=acc_info.buying_power,
+                        max_power_short=acc_info.max_power_short,
+                        currency=acc_info.currency,
                     )
                 )
-            ).first()
 
-            if existing:
-                # Update existing snapshot
-                existing.total_assets = acc_info.total_assets
-                existing.cash = acc_info.cash
-                existing.market_val = acc_info.market_val
-                existing.frozen_cash = acc_info.frozen_cash
-                existing.buying_power = acc_info.buying_power
-                existing.max_power_short = acc_info.max_power_short
-                existing.currency = acc_info.currency
-            else:
-                # Create new snapshot
-                snapshot = AccountSnapshot(
-                    account_id=account.id,
-                    snapshot_date=snapshot_date,
-                    total_assets=acc_info.total_assets,
-                    cash=acc_info.cash,
-                    market_val=acc_info.market_val,
-                    frozen_cash=acc_info.frozen_cash,
-                    buying_power=acc_info.buying_power,
-                    max_power_short=acc_info.max_power_short,
-                    currency=acc_info.currency,
-                )
-                session.add(snapshot)
-                synced += 1
+        if not rows:
+            return 0
 
-        return synced
+        # One upsert for all accounts; xmax = 0 marks freshly inserted rows
+        stmt = pg_insert(AccountSnapshot).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_account_snapshots_account_date",
+            set_={col: stmt.excluded[col] for col in SNAPSHOT_UPSERT_COLUMNS},
+        ).returning(literal_column("xmax = 0"))
+        return sum(1 for inserted in session.execute(stmt).scalars() if inserted)
 
     def _log_sync(
         self,
@@ -919,8 +1077,50 @@ class SyncService:
             finished_at=datetime.now(),
         )
         session.add(log)
+        if user_id is not None:
+            self._cache_after_commit(session, log)
         return log
 
+    def _cache_after_commit(self, session: Session, log: SyncLog) -> None:
+        """
+        Queue a new SyncLog for the last-sync cache until its session commits.
+
+        The caller owns the transaction, so the log is only cached from the
+        session's after_commit event; a rollback discards it.
+
+        Args:
+            session: Session the log was added to
+            log: Pending SyncLog
+        """
+        pending = session.info.get(self._pending_logs_key)
+        if pending is None:
+            pending = session.info[self._pending_logs_key] = []
+            event.listen(session, "after_commit", self._publish_pending_logs)
+            event.listen(session, "after_rollback", self._discard_pending_logs)
+        pending.append(log)
+
+    def _publish_pending_logs(self, session: Session) -> None:
+        """Cache the values of queued logs that are now committed."""
+        pending = session.info.get(self._pending_logs_key)
+        if not pending:
+            return
+        now = time.monotonic()
+        for log in pending:
+            # Logs rolled back inside a savepoint are no longer persistent
+            if inspect(log).persistent:
+                key = (log.user_id, log.sync_type)
+                self._last_sync_cache[key] = (self._log_values(log), now)
+        pending.clear()
+
+    def _discard_pending_logs(self, session: Session) -> None:
+        """Drop queued logs whose transaction rolled back."""
+        session.info.get(self._pending_logs_key, []).clear()
+
+    @staticmethod
+    def _log_values(log: SyncLog) -> dict:
+        """Copy a SyncLog's column values (detached from any session)."""
+        return {col: getattr(log, col) for col in SYNC_LOG_COLUMNS}
+
     def get_last_sync(
         self,
         user_id: int,
@@ -930,6 +1130,11 @@ class SyncService:
         """
         Get the last sync log for a user and type.
 
+        Results are cached in memory for LAST_SYNC_CACHE_TTL seconds, and
+        every sync logged through this service refreshes the cache once its
+        transaction commits. Cached results are returned as new SyncLog
+        objects that are not attached to any session.
+
         Args:
             user_id: User ID
             sync_type: Type of sync operation
@@ -939,8 +1144,13 @@ class SyncService:
             Last SyncLog or None
         """
 
+        key = (user_id, sync_type)
+        cached = self._last_sync_cache.get(key)
+        if cached and time.monotonic() - cached[1] < LAST_SYNC_CACHE_TTL:
+            return SyncLog(**cached[0])
+
         def _get(sess: Session) -> Optional[SyncLog]:
-            return sess.scalars(
+            log = sess.scalars(
                 select(SyncLog)
                 .where(
                     and_(
@@ -951,6 +1161,9 @@ class SyncService:
                 .order_by(SyncLog.created_at.desc())
                 .limit(1)
             ).first()
+            if log is not None:
+                self._last_sync_cache[key] = (self._log_values(log), time.monotonic())
+            return log
 
         if session:
             return _get(session)
@@ -4,16 +4,20 @@ Batch Analyzer for Analyst Skill.
 Analyzes multiple stocks and ranks them by technical score.
 """
 
+import heapq
+import json
 import logging
 from dataclasses import dataclass, field
 from datetime import date
-from typing import Optional
+from operator import attrgetter
+from typing import IO, Optional
 
-import pandas as pd
+import numpy as np
 
 from skills.shared import DataProvider, ReportBuilder, ReportFormat
 
-from .stock_analyzer import StockAnalysis, StockAnalyzer
+from .scoring import TechnicalRating
+from .stock_analyzer import StockAnalysis, StockAnalyzer, ohlcv_arrays
 
 logger = logging.getLogger(__name__)
 
@@ -47,22 +51,88 @@ class BatchAnalysisResult:
 
     def to_dict(self) -> dict:
         """Convert to dictionary."""
+        # Every stock in the top lists and categories is also in results;
+        # serialize each one once and share its dict across the lists
+        dicts = {id(r): r.to_dict() for r in self.results}
+
+        def serialize(analyses: list[StockAnalysis]) -> list[dict]:
+            return [dicts.get(id(r)) or r.to_dict() for r in analyses]
+
         return {
             "analysis_date": self.analysis_date.isoformat(),
             "total_analyzed": self.total_analyzed,
             "successful": self.successful,
             "failed": self.failed,
-            "results": [r.to_dict() for r in self.results],
-            "top_vcp": [r.to_dict() for r in self.top_vcp],
-            "top_obv": [r.to_dict() for r in self.top_obv],
-            "top_overall": [r.to_dict() for r in self.top_overall],
-            "strong_buy": [r.to_dict() for r in self.strong_buy],
-            "buy": [r.to_dict() for r in self.buy],
-            "hold": [r.to_dict() for r in self.hold],
-            "sell": [r.to_dict() for r in self.sell],
+            "results": serialize(self.results),
+            "top_vcp": serialize(self.top_vcp),
+            "top_obv": serialize(self.top_obv),
+            "top_overall": serialize(self.top_overall),
+            "strong_buy": serialize(self.strong_buy),
+            "buy": serialize(self.buy),
+            "hold": serialize(self.hold),
+            "sell": serialize(self.sell),
             "failed_codes": self.failed_codes,
         }
 
+    def to_json_stream(self, fp: IO[str]) -> None:
+        """
+        Write the same document as ``to_dict`` as JSON, one stock at a time.
+
+        Only one stock's dict is alive at any point, so peak memory does not
+        grow with the number of results (stocks listed in several sections
+        are serialized once per section).
+
+        Args:
+            fp: Writable text file object
+        """
+
+        def dump(value) -> None:
+            json.dump(value, fp, ensure_ascii=False, default=_json_default)
+
+        fp.write("{")
+        header = {
+            "analysis_date": self.analysis_date.isoformat(),
+            "total_analyzed": self.total_analyzed,
+            "successful": self.successful,
+            "failed": self.failed,
+        }
+        for key, value in header.items():
+            dump(key)
+            fp.write(": ")
+            dump(value)
+            fp.write(", ")
+
+        sections = {
+            "results": self.results,
+            "top_vcp": self.top_vcp,
+            "top_obv": self.top_obv,
+            "top_overall": self.top_overall,
+            "strong_buy": self.strong_buy,
+            "buy": self.buy,
+            "hold": self.hold,
+            "sell": self.sell,
+        }
+        for key, analyses in sections.items():
+            dump(key)
+            fp.write(": [")
+            for i, analysis in enumerate(analyses):
+                if i:
+                    fp.write(", ")
+                dump(analysis.to_dict())
+            fp.write("], ")
+
+        dump("failed_codes")
+        fp.write(": ")
+        dump(self.failed_codes)
+        fp.write("}")
+
+
+def _json_default(value):
+    """Encode numpy scalars (e.g. np.bool_ flags) as Python values."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
 
 class BatchAnalyzer:
     """
@@ -106,38 +176,61 @@ class BatchAnalyzer:
         results = []
         failed_codes = []
 
-        for full_code in codes:
-            try:
-                # Parse code
-                if "." in full_code:
-                    market, code = full_code.split(".", 1)
-                else:
-                    market = "HK" if full_code.isdigit() else "US"
-                    code = full_code
+        # Load all K-lines with one bulk query, then analyze in input order
+        pairs = [self._parse_code(full_code) for full_code in codes]
+        try:
+            frames = self.data_provider.get_klines_bulk(pairs, days=self.days)
+        except Exception as e:
+            logger.error(f"Error loading K-lines for {len(codes)} codes: {e}")
+            frames = {}
 
-                # Fetch data
-                df = self.data_provider.get_klines_df(market, code, days=self.days)
+        for full_code, (market, code) in zip(codes, pairs):
+            try:
+                df = frames.get(f"{market}.{code}")
 
-                if df.empty:
+                if df is None or df.empty:
                     logger.warning(f"No data for {full_code}")
                     failed_codes.append(full_code)
                     continue
 
-                # Analyze
+                # Analyze; column arrays are extracted once and shared
+                # by the OBV and VCP sub-analyzers
                 name = stock_names.get(full_code, "")
-                analysis = self.stock_analyzer.analyze(df, market, code, name)
+                analysis = self.stock_analyzer.analyze(
+                    df, market, code, name, arrays=ohlcv_arrays(df)
+                )
                 results.append(analysis)
 
             except Exception as e:
                 logger.error(f"Error analyzing {full_code}: {e}")
                 failed_codes.append(full_code)
 
-        # Sort by overall score
-        results.sort(key=lambda x: x.technical_score.final_score, reverse=True)
+        # Sort by overall score (fully: results and the rating buckets are
+        # reported in score order, so a top-k selection is not enough)
+        results.sort(key=attrgetter("technical_score.final_score"), reverse=True)
 
         # Categorize results
         return self._categorize_results(results, failed_codes)
 
+    @staticmethod
+    def _parse_code(full_code: str) -> tuple[str, str]:
+        """
+        Split a full code into market and code.
+
+        Args:
+            full_code: Full code (e.g., "HK.00700"); bare codes default to
+                HK when numeric, US otherwise
+
+        Returns:
+            Tuple of (market, code)
+        """
+        if "." in full_code:
+            market, code = full_code.split(".", 1)
+        else:
+            market = "HK" if full_code.isdigit() else "US"
+            code = full_code
+        return market, code
+
     def analyze_user_stocks(
         self,
         user_id: int,
@@ -157,57 +250,52 @@ class BatchAnalyzer:
         Returns:
             BatchAnalysisResult
         """
-        codes = []
+        # Insertion-ordered code -> name; doubles as the O(1) "seen" check
         names = {}
 
         if include_positions:
             positions = self.data_provider.get_positions(user_id, markets)
             for pos in positions:
-                full_code = pos.full_code
-                codes.append(full_code)
-                names[full_code] = pos.stock_name
+                names[pos.full_code] = pos.stock_name
 
         if include_watchlist:
             watchlist = self.data_provider.get_watchlist(user_id, markets)
             for item in watchlist:
-                full_code = item.full_code
-                if full_code not in codes:
-                    codes.append(full_code)
-                    names[full_code] = item.stock_name
+                names.setdefault(item.full_code, item.stock_name)
 
-        return self.analyze_codes(codes, names)
+        return self.analyze_codes(list(names), names)
 
     def _categorize_results(
         self,
         results: list[StockAnalysis],
         failed_codes: list[str],
     ) -> BatchAnalysisResult:
-        """Categorize analysis results."""
-        # Top performers
-        top_vcp = sorted(
-            [r for r in results if r.vcp_analysis.detected],
-            key=lambda x: x.vcp_analysis.overall_score,
-            reverse=True,
-        )[:5]
-
-        top_obv = sorted(
-            results,
-            key=lambda x: x.obv_analysis.score,
-            reverse=True,
-        )[:5]
-
+        """Categorize analysis results (expects them sorted by final score)."""
+        # By rating, in one pass (results keep their order within a bucket;
+        # sell and strong_sell share one). Keyed by the enum members so the
+        # loop skips the Enum.value property lookup.
+        strong_buy, buy, hold, sell = [], [], [], []
+        buckets = {
+            TechnicalRating.STRONG_BUY: strong_buy,
+            TechnicalRating.BUY: buy,
+            TechnicalRating.HOLD: hold,
+            TechnicalRating.SELL: sell,
+            TechnicalRating.STRONG_SELL: sell,
+        }
+        vcp_detected = []
+        for r in results:
+            buckets[r.technical_score.rating].append(r)
+            if r.vcp_analysis.detected:
+                vcp_detected.append(r)
+
+        # Top performers; nlargest is a partial sort with the same tie order
+        # as sorted(..., reverse=True)[:5]
+        top_vcp = heapq.nlargest(
+            5, vcp_detected, key=attrgetter("vcp_analysis.overall_score")
+        )
+        top_obv = heapq.nlargest(5, results, key=attrgetter("obv_analysis.score"))
         top_overall = results[:5]
 
-        # By rating
-        strong_buy = [r for r in results if r.technical_score.rating.value == "strong_buy"]
-        buy = [r for r in results if r.technical_score.rating.value == "buy"]
-        hold = [r for r in results if r.technical_score.rating.value == "hold"]
-        sell = [
-            r
-            for r in results
-            if r.technical_score.rating.value in ("sell", "strong_sell")
-        ]
-
         return BatchAnalysisResult(
             analysis_date=date.today(),
             total_analyzed=len(results) + len(failed_codes),
@@ -7,14 +7,68 @@ Provides high-level OBV analysis including:
 - Volume confirmation for price moves
 """
 
+import threading
 from dataclasses import dataclass
 from enum import Enum
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
 from analysis.indicators import OBV, OBVDivergence
 
+# Module-level (market, code, ..., first and last bar) -> (OBV frame,
+# divergence frame) cache. OBV accumulates from the first bar, so the key
+# covers both ends of the window: a new or revised last bar, a shifted start,
+# or a price-adjusted history (qfq rewrites the earlier bars) changes it.
+# A revision that touches only bars strictly inside the window is not seen.
+# The lock makes the size check, eviction and insert one step for analyzers
+# shared across threads.
+_indicator_cache: dict[tuple, tuple[pd.DataFrame, pd.DataFrame]] = {}
+_indicator_cache_lock = threading.Lock()
+_INDICATOR_CACHE_SIZE = 1024
+
+# Number of most recent bars whose divergence signals are scored
+DIVERGENCE_BARS = 10
+
+
+def _regression_slope(y: np.ndarray, x: Optional[np.ndarray] = None) -> float:
+    """
+    Least-squares slope of y against x = 0..n-1.
+
+    The x sums have closed forms, so only sum(y) and sum(x*y) touch the
+    data, both in vectorized numpy.
+
+    Args:
+        y: Values in bar order
+        x: Optional precomputed ``np.arange`` of at least len(y) values
+
+    Returns:
+        Slope per bar (0 for fewer than two values)
+    """
+    n = len(y)
+    if n < 2:
+        return 0
+    if x is None:
+        x = np.arange(n, dtype=np.float64)
+    sum_x = n * (n - 1) / 2
+    sum_xx = (n - 1) * n * (2 * n - 1) / 6
+    sum_xy = float(x[:n] @ y)
+    sum_y = float(y.sum())
+    return (n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x**2)
+
+
+def _clamp(value: float, low: float = 0, high: float = 100) -> float:
+    """
+    Clamp a score into [low, high].
+
+    Plain comparisons instead of ``max(low, min(high, value))``, with the
+    same result (NaN maps to high), without two builtin calls per score.
+    """
+    if value < high:
+        return value if value > low else low
+    return high
+
 
 class OBVTrend(Enum):
     """OBV trend classification."""
@@ -105,13 +159,24 @@ class OBVAnalyzer:
         self.signal_period = signal_period
         self.divergence_lookback = divergence_lookback
         self.trend_period = trend_period
+        # Regression x values for _analyze_trend, allocated once
+        self._trend_x = np.arange(trend_period, dtype=np.float64)
 
-    def analyze(self, df: pd.DataFrame) -> OBVAnalysisResult:
+    def analyze(
+        self,
+        df: pd.DataFrame,
+        market: Optional[str] = None,
+        code: Optional[str] = None,
+        arrays: Optional[dict[str, np.ndarray]] = None,
+    ) -> OBVAnalysisResult:
         """
         Analyze OBV for the given data.
 
         Args:
             df: DataFrame with OHLCV data
+            market: Optional market code; with code, enables indicator caching
+            code: Optional stock code
+            arrays: Optional OHLCV column arrays of df (see ``ohlcv_arrays``)
 
         Returns:
             OBVAnalysisResult with analysis results
@@ -133,30 +198,36 @@ class OBVAnalyzer:
                 signals=["Insufficient data for OBV analysis"],
             )
 
-        # Calculate OBV with signal line
-        obv_indicator = OBV(signal_period=self.signal_period)
-        obv_result = obv_indicator.calculate(df)
-        obv_df = obv_result.values
+        # Calculate OBV with signal line, and divergences
+        obv_df, div_df = self._indicators(df, market, code, arrays)
+
+        # Plain arrays for the scalar lookups below (no pandas indexer calls)
+        obv = obv_df["OBV"].to_numpy()
+        obv_signal = obv_df["OBV_signal"].to_numpy()
+        if arrays is not None:
+            close = arrays["Close"]
+        else:
+            close = (df["Close"] if "Close" in df.columns else df["close"]).to_numpy()
 
-        current_obv = obv_df["OBV"].iloc[-1]
-        obv_ma = obv_df["OBV_signal"].iloc[-1]
+        current_obv = float(obv[-1])
+        obv_ma = float(obv_signal[-1])
 
         # Calculate OBV change
-        obv_start = obv_df["OBV"].iloc[-self.trend_period]
+        obv_start = float(obv[-self.trend_period])
         obv_change_pct = (
             ((current_obv - obv_start) / abs(obv_start) * 100) if obv_start != 0 else 0
         )
 
         # Analyze trend
-        trend, trend_strength = self._analyze_trend(obv_df)
+        trend, trend_strength = self._analyze_trend(obv, obv_signal)
 
         # Detect divergence
-        divergence_indicator = OBVDivergence(lookback=self.divergence_lookback)
-        div_result = divergence_indicator.calculate(df)
-        divergence, divergence_strength = self._analyze_divergence(div_result.values)
+        divergence, divergence_strength = self._analyze_divergence(
+            div_df["divergence"].to_numpy()
+        )
 
         # Check volume confirmation
-        confirms, confirmation_score = self._check_volume_confirmation(df, obv_df)
+        confirms, confirmation_score = self._check_volume_confirmation(close, obv)
 
         # Generate signals
         if trend == OBVTrend.STRONG_UP:
@@ -193,45 +264,102 @@ class OBVAnalyzer:
             signals=signals,
         )
 
+    def _indicators(
+        self,
+        df: pd.DataFrame,
+        market: Optional[str],
+        code: Optional[str],
+        arrays: Optional[dict[str, np.ndarray]] = None,
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Calculate the OBV and divergence frames, reusing cached results.
+
+        Scheduled scans re-analyze the same bars until a new candle arrives,
+        so results are cached per stock under the length, the first and last
+        timestamps and the first and last rows of the data. Without market
+        and code nothing is cached.
+
+        Args:
+            df: DataFrame with OHLCV data
+            market: Market code
+            code: Stock code
+            arrays: Optional OHLCV column arrays of df; the rows of the
+                cache key are then read from them instead of ``df.iloc``
+
+        Returns:
+            Tuple of (OBV frame with OBV_signal, divergence frame of the last
+            DIVERGENCE_BARS bars)
+        """
+        key = None
+        if market and code:
+            if arrays is not None:
+                first_row = tuple(values[0] for values in arrays.values())
+                last_row = tuple(values[-1] for values in arrays.values())
+            else:
+                first_row, last_row = tuple(df.iloc[0]), tuple(df.iloc[-1])
+            key = (
+                market,
+                code,
+                self.signal_period,
+                self.divergence_lookback,
+                len(df),
+                df.index[0],
+                df.index[-1],
+                first_row,
+                last_row,
+            )
+            cached = _indicator_cache.get(key)
+            if cached is not None:
+                return cached
+
+        obv_df = OBV(signal_period=self.signal_period).calculate(df).values
+        # Only the last DIVERGENCE_BARS signals are scored, so detect
+        # divergences on the tail instead of the whole history
+        div_df = (
+            OBVDivergence(lookback=self.divergence_lookback)
+            .calculate_tail(df, tail=DIVERGENCE_BARS)
+            .values
+        )
+
+        if key is not None:
+            with _indicator_cache_lock:
+                if len(_indicator_cache) >= _INDICATOR_CACHE_SIZE:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    _indicator_cache.pop(next(iter(_indicator_cache)), None)
+                _indicator_cache[key] = (obv_df, div_df)
+        return obv_df, div_df
+
     def _analyze_trend(
-        self, obv_df: pd.DataFrame
+        self, obv: np.ndarray, obv_signal: np.ndarray
     ) -> tuple[OBVTrend, float]:
-        """Analyze OBV trend."""
-        obv = obv_df["OBV"]
-        obv_signal = obv_df["OBV_signal"]
-
+        """Analyze OBV trend from the OBV and signal line values."""
         # Recent trend (last 20 bars)
-        recent_obv = obv.iloc[-self.trend_period :]
-
-        # Calculate slope using linear regression
-        x = range(len(recent_obv))
-        slope = (
-            (len(x) * sum(x * recent_obv) - sum(x) * sum(recent_obv))
-            / (len(x) * sum(x**2 for x in x) - sum(x) ** 2)
-            if len(x) > 1
-            else 0
-        )
+        recent_obv = obv[-self.trend_period :]
 
-        # Normalize slope relative to OBV magnitude
-        avg_obv = abs(recent_obv.mean()) if recent_obv.mean() != 0 else 1
+        # Calculate slope using linear regression (least squares on x = 0..n-1)
+        slope = _regression_slope(recent_obv, self._trend_x)
+
+        # Normalize slope relative to OBV magnitude (NaN-skipping like pandas)
+        recent_mean = float(np.nanmean(recent_obv))
+        avg_obv = abs(recent_mean) if recent_mean != 0 else 1
         normalized_slope = slope / avg_obv * 100
 
         # Current position relative to signal line
-        above_signal = obv.iloc[-1] > obv_signal.iloc[-1]
+        above_signal = obv[-1] > obv_signal[-1]
 
         # Determine trend
         if normalized_slope > 2 and above_signal:
             trend = OBVTrend.STRONG_UP
-            strength = min(100, abs(normalized_slope) * 20)
+            strength = _clamp(abs(normalized_slope) * 20)
         elif normalized_slope > 0.5:
             trend = OBVTrend.UP
-            strength = min(80, 40 + abs(normalized_slope) * 15)
+            strength = _clamp(40 + abs(normalized_slope) * 15, high=80)
         elif normalized_slope < -2 and not above_signal:
             trend = OBVTrend.STRONG_DOWN
-            strength = min(100, abs(normalized_slope) * 20)
+            strength = _clamp(abs(normalized_slope) * 20)
         elif normalized_slope < -0.5:
             trend = OBVTrend.DOWN
-            strength = min(80, 40 + abs(normalized_slope) * 15)
+            strength = _clamp(40 + abs(normalized_slope) * 15, high=80)
         else:
             trend = OBVTrend.SIDEWAYS
             strength = 30
@@ -239,35 +367,29 @@ class OBVAnalyzer:
         return trend, strength
 
     def _analyze_divergence(
-        self, div_df: pd.DataFrame
+        self, divergence: np.ndarray
     ) -> tuple[DivergenceType, float]:
-        """Analyze divergences in recent data."""
-        recent_div = div_df["divergence"].iloc[-10:]
-
-        bullish_count = (recent_div == 1).sum()
-        bearish_count = (recent_div == -1).sum()
+        """Analyze divergences in the recent divergence flags (1/-1/0)."""
+        # Shift -1/0/1 to bins 0/1/2 so one bincount yields both counts
+        recent_div = divergence[-DIVERGENCE_BARS:].astype(np.intp, copy=False)
+        counts = np.bincount(recent_div + 1, minlength=3)
+        bullish_count = int(counts[2])
+        bearish_count = int(counts[0])
 
         if bullish_count > 0:
-            return DivergenceType.BULLISH, min(100, bullish_count * 30)
+            return DivergenceType.BULLISH, _clamp(bullish_count * 30)
         elif bearish_count > 0:
-            return DivergenceType.BEARISH, min(100, bearish_count * 30)
+            return DivergenceType.BEARISH, _clamp(bearish_count * 30)
         else:
             return DivergenceType.NONE, 0
 
     def _check_volume_confirmation(
-        self, df: pd.DataFrame, obv_df: pd.DataFrame
+        self, close: np.ndarray, obv: np.ndarray
     ) -> tuple[bool, float]:
-        """Check if volume confirms price action."""
-        close = df["Close"] if "Close" in df.columns else df["close"]
-        obv = obv_df["OBV"]
-
+        """Check if volume (OBV values) confirms price action (close values)."""
         # Price trend (last 10 bars)
-        price_change = (close.iloc[-1] - close.iloc[-10]) / close.iloc[-10] * 100
-        obv_change = (
-            (obv.iloc[-1] - obv.iloc[-10]) / abs(obv.iloc[-10]) * 100
-            if obv.iloc[-10] != 0
-            else 0
-        )
+        price_change = (close[-1] - close[-10]) / close[-10] * 100
+        obv_change = (obv[-1] - obv[-10]) / abs(obv[-10]) * 100 if obv[-10] != 0 else 0
 
         # Confirmation: both moving same direction
         price_up = price_change > 0
@@ -283,9 +405,9 @@ class OBVAnalyzer:
             )
             score = 50 + magnitude_ratio * 50
         else:
-            score = 30 - min(30, abs(price_change - obv_change))
+            score = 30 - _clamp(abs(price_change - obv_change), high=30)
 
-        return confirms, max(0, min(100, score))
+        return confirms, _clamp(score)
 
     def _calculate_score(
         self,
@@ -299,12 +421,12 @@ class OBVAnalyzer:
         score = trend_strength * 0.4
 
         # Divergence bonus/penalty (30%)
-        if divergence == DivergenceType.BULLISH:
+        if divergence is DivergenceType.BULLISH:
             score += divergence_strength * 0.3
-        elif divergence == DivergenceType.BEARISH:
+        elif divergence is DivergenceType.BEARISH:
             score -= divergence_strength * 0.15  # Bearish is a warning, not full penalty
 
         # Confirmation score (30%)
         score += confirmation_score * 0.3
 
-        return max(0, min(100, score))
+        return _clamp(score)
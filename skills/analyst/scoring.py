@@ -4,10 +4,13 @@ Scoring System for Analyst Skill.
 Combines OBV (40%) + VCP (60%) into a unified technical score.
 """
 
+import bisect
 from dataclasses import dataclass
 from enum import Enum
 from typing import Optional
 
+import numpy as np
+
 from .obv_analyzer import DivergenceType, OBVAnalysisResult, OBVTrend
 from .vcp_scanner import VCPAnalysisResult, VCPStage
 
@@ -22,6 +25,30 @@ class TechnicalRating(Enum):
     STRONG_SELL = "strong_sell"  # Score < 25
 
 
+# Rating lower bounds, ascending; a score at a bound gets the higher rating
+RATING_THRESHOLDS = (25, 45, 65, 80)
+RATINGS_BY_BAND = (
+    TechnicalRating.STRONG_SELL,
+    TechnicalRating.SELL,
+    TechnicalRating.HOLD,
+    TechnicalRating.BUY,
+    TechnicalRating.STRONG_BUY,
+)
+
+UP_TRENDS = frozenset({OBVTrend.STRONG_UP, OBVTrend.UP})
+
+# Score penalties that depend only on the OBV result, precomputed per
+# (trend, divergence): bearish divergence -10, strong OBV downtrend -8
+OBV_PENALTIES = {
+    (trend, divergence): (
+        -10 * (divergence is DivergenceType.BEARISH)
+        - 8 * (trend is OBVTrend.STRONG_DOWN)
+    )
+    for trend in OBVTrend
+    for divergence in DivergenceType
+}
+
+
 class SignalStrength(Enum):
     """Signal strength level."""
 
@@ -31,7 +58,7 @@ class SignalStrength(Enum):
     NONE = "none"
 
 
-@dataclass
+@dataclass(slots=True)
 class TechnicalScore:
     """Combined technical analysis score."""
 
@@ -166,6 +193,105 @@ class ScoringSystem:
             watch_points=watch_points,
         )
 
+    def calculate_scores_batch(
+        self,
+        obv_results: list[OBVAnalysisResult],
+        vcp_results: list[VCPAnalysisResult],
+        current_prices: Optional[list[Optional[float]]] = None,
+    ) -> list[TechnicalScore]:
+        """
+        Calculate combined technical scores for many stocks at once.
+
+        Gives the same results as calling ``calculate_score`` per stock, but
+        the weighting, adjustments, clamping, rating and signal strength are
+        computed as numpy array operations over the whole batch.
+
+        Args:
+            obv_results: OBV analysis results
+            vcp_results: VCP analysis results, aligned with obv_results
+            current_prices: Optional current prices, aligned with obv_results
+
+        Returns:
+            List of TechnicalScore in input order
+        """
+        if len(obv_results) != len(vcp_results):
+            raise ValueError("obv_results and vcp_results must have the same length")
+        if current_prices is None:
+            current_prices = [None] * len(obv_results)
+        n = len(obv_results)
+
+        obv_scores = np.fromiter((r.score for r in obv_results), np.float64, n)
+        vcp_scores = np.fromiter((r.overall_score for r in vcp_results), np.float64, n)
+        detected = np.fromiter((r.detected for r in vcp_results), bool, n)
+        mature = np.fromiter((r.stage is VCPStage.MATURE for r in vcp_results), bool, n)
+        dryup = np.fromiter((r.volume_dryup for r in vcp_results), bool, n)
+        confirms = np.fromiter((r.volume_confirms_price for r in obv_results), bool, n)
+        bullish_div = np.fromiter(
+            (r.divergence is DivergenceType.BULLISH for r in obv_results), bool, n
+        )
+        up_trend = np.fromiter((r.trend in UP_TRENDS for r in obv_results), bool, n)
+        penalties = np.fromiter(
+            (OBV_PENALTIES[(r.trend, r.divergence)] for r in obv_results),
+            np.float64,
+            n,
+        )
+
+        # Weighted score plus the _apply_adjustments bonuses/penalties
+        final = obv_scores * self.obv_weight + vcp_scores * self.vcp_weight
+        final += 10 * (detected & bullish_div)
+        final += 8 * (mature & up_trend)
+        final += 5 * (confirms & dryup)
+        final += penalties
+        # Same clamp as max(0, min(100, x)), which maps NaN to 100
+        final = np.clip(np.nan_to_num(final, nan=100.0), 0, 100)
+
+        bands = np.digitize(final, RATING_THRESHOLDS)
+        strengths = np.select(
+            [
+                (final >= 75) & detected & up_trend,
+                (final >= 55) & (detected | (obv_scores >= 60)),
+                final >= 40,
+            ],
+            [0, 1, 2],
+            default=3,
+        )
+        strength_levels = (
+            SignalStrength.STRONG,
+            SignalStrength.MODERATE,
+            SignalStrength.WEAK,
+            SignalStrength.NONE,
+        )
+
+        scores = []
+        for obv_result, vcp_result, price, final_score, band, strength in zip(
+            obv_results,
+            vcp_results,
+            current_prices,
+            final.tolist(),
+            bands.tolist(),
+            strengths.tolist(),
+        ):
+            rating = RATINGS_BY_BAND[band]
+            scores.append(
+                TechnicalScore(
+                    obv_score=obv_result.score,
+                    vcp_score=vcp_result.overall_score,
+                    final_score=final_score,
+                    rating=rating,
+                    signal_strength=strength_levels[strength],
+                    obv_trend=obv_result.trend.value,
+                    obv_divergence=obv_result.divergence.value,
+                    vcp_detected=vcp_result.detected,
+                    vcp_stage=vcp_result.stage.value,
+                    pivot_price=vcp_result.pivot_price,
+                    distance_to_pivot=vcp_result.distance_to_pivot_pct,
+                    action=self._generate_action(rating, obv_result, vcp_result),
+                    key_levels=self._identify_key_levels(vcp_result, price),
+                    watch_points=self._generate_watch_points(obv_result, vcp_result),
+                )
+            )
+        return scores
+
     def _apply_adjustments(
         self,
         score: float,
@@ -176,42 +302,27 @@ class ScoringSystem:
         adjusted = score
 
         # Bonus: VCP + bullish OBV divergence (strong setup)
-        if vcp_result.detected and obv_result.divergence == DivergenceType.BULLISH:
+        if vcp_result.detected and obv_result.divergence is DivergenceType.BULLISH:
             adjusted += 10
 
         # Bonus: VCP near breakout with strong OBV
-        if vcp_result.stage == VCPStage.MATURE and obv_result.trend in (
-            OBVTrend.STRONG_UP,
-            OBVTrend.UP,
-        ):
+        if vcp_result.stage is VCPStage.MATURE and obv_result.trend in UP_TRENDS:
             adjusted += 8
 
         # Bonus: Volume confirms + VCP forming
         if obv_result.volume_confirms_price and vcp_result.volume_dryup:
             adjusted += 5
 
-        # Penalty: Bearish divergence
-        if obv_result.divergence == DivergenceType.BEARISH:
-            adjusted -= 10
-
-        # Penalty: Strong downtrend in OBV
-        if obv_result.trend == OBVTrend.STRONG_DOWN:
-            adjusted -= 8
+        # Penalties: bearish divergence, strong downtrend in OBV
+        adjusted += OBV_PENALTIES[(obv_result.trend, obv_result.divergence)]
 
         return max(0, min(100, adjusted))
 
     def _get_rating(self, score: float) -> TechnicalRating:
-        """Get rating based on score."""
-        if score >= 80:
-            return TechnicalRating.STRONG_BUY
-        elif score >= 65:
-            return TechnicalRating.BUY
-        elif score >= 45:
-            return TechnicalRating.HOLD
-        elif score >= 25:
-            return TechnicalRating.SELL
-        else:
+        """Get rating based on score (binary search over RATING_THRESHOLDS)."""
+        if score != score:  # NaN fails every >= bound
             return TechnicalRating.STRONG_SELL
+        return RATINGS_BY_BAND[bisect.bisect_right(RATING_THRESHOLDS, score)]
 
     def _get_signal_strength(
         self,
@@ -221,10 +332,7 @@ class ScoringSystem:
     ) -> SignalStrength:
         """Determine signal strength."""
         # Strong signal: High score + VCP detected + good OBV
-        if score >= 75 and vcp_result.detected and obv_result.trend in (
-            OBVTrend.STRONG_UP,
-            OBVTrend.UP,
-        ):
+        if score >= 75 and vcp_result.detected and obv_result.trend in UP_TRENDS:
             return SignalStrength.STRONG
 
         # Moderate signal: Good score + either VCP or OBV positive
@@ -244,29 +352,29 @@ class ScoringSystem:
         vcp_result: VCPAnalysisResult,
     ) -> str:
         """Generate action recommendation."""
-        if rating == TechnicalRating.STRONG_BUY:
-            if vcp_result.stage == VCPStage.BREAKOUT:
+        if rating is TechnicalRating.STRONG_BUY:
+            if vcp_result.stage is VCPStage.BREAKOUT:
                 return "Consider buying - VCP breakout in progress"
-            elif vcp_result.stage == VCPStage.MATURE:
+            elif vcp_result.stage is VCPStage.MATURE:
                 return "Add to watchlist - VCP ready for breakout"
             else:
                 return "Strong technical setup - monitor for entry"
 
-        elif rating == TechnicalRating.BUY:
+        elif rating is TechnicalRating.BUY:
             if vcp_result.detected:
                 return "Watch for VCP breakout entry"
             else:
                 return "Positive technicals - look for pullback entry"
 
-        elif rating == TechnicalRating.HOLD:
-            if obv_result.divergence == DivergenceType.BULLISH:
+        elif rating is TechnicalRating.HOLD:
+            if obv_result.divergence is DivergenceType.BULLISH:
                 return "Hold - bullish divergence forming"
-            elif obv_result.divergence == DivergenceType.BEARISH:
+            elif obv_result.divergence is DivergenceType.BEARISH:
                 return "Hold with caution - bearish divergence"
             else:
                 return "Hold - wait for clearer signal"
 
-        elif rating == TechnicalRating.SELL:
+        elif rating is TechnicalRating.SELL:
             return "Consider reducing position"
 
         else:  # STRONG_SELL
@@ -301,9 +409,9 @@ class ScoringSystem:
         if vcp_result.detected and vcp_result.pivot_price:
             points.append(f"Watch for break above {vcp_result.pivot_price:.2f}")
 
-        if obv_result.divergence == DivergenceType.BULLISH:
+        if obv_result.divergence is DivergenceType.BULLISH:
             points.append("Monitor for reversal confirmation")
-        elif obv_result.divergence == DivergenceType.BEARISH:
+        elif obv_result.divergence is DivergenceType.BEARISH:
             points.append("Watch for breakdown - bearish divergence present")
 
         if vcp_result.volume_dryup:
@@ -315,6 +423,10 @@ class ScoringSystem:
         return points
 
 
+# Shared default-weight scorer; calculate_score does not mutate it
+_DEFAULT_SCORER = ScoringSystem()
+
+
 def calculate_technical_score(
     obv_result: OBVAnalysisResult,
     vcp_result: VCPAnalysisResult,
@@ -331,5 +443,4 @@ def calculate_technical_score(
     Returns:
         TechnicalScore
     """
-    scorer = ScoringSystem()
-    return scorer.calculate_score(obv_result, vcp_result, current_price)
+    return _DEFAULT_SCORER.calculate_score(obv_result, vcp_result, current_price)
@@ -4,20 +4,84 @@ Stock Analyzer - Main analysis orchestrator for Analyst Skill.
 Combines OBV and VCP analysis into a comprehensive stock analysis.
 """
 
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from datetime import date, datetime
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
 from skills.shared import DataProvider, ReportBuilder, ReportFormat
 
-from .obv_analyzer import OBVAnalysisResult, OBVAnalyzer
-from .scoring import ScoringSystem, TechnicalScore, calculate_technical_score
-from .vcp_scanner import VCPAnalysisResult, VCPScanner
+from .obv_analyzer import DivergenceType, OBVAnalysisResult, OBVAnalyzer, OBVTrend
+from .scoring import (
+    ScoringSystem,
+    TechnicalRating,
+    TechnicalScore,
+    calculate_technical_score,
+)
+from .vcp_scanner import VCPAnalysisResult, VCPScanner, VCPStage
 
+OHLCV_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
 
-@dataclass
+# Summary phrases keyed by enum member (looked up per analyzed stock)
+RATING_DESCRIPTIONS = {
+    TechnicalRating.STRONG_BUY: "Strong bullish setup",
+    TechnicalRating.BUY: "Bullish bias",
+    TechnicalRating.HOLD: "Neutral",
+    TechnicalRating.SELL: "Bearish bias",
+    TechnicalRating.STRONG_SELL: "Weak technicals",
+}
+OBV_TREND_DESCRIPTIONS = {
+    OBVTrend.STRONG_UP: "Strong accumulation",
+    OBVTrend.UP: "Accumulation",
+    OBVTrend.SIDEWAYS: "Neutral volume",
+    OBVTrend.DOWN: "Distribution",
+    OBVTrend.STRONG_DOWN: "Heavy distribution",
+}
+
+
+# Per-process StockAnalyzer used by analyze_many pool workers
+_worker_analyzer: Optional["StockAnalyzer"] = None
+
+
+def _init_analysis_worker(analyzer: "StockAnalyzer") -> None:
+    """Initialize an analysis pool worker with its analyzer."""
+    global _worker_analyzer
+    _worker_analyzer = analyzer
+
+
+def _analyze_in_worker(task: tuple[pd.DataFrame, str, str, str]) -> "StockAnalysis":
+    """Analyze one stock's K-lines inside an analysis pool worker."""
+    df, market, code, name = task
+    return _worker_analyzer.analyze(df, market, code, name)
+
+
+def ohlcv_arrays(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """
+    Extract the OHLCV columns of a K-line DataFrame as float64 arrays.
+
+    Converted once per stock and shared by the sub-analyzers, so scalar
+    lookups skip pandas indexing and the Close/close column dispatch.
+
+    Args:
+        df: DataFrame with OHLCV columns (capitalized or lowercase)
+
+    Returns:
+        Dict of capitalized column name -> array; missing columns are omitted
+    """
+    arrays = {}
+    for col in OHLCV_COLUMNS:
+        src = col if col in df.columns else col.lower()
+        if src in df.columns:
+            arrays[col] = df[src].to_numpy(dtype=np.float64)
+    return arrays
+
+
+@dataclass(slots=True)
 class StockAnalysis:
     """Complete stock analysis result."""
 
@@ -70,6 +134,9 @@ class StockAnalyzer:
     Main stock analyzer combining OBV + VCP analysis.
 
     Provides comprehensive technical analysis for individual stocks.
+    ``analyze`` keeps all per-stock state in locals (the sub-analyzers are
+    only configured in ``__init__``), so one instance can be shared by
+    worker threads.
     """
 
     def __init__(
@@ -97,6 +164,7 @@ class StockAnalyzer:
         market: str = "",
         code: str = "",
         name: str = "",
+        arrays: Optional[dict[str, np.ndarray]] = None,
     ) -> StockAnalysis:
         """
         Analyze a stock using its K-line data.
@@ -106,24 +174,31 @@ class StockAnalyzer:
             market: Market code (HK, US, A)
             code: Stock code
             name: Stock name
+            arrays: Optional precomputed ``ohlcv_arrays(df)``; built here
+                when omitted
 
         Returns:
             StockAnalysis with complete analysis
         """
+        if arrays is None:
+            arrays = ohlcv_arrays(df)
+        close = arrays["Close"]
+
         # Get current price and recent change
-        close_col = "Close" if "Close" in df.columns else "close"
-        current_price = float(df[close_col].iloc[-1])
+        current_price = float(close[-1])
 
         # Calculate recent price change (20 days)
         lookback = min(20, len(df) - 1)
-        price_start = float(df[close_col].iloc[-lookback - 1])
+        price_start = float(close[-lookback - 1])
         price_change_pct = ((current_price - price_start) / price_start) * 100
 
         # Run OBV analysis
-        obv_result = self.obv_analyzer.analyze(df)
+        obv_result = self.obv_analyzer.analyze(
+            df, market=market, code=code, arrays=arrays
+        )
 
         # Run VCP analysis
-        vcp_result = self.vcp_scanner.analyze(df)
+        vcp_result = self.vcp_scanner.analyze(df, arrays=arrays)
 
         # Calculate combined score
         technical_score = self.scoring_system.calculate_score(
@@ -183,6 +258,63 @@ class StockAnalyzer:
 
         return self.analyze(df, market=market, code=code, name=stock_name)
 
+    def analyze_many(
+        self,
+        pairs: list[tuple[str, str]],
+        days: int = 120,
+        stock_names: Optional[dict[str, str]] = None,
+        workers: Optional[int] = None,
+    ) -> list[Optional[StockAnalysis]]:
+        """
+        Analyze many stocks from the database across worker processes.
+
+        K-lines are loaded in this process with one bulk query; only the
+        CPU-bound analysis runs in the pool, so workers never open database
+        connections.
+
+        Args:
+            pairs: List of (market, code) tuples
+            days: Number of days of data
+            stock_names: Optional dict of full code (e.g., "HK.00700") -> name
+            workers: Number of processes (default: CPU count); 1 analyzes
+                in this process
+
+        Returns:
+            StockAnalysis (or None if no data) for each pair, in input order
+        """
+        stock_names = stock_names or {}
+        frames = self.data_provider.get_klines_bulk(pairs, days=days)
+
+        tasks = []
+        for market, code in pairs:
+            full_code = f"{market}.{code}"
+            df = frames[full_code]
+            if not df.empty:
+                tasks.append((df, market, code, stock_names.get(full_code, "")))
+
+        workers = min(workers or os.cpu_count() or 1, len(tasks))
+        if workers <= 1:
+            analyses = [self.analyze(*task) for task in tasks]
+        else:
+            # Workers only run analyze(); don't ship the provider and its cache
+            shipped = copy.copy(self)
+            shipped.data_provider = None
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_analysis_worker,
+                initargs=(shipped,),
+            ) as pool:
+                chunksize = max(1, len(tasks) // (workers * 4))
+                analyses = list(
+                    pool.map(_analyze_in_worker, tasks, chunksize=chunksize)
+                )
+
+        results = iter(analyses)
+        return [
+            next(results) if not frames[f"{market}.{code}"].empty else None
+            for market, code in pairs
+        ]
+
     def _generate_summary(
         self,
         obv_result: OBVAnalysisResult,
@@ -193,41 +325,29 @@ class StockAnalyzer:
         parts = []
 
         # Overall rating
-        rating_desc = {
-            "strong_buy": "Strong bullish setup",
-            "buy": "Bullish bias",
-            "hold": "Neutral",
-            "sell": "Bearish bias",
-            "strong_sell": "Weak technicals",
-        }
-        parts.append(rating_desc.get(score.rating.value, "Unknown"))
+        parts.append(RATING_DESCRIPTIONS.get(score.rating, "Unknown"))
 
         # VCP status
         if vcp_result.detected:
-            if vcp_result.stage.value == "mature":
+            if vcp_result.stage is VCPStage.MATURE:
                 parts.append(f"VCP mature ({vcp_result.contraction_count} contractions)")
-            elif vcp_result.stage.value == "breakout":
+            elif vcp_result.stage is VCPStage.BREAKOUT:
                 parts.append("VCP breaking out")
             else:
                 parts.append("VCP forming")
 
         # OBV status
-        obv_desc = {
-            "strong_up": "Strong accumulation",
-            "up": "Accumulation",
-            "sideways": "Neutral volume",
-            "down": "Distribution",
-            "strong_down": "Heavy distribution",
-        }
-        parts.append(obv_desc.get(obv_result.trend.value, ""))
+        obv_desc = OBV_TREND_DESCRIPTIONS.get(obv_result.trend)
+        if obv_desc:
+            parts.append(obv_desc)
 
         # Divergence
-        if obv_result.divergence.value == "bullish":
+        if obv_result.divergence is DivergenceType.BULLISH:
             parts.append("Bullish divergence")
-        elif obv_result.divergence.value == "bearish":
+        elif obv_result.divergence is DivergenceType.BEARISH:
             parts.append("Bearish divergence warning")
 
-        return ". ".join(filter(None, parts)) + "."
+        return ". ".join(parts) + "."
 
     def _calculate_confidence(
         self,
@@ -255,7 +375,7 @@ class StockAnalyzer:
             confidence += 10
 
         # Strong OBV trend adds confidence
-        if obv_result.trend.value in ("strong_up", "strong_down"):
+        if obv_result.trend in (OBVTrend.STRONG_UP, OBVTrend.STRONG_DOWN):
             confidence += 5
 
         return min(100, confidence)
@@ -11,6 +11,7 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
 from analysis.indicators import VCP, VCPConfig, VCPResult
@@ -90,12 +91,15 @@ class VCPScanner:
         self.config = config or VCPConfig()
         self.vcp_indicator = VCP(config=self.config)
 
-    def analyze(self, df: pd.DataFrame) -> VCPAnalysisResult:
+    def analyze(
+        self, df: pd.DataFrame, arrays: Optional[dict[str, np.ndarray]] = None
+    ) -> VCPAnalysisResult:
         """
         Analyze data for VCP pattern.
 
         Args:
             df: DataFrame with OHLCV data
+            arrays: Optional OHLCV column arrays of df (see ``ohlcv_arrays``)
 
         Returns:
             VCPAnalysisResult with analysis
@@ -121,12 +125,15 @@ class VCPScanner:
             )
 
         # Run VCP detection
-        result = self.vcp_indicator.calculate(df)
+        result = self.vcp_indicator.calculate(df, arrays=arrays)
         vcp_result: VCPResult = result.values
 
         # Get current price
-        close_col = "Close" if "Close" in df.columns else "close"
-        current_price = df[close_col].iloc[-1]
+        if arrays is not None:
+            current_price = arrays["Close"][-1]
+        else:
+            close_col = "Close" if "Close" in df.columns else "close"
+            current_price = df[close_col].iloc[-1]
 
         # Determine stage
         stage = self._determine_stage(vcp_result, current_price)
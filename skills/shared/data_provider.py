@@ -10,7 +10,9 @@ from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import Optional
 
+import numpy as np
 import pandas as pd
+from sqlalchemy import tuple_
 
 from db import (
     Account,
@@ -28,6 +30,9 @@ from db import (
 
 logger = logging.getLogger(__name__)
 
+# Columns of K-line DataFrames, in order
+KLINE_DF_COLUMNS = ("Open", "High", "Low", "Close", "Volume", "Amount")
+
 
 @dataclass
 class PositionData:
@@ -370,29 +375,100 @@ class DataProvider:
         Returns:
             DataFrame with OHLCV columns, indexed by date
         """
-        klines = self.get_klines(market, code, days, end_date)
+        return self._klines_to_df(self.get_klines(market, code, days, end_date))
+
+    def get_klines_bulk(
+        self,
+        pairs: list[tuple[str, str]],
+        days: int = 120,
+        end_date: date = None,
+    ) -> dict[str, pd.DataFrame]:
+        """
+        Get K-line DataFrames for many stocks with one database query.
+
+        Pairs already in the cache are served from it; the rest are loaded
+        together with a ``(market, code) IN (...)`` filter and cached per
+        stock under the same keys as ``get_klines``.
+
+        Args:
+            pairs: List of (market, code) tuples
+            days: Number of days
+            end_date: End date (default: today)
+
+        Returns:
+            Dict of full code (e.g., "HK.00700") -> DataFrame with OHLCV
+            columns; stocks without data map to an empty DataFrame
+        """
+        if end_date is None:
+            end_date = date.today()
+        start_date = end_date - timedelta(days=days)
+
+        klines_by_pair: dict[tuple[str, str], list[KlineData]] = {}
+        # (db market, code) -> requested pairs still to load (SH/SZ -> A)
+        missing: dict[tuple[str, str], list[tuple[str, str]]] = {}
+        for market, code in pairs:
+            cached = self._get_cache(f"klines:{market}:{code}:{days}:{end_date}")
+            if cached:
+                klines_by_pair[(market, code)] = cached
+                continue
+            db_market = "A" if market in ("SH", "SZ") else market
+            missing.setdefault((db_market, code), []).append((market, code))
+
+        if missing:
+            loaded: dict[tuple[str, str], list[KlineData]] = {}
+            with get_session() as session:
+                query = (
+                    session.query(Kline)
+                    .filter(
+                        tuple_(Kline.market, Kline.code).in_(list(missing)),
+                        Kline.trade_date >= start_date,
+                        Kline.trade_date <= end_date,
+                    )
+                    .order_by(Kline.market, Kline.code, Kline.trade_date.asc())
+                )
+
+                for k in query.all():
+                    loaded.setdefault((k.market, k.code), []).append(
+                        KlineData(
+                            market=k.market,
+                            code=k.code,
+                            trade_date=k.trade_date,
+                            open=k.open,
+                            high=k.high,
+                            low=k.low,
+                            close=k.close,
+                            volume=k.volume,
+                            amount=k.amount or Decimal("0"),
+                        )
+                    )
+
+            for db_key, requested in missing.items():
+                klines = loaded.get(db_key, [])
+                for market, code in requested:
+                    self._set_cache(f"klines:{market}:{code}:{days}:{end_date}", klines)
+                    klines_by_pair[(market, code)] = klines
 
+        return {
+            f"{market}.{code}": self._klines_to_df(klines_by_pair[(market, code)])
+            for market, code in pairs
+        }
+
+    @staticmethod
+    def _klines_to_df(klines: list[KlineData]) -> pd.DataFrame:
+        """Convert KlineData rows to an OHLCV DataFrame indexed by date."""
         if not klines:
             return pd.DataFrame()
 
-        data = []
-        for k in klines:
-            data.append(
-                {
-                    "Date": k.trade_date,
-                    "Open": float(k.open),
-                    "High": float(k.high),
-                    "Low": float(k.low),
-                    "Close": float(k.close),
-                    "Volume": float(k.volume),
-                    "Amount": float(k.amount),
-                }
-            )
-
-        df = pd.DataFrame(data)
-        df["Date"] = pd.to_datetime(df["Date"])
-        df.set_index("Date", inplace=True)
-        return df
+        # One float64 block instead of a dict per row
+        attrs = [col.lower() for col in KLINE_DF_COLUMNS]
+        values = np.fromiter(
+            (float(getattr(k, attr)) for k in klines for attr in attrs),
+            dtype=np.float64,
+            count=len(klines) * len(attrs),
+        ).reshape(len(klines), len(attrs))
+        index = pd.to_datetime([k.trade_date for k in klines])
+        index.name = "Date"
+        return pd.DataFrame(values, index=index, columns=KLINE_DF_COLUMNS)
 
     def get_latest_price(self, market: str, code: str) -> Optional[Decimal]:
         """Get latest closing price."""
@@ -516,6 +516,27 @@ class TestCheckAllAlerts:
         fetched = service.get_alert(alert.id)
         assert fetched.is_triggered is False
 
+    def test_check_all_alerts_sees_updated_target(self, session, test_user):
+        """Test float snapshots do not outlive a check_all_alerts call."""
+        service = AlertService(session=session)
+
+        alert = service.create_alert(
+            user_id=test_user.id,
+            market="HK",
+            code="00700",
+            alert_type=AlertType.ABOVE,
+            target_price=400.0,
+        )
+
+        prices = {"HK.00700": 410.0}
+        summary = service.check_all_alerts(test_user.id, prices, auto_trigger=False)
+        assert summary.total_triggered == 1
+
+        service.update_alert(alert.id, target_price=420.0)
+        summary = service.check_all_alerts(test_user.id, prices, auto_trigger=False)
+        assert summary.total_triggered == 0
+        assert service.check_alert(alert, 410.0).triggered is False
+
 
 class TestResetAlert:
     """Tests for resetting alerts."""
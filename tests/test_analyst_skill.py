@@ -30,6 +30,7 @@ from skills.analyst import (
     generate_batch_report,
     scan_stocks_for_vcp,
 )
+from skills.analyst.stock_analyzer import ohlcv_arrays
 from skills.shared import ReportFormat
 
 
@@ -238,6 +239,161 @@ class TestOBVAnalyzer:
         # Downtrend should have lower scores
         assert result.trend in [OBVTrend.DOWN, OBVTrend.STRONG_DOWN, OBVTrend.SIDEWAYS]
 
+    def test_regression_slope_matches_polyfit(self):
+        """Test the closed-form trend slope equals a least-squares fit."""
+        from skills.analyst.obv_analyzer import _regression_slope
+
+        y = np.random.default_rng(7).normal(size=20).cumsum() * 1e6
+
+        assert _regression_slope(y) == pytest.approx(np.polyfit(np.arange(20), y, 1)[0])
+        assert _regression_slope(y[:1]) == 0
+
+    def test_indicators_cached_per_stock_and_last_bar(self):
+        """Test OBV frames are reused until the bars change."""
+        from analysis.indicators import OBVDivergence
+        from skills.analyst import obv_analyzer
+
+        obv_analyzer._indicator_cache.clear()
+        df = create_sample_df(100, trend="up")
+        analyzer = OBVAnalyzer()
+
+        with patch.object(
+            OBVDivergence,
+            "calculate",
+            autospec=True,
+            side_effect=OBVDivergence.calculate,
+        ) as calculate:
+            first = analyzer.analyze(df, market="HK", code="00700")
+            second = analyzer.analyze(df.copy(), market="HK", code="00700")
+            assert calculate.call_count == 1
+
+            # A revised last bar, another stock, or no key all recompute
+            revised = df.copy()
+            revised.iloc[-1, revised.columns.get_loc("Close")] += 1
+            analyzer.analyze(revised, market="HK", code="00700")
+            analyzer.analyze(df, market="US", code="AAPL")
+            analyzer.analyze(df)
+            assert calculate.call_count == 4
+
+        assert second == first
+        obv_analyzer._indicator_cache.clear()
+
+    def test_indicators_cache_key_covers_first_bar(self):
+        """Test an adjusted history or shifted window is not served stale OBV."""
+        from skills.analyst import obv_analyzer
+
+        obv_analyzer._indicator_cache.clear()
+        history = create_sample_df(101, trend="up")
+        df = history.iloc[1:]
+        analyzer = OBVAnalyzer()
+
+        first, _ = analyzer._indicators(df, "HK", "00700", ohlcv_arrays(df))
+
+        # qfq adjustment rewrites earlier bars but keeps the last one
+        adjusted = df.copy()
+        adjusted.iloc[0, adjusted.columns.get_loc("Volume")] *= 2
+        revised, _ = analyzer._indicators(
+            adjusted, "HK", "00700", ohlcv_arrays(adjusted)
+        )
+        assert revised is not first
+
+        # Same length and last bar, different start
+        shifted = pd.concat([history.iloc[:1], history.iloc[2:]])
+        other, _ = analyzer._indicators(shifted, "HK", "00700", ohlcv_arrays(shifted))
+        assert other is not first
+        assert other["OBV"].iloc[-1] != first["OBV"].iloc[-1]
+        obv_analyzer._indicator_cache.clear()
+
+    def test_indicators_cache_key_from_arrays(self):
+        """Test the cache key's last bar comes from the shared arrays."""
+        from skills.analyst import obv_analyzer
+
+        obv_analyzer._indicator_cache.clear()
+        df = create_sample_df(100, trend="up")
+        arrays = ohlcv_arrays(df)
+        analyzer = OBVAnalyzer()
+
+        first, _ = analyzer._indicators(df, "HK", "00700", arrays)
+        again, _ = analyzer._indicators(df, "HK", "00700", ohlcv_arrays(df))
+        assert again is first
+
+        # The key follows the arrays' last bar
+        arrays["Close"] = arrays["Close"] + 1
+        revised, _ = analyzer._indicators(df, "HK", "00700", arrays)
+        assert revised is not first
+        obv_analyzer._indicator_cache.clear()
+
+    def test_indicators_match_obv_indicator(self):
+        """Test the single-pass OBV frame matches the OBV indicator."""
+        from analysis.indicators import OBV
+
+        df = create_sample_df(100)
+        analyzer = OBVAnalyzer(signal_period=15)
+
+        obv_df, div_df = analyzer._indicators(df, None, None)
+        expected = OBV(signal_period=15).calculate(df).values
+
+        pd.testing.assert_frame_equal(obv_df, expected)
+        assert set(div_df["divergence"].unique()) <= {-1, 0, 1}
+
+    def test_trend_uses_cached_x(self):
+        """Test the regression x values are allocated once per analyzer."""
+        analyzer = OBVAnalyzer(trend_period=20)
+        x = analyzer._trend_x
+
+        analyzer.analyze(create_sample_df(100, trend="up"))
+        analyzer.analyze(create_sample_df(60, trend="down"))
+
+        assert analyzer._trend_x is x
+        assert x.tolist() == list(range(20))
+
+    def test_analyze_large_volume_trend_matches_float64(self):
+        """Test trend and confirmation use the exact OBV on large volumes."""
+        from analysis.indicators import OBV
+
+        df = create_sample_df(300, trend="up")
+        df["Volume"] *= 1e4  # cumulative OBV around 1e12
+        analyzer = OBVAnalyzer()
+
+        result = analyzer.analyze(df)
+        obv_df = OBV(signal_period=analyzer.signal_period).calculate(df).values
+        obv = obv_df["OBV"].to_numpy(dtype=np.float64)
+        obv_signal = obv_df["OBV_signal"].to_numpy(dtype=np.float64)
+
+        trend = analyzer._analyze_trend(obv, obv_signal)
+        _, confirmation = analyzer._check_volume_confirmation(
+            df["Close"].to_numpy(), obv
+        )
+
+        assert (result.trend, result.trend_strength) == trend
+        assert result.confirmation_score == confirmation
+        assert type(result.current_obv) is float
+        assert result.current_obv == obv[-1]
+        assert result.obv_ma == obv_signal[-1]
+
+    def test_clamp_matches_min_max(self):
+        """Test _clamp behaves like max(low, min(high, value))."""
+        from skills.analyst.obv_analyzer import _clamp
+
+        for value in (-5, 0, 42.5, 100, 150.0, float("inf"), float("nan")):
+            assert _clamp(value) == max(0, min(100, value))
+        assert _clamp(95, high=80) == 80
+        assert _clamp(-1, low=-10, high=30) == -1
+
+    def test_analyze_divergence_counts_recent_flags(self):
+        """Test divergence counting over the last 10 flags."""
+        analyzer = OBVAnalyzer()
+        flags = np.array([1] * 5 + [0, -1, 0, -1, 0, 0, 0, -1, 0, 0])
+
+        assert analyzer._analyze_divergence(flags) == (DivergenceType.BEARISH, 90)
+
+        flags[-1] = 1
+        assert analyzer._analyze_divergence(flags) == (DivergenceType.BULLISH, 30)
+        assert analyzer._analyze_divergence(np.zeros(15, dtype=np.int64)) == (
+            DivergenceType.NONE,
+            0,
+        )
+
     def test_analyze_insufficient_data(self):
         """Test analysis with insufficient data."""
         df = create_sample_df(10)  # Too few data points
@@ -540,6 +696,95 @@ class TestScoringSystem:
         assert 0 <= score.final_score <= 100
         assert score.rating in list(TechnicalRating)
 
+    def test_calculate_scores_batch_matches_single(self):
+        """Test vectorized batch scoring equals per-stock scoring."""
+        import itertools
+
+        scorer = ScoringSystem()
+        obv_results, vcp_results, prices = [], [], []
+        combos = itertools.product(
+            list(OBVTrend),
+            list(DivergenceType),
+            [(False, VCPStage.NO_PATTERN), (True, VCPStage.MATURE)],
+            [True, False],
+        )
+        for i, (trend, divergence, (detected, stage), flag) in enumerate(combos):
+            obv_results.append(
+                OBVAnalysisResult(
+                    current_obv=1e6,
+                    obv_ma=1e6,
+                    obv_change_pct=0,
+                    trend=trend,
+                    trend_strength=50,
+                    divergence=divergence,
+                    divergence_strength=30,
+                    volume_confirms_price=flag,
+                    confirmation_score=50,
+                    score=(i * 37) % 101,
+                    signals=[],
+                )
+            )
+            vcp_results.append(
+                VCPAnalysisResult(
+                    detected=detected,
+                    stage=stage,
+                    contraction_count=3 if detected else 0,
+                    depth_sequence=[],
+                    volume_dryup=not flag or detected,
+                    range_tightening=False,
+                    pivot_price=110.0 if detected else None,
+                    current_price=100,
+                    distance_to_pivot_pct=10,
+                    pattern_score=50,
+                    volume_score=50,
+                    timing_score=50,
+                    overall_score=(i * 53) % 101,
+                    signals=[],
+                )
+            )
+            prices.append(100.0 if i % 2 else None)
+
+        batch = scorer.calculate_scores_batch(obv_results, vcp_results, prices)
+
+        assert len(batch) == len(obv_results)
+        for obv, vcp, price, score in zip(obv_results, vcp_results, prices, batch):
+            expected = scorer.calculate_score(obv, vcp, price)
+            assert score.to_dict() == expected.to_dict()
+        assert {s.rating for s in batch} == set(TechnicalRating)
+
+    def test_calculate_scores_batch_length_mismatch(self):
+        """Test misaligned inputs are rejected."""
+        with pytest.raises(ValueError):
+            ScoringSystem().calculate_scores_batch([MagicMock()], [])
+
+    def test_obv_penalty_table(self):
+        """Test precomputed OBV penalties cover every trend/divergence pair."""
+        from skills.analyst.scoring import OBV_PENALTIES
+
+        assert len(OBV_PENALTIES) == len(OBVTrend) * len(DivergenceType)
+        assert OBV_PENALTIES[(OBVTrend.UP, DivergenceType.NONE)] == 0
+        assert OBV_PENALTIES[(OBVTrend.UP, DivergenceType.BEARISH)] == -10
+        assert OBV_PENALTIES[(OBVTrend.STRONG_DOWN, DivergenceType.BULLISH)] == -8
+        assert OBV_PENALTIES[(OBVTrend.STRONG_DOWN, DivergenceType.BEARISH)] == -18
+
+    def test_get_rating_boundaries(self):
+        """Test threshold lookup matches the >= bounds."""
+        scorer = ScoringSystem()
+        cases = {
+            0: TechnicalRating.STRONG_SELL,
+            24.99: TechnicalRating.STRONG_SELL,
+            25: TechnicalRating.SELL,
+            44.9: TechnicalRating.SELL,
+            45: TechnicalRating.HOLD,
+            65: TechnicalRating.BUY,
+            79.99: TechnicalRating.BUY,
+            80: TechnicalRating.STRONG_BUY,
+            100: TechnicalRating.STRONG_BUY,
+            float("nan"): TechnicalRating.STRONG_SELL,
+        }
+        for value, rating in cases.items():
+            assert scorer._get_rating(value) is rating
+
     def test_rating_thresholds(self):
         """Test rating thresholds."""
         scorer = ScoringSystem()
@@ -591,8 +836,8 @@ class TestScoringSystem:
 class TestCalculateTechnicalScore:
     """Tests for calculate_technical_score convenience function."""
 
-    def test_function_works(self):
-        """Test the convenience function."""
+    def _results(self):
+        """Build a minimal OBV/VCP result pair."""
         obv_result = OBVAnalysisResult(
             current_obv=1000000,
             obv_ma=950000,
@@ -623,10 +868,27 @@ class TestCalculateTechnicalScore:
             overall_score=50,
             signals=[],
         )
+        return obv_result, vcp_result
+
+    def test_function_works(self):
+        """Test the convenience function."""
+        obv_result, vcp_result = self._results()
 
         score = calculate_technical_score(obv_result, vcp_result, 100)
         assert isinstance(score, TechnicalScore)
 
+    def test_reuses_default_scorer(self):
+        """Test the function does not build a ScoringSystem per call."""
+        obv, vcp = self._results()
+        expected = ScoringSystem().calculate_score(obv, vcp)
+
+        with patch("skills.analyst.scoring.ScoringSystem") as mock_cls:
+            score = calculate_technical_score(obv, vcp)
+
+        mock_cls.assert_not_called()
+        assert score.final_score == expected.final_score
+        assert score.rating is expected.rating
+
 
 # =============================================================================
 # StockAnalysis Tests
@@ -745,6 +1007,82 @@ class TestStockAnalyzer:
         assert len(result.summary) > 0
         assert len(result.recommendation) > 0
 
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_analyze_many(self, workers):
+        """Test process-pool analysis matches in-process results in order."""
+        frames = {
+            "HK.00700": create_sample_df(100, "up"),
+            "US.EMPTY": pd.DataFrame(),
+            "US.AAPL": create_sample_df(100, "down"),
+        }
+        provider = MagicMock()
+        provider.get_klines_bulk.return_value = frames
+        analyzer = StockAnalyzer(data_provider=provider)
+        pairs = [("HK", "00700"), ("US", "EMPTY"), ("US", "AAPL")]
+
+        results = analyzer.analyze_many(
+            pairs, days=90, stock_names={"HK.00700": "Tencent"}, workers=workers
+        )
+
+        provider.get_klines_bulk.assert_called_once_with(pairs, days=90)
+        assert results[1] is None
+        assert results[0].name == "Tencent"
+        assert (
+            results[0].to_dict()
+            == analyzer.analyze(frames["HK.00700"], "HK", "00700", "Tencent").to_dict()
+        )
+        assert (
+            results[2].to_dict()
+            == analyzer.analyze(frames["US.AAPL"], "US", "AAPL").to_dict()
+        )
+        assert analyzer.data_provider is provider
+
+    def test_shared_across_threads(self):
+        """Test one analyzer gives sequential results from worker threads."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        from skills.analyst import obv_analyzer
+
+        frames = {
+            f"{i:05d}": create_sample_df(100, ("up", "down", "sideways")[i % 3])
+            for i in range(12)
+        }
+        analyzer = StockAnalyzer()
+
+        obv_analyzer._indicator_cache.clear()
+        expected = {code: analyzer.analyze(df).to_dict() for code, df in frames.items()}
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            actual = dict(
+                pool.map(
+                    lambda item: (
+                        item[0],
+                        analyzer.analyze(item[1], "HK", item[0]).to_dict(),
+                    ),
+                    frames.items(),
+                )
+            )
+
+        for code, result in actual.items():
+            assert result["code"] == code
+            result["market"] = result["code"] = ""
+            assert result == expected[code]
+        obv_analyzer._indicator_cache.clear()
+
+    def test_summary_describes_rating_and_obv_trend(self):
+        """Test summary phrases are looked up by enum member."""
+        from skills.analyst.stock_analyzer import (
+            OBV_TREND_DESCRIPTIONS,
+            RATING_DESCRIPTIONS,
+        )
+
+        df = create_sample_df(100, trend="up")
+        result = StockAnalyzer().analyze(df)
+
+        assert result.summary.startswith(
+            RATING_DESCRIPTIONS[result.technical_score.rating]
+        )
+        assert OBV_TREND_DESCRIPTIONS[result.obv_analysis.trend] in result.summary
+
     def test_analyze_calculates_confidence(self):
         """Test that analysis calculates confidence."""
         df = create_sample_df(100)
@@ -754,6 +1092,30 @@ class TestStockAnalyzer:
 
         assert 0 <= result.confidence <= 100
 
+    def test_ohlcv_arrays_normalizes_column_case(self):
+        """Test column arrays are float64 and keyed by capitalized names."""
+        df = create_sample_df(30)
+        df.columns = [c.lower() for c in df.columns]
+
+        arrays = ohlcv_arrays(df)
+
+        assert set(arrays) == {"Open", "High", "Low", "Close", "Volume"}
+        assert arrays["Close"].dtype == np.float64
+        np.testing.assert_array_equal(arrays["Close"], df["close"].to_numpy())
+
+    def test_analyze_with_precomputed_arrays(self):
+        """Test shared column arrays give the same result as the DataFrame."""
+        df = create_sample_df(100, trend="up")
+        analyzer = StockAnalyzer()
+
+        expected = analyzer.analyze(df)
+        result = analyzer.analyze(df, arrays=ohlcv_arrays(df))
+
+        assert result.current_price == expected.current_price
+        assert result.price_change_pct == expected.price_change_pct
+        assert result.obv_analysis.to_dict() == expected.obv_analysis.to_dict()
+        assert result.vcp_analysis.to_dict() == expected.vcp_analysis.to_dict()
+
 
 class TestGenerateAnalysisReport:
     """Tests for generate_analysis_report function."""
@@ -814,6 +1176,54 @@ class TestBatchAnalysisResult:
         assert d["successful"] == 8
         assert len(d["failed_codes"]) == 2
 
+    def test_to_json_stream_matches_to_dict(self):
+        """Test streamed JSON decodes to the to_dict document."""
+        import io
+        import json
+
+        analyzer = StockAnalyzer()
+        up = analyzer.analyze(create_sample_df(100, "up"), "HK", "00700", "腾讯")
+        down = analyzer.analyze(create_sample_df(100, "down"), "US", "AAPL")
+        result = BatchAnalyzer(data_provider=MagicMock())._categorize_results(
+            [up, down], ["US.BAD"]
+        )
+
+        buffer = io.StringIO()
+        result.to_json_stream(buffer)
+
+        assert "腾讯" in buffer.getvalue()
+        assert json.loads(buffer.getvalue()) == json.loads(
+            json.dumps(result.to_dict(), default=lambda v: v.item())
+        )
+
+    def test_to_dict_serializes_each_stock_once(self):
+        """Test stocks shared between lists are serialized once."""
+        a, b, extra = MagicMock(), MagicMock(), MagicMock()
+        a.to_dict.return_value = {"code": "A"}
+        b.to_dict.return_value = {"code": "B"}
+        extra.to_dict.return_value = {"code": "X"}
+        result = BatchAnalysisResult(
+            analysis_date=date.today(),
+            total_analyzed=2,
+            successful=2,
+            failed=0,
+            results=[a, b],
+            top_obv=[b, a],
+            top_overall=[a, b],
+            strong_buy=[a],
+            hold=[b],
+            top_vcp=[extra],
+        )
+
+        d = result.to_dict()
+
+        assert a.to_dict.call_count == 1
+        assert b.to_dict.call_count == 1
+        assert d["results"] == [{"code": "A"}, {"code": "B"}]
+        assert d["top_obv"] == [{"code": "B"}, {"code": "A"}]
+        assert d["strong_buy"] == [{"code": "A"}]
+        assert d["top_vcp"] == [{"code": "X"}]
+
 
 # =============================================================================
 # BatchAnalyzer Tests
@@ -847,6 +1257,115 @@ class TestBatchAnalyzer:
         assert result.total_analyzed == 2
         assert result.successful == 2
 
+    def test_analyze_codes_loads_klines_in_one_bulk_call(self):
+        """Test all codes share one bulk K-line load and failures are kept."""
+        frames = {
+            "HK.00700": create_sample_df(100, "up"),
+            "US.EMPTY": pd.DataFrame(),
+            "US.AAPL": create_sample_df(100),
+        }
+        provider = MagicMock()
+        provider.get_klines_bulk.return_value = frames
+
+        analyzer = BatchAnalyzer(data_provider=provider, days=100)
+        result = analyzer.analyze_codes(
+            ["HK.00700", "US.EMPTY", "AAPL", "US.MISSING"],
+            stock_names={"HK.00700": "Tencent"},
+        )
+
+        provider.get_klines_bulk.assert_called_once_with(
+            [("HK", "00700"), ("US", "EMPTY"), ("US", "AAPL"), ("US", "MISSING")],
+            days=100,
+        )
+        provider.get_klines_df.assert_not_called()
+        assert result.successful == 2
+        assert result.failed_codes == ["US.EMPTY", "US.MISSING"]
+        assert {(r.market, r.code) for r in result.results} == {
+            ("HK", "00700"),
+            ("US", "AAPL"),
+        }
+        assert {r.name for r in result.results} == {"Tencent", ""}
+
+    def test_analyze_codes_bulk_load_failure(self):
+        """Test a failed bulk load marks every code as failed."""
+        provider = MagicMock()
+        provider.get_klines_bulk.side_effect = RuntimeError("db down")
+
+        result = BatchAnalyzer(data_provider=provider).analyze_codes(
+            ["HK.00700", "US.AAPL"]
+        )
+
+        assert result.successful == 0
+        assert result.failed_codes == ["HK.00700", "US.AAPL"]
+
+
+class TestAnalyzeUserStocks:
+    """Tests for BatchAnalyzer.analyze_user_stocks."""
+
+    def test_codes_deduplicated_in_order(self):
+        """Test positions come first and each code is analyzed once."""
+
+        def item(full_code, name):
+            return MagicMock(full_code=full_code, stock_name=name)
+
+        provider = MagicMock()
+        provider.get_positions.return_value = [
+            item("HK.00700", "Tencent"),
+            item("US.NVDA", "NVIDIA"),
+            item("HK.00700", "Tencent"),  # held in two accounts
+        ]
+        provider.get_watchlist.return_value = [
+            item("US.AAPL", "Apple"),
+            item("US.NVDA", "Nvidia Corp"),
+        ]
+
+        analyzer = BatchAnalyzer(data_provider=provider)
+        with patch.object(analyzer, "analyze_codes") as analyze_codes:
+            analyzer.analyze_user_stocks(user_id=1)
+
+        codes, names = analyze_codes.call_args.args
+        assert codes == ["HK.00700", "US.NVDA", "US.AAPL"]
+        assert names == {"HK.00700": "Tencent", "US.NVDA": "NVIDIA", "US.AAPL": "Apple"}
+
+
+class TestCategorizeResults:
+    """Tests for BatchAnalyzer._categorize_results."""
+
+    def test_buckets_and_top_lists_keep_order(self):
+        """Test one-pass bucketing matches sorted/filtered selection."""
+        ratings = ["strong_buy", "sell", "buy", "strong_sell", "hold", "sell", "buy"]
+        results = []
+        for i, rating in enumerate(ratings):
+            r = MagicMock()
+            r.technical_score.rating = TechnicalRating(rating)
+            r.obv_analysis.score = 50.0 if i % 2 else 70.0  # ties everywhere
+            r.vcp_analysis.detected = i != 2
+            r.vcp_analysis.overall_score = float(i % 3)
+            results.append(r)
+
+        batch = BatchAnalyzer(data_provider=MagicMock())._categorize_results(
+            results, ["US.BAD"]
+        )
+
+        assert batch.strong_buy == [results[0]]
+        assert batch.buy == [results[2], results[6]]
+        assert batch.hold == [results[4]]
+        assert batch.sell == [results[1], results[3], results[5]]
+        assert (
+            batch.top_obv
+            == sorted(results, key=lambda x: x.obv_analysis.score, reverse=True)[:5]
+        )
+        assert (
+            batch.top_vcp
+            == sorted(
+                [r for r in results if r.vcp_analysis.detected],
+                key=lambda x: x.vcp_analysis.overall_score,
+                reverse=True,
+            )[:5]
+        )
+        assert batch.top_overall == results[:5]
+        assert batch.total_analyzed == 8
+
 
 class TestGenerateBatchReport:
     """Tests for generate_batch_report function."""
@@ -43,6 +43,13 @@ class TestChartResult:
         assert result.charts_failed == 1
         assert "HK.00700" in result.failed_codes
 
+    def test_uses_slots(self):
+        """Test result has no per-instance __dict__."""
+        result = ChartResult(success=True)
+        assert not hasattr(result, "__dict__")
+        with pytest.raises(AttributeError):
+            result.unknown_field = 1
+
 
 class TestBatchChartConfig:
     """Tests for BatchChartConfig class."""
@@ -71,6 +78,14 @@ class TestBatchChartConfig:
         assert config.ma_periods == [10, 20]
         assert config.output_subdir == "custom"
 
+    def test_uses_slots(self):
+        """Test config has no per-instance __dict__ and still pickles."""
+        import pickle
+
+        config = BatchChartConfig(days=60)
+        assert not hasattr(config, "__dict__")
+        assert pickle.loads(pickle.dumps(config)) == config
+
 
 class TestChartServiceInit:
     """Tests for ChartService initialization."""
@@ -197,7 +212,7 @@ class TestGeneratePositionCharts:
     def test_no_positions(self, mock_get_session):
         """Test with no positions."""
         mock_session = MagicMock()
-        mock_session.query.return_value.join.return_value.filter.return_value.all.return_value = (
+        mock_session.query.return_value.join.return_value.filter.return_value.distinct.return_value.all.return_value = (
             []
         )
         mock_get_session.return_value.__enter__.return_value = mock_session
@@ -219,7 +234,7 @@ class TestGeneratePositionCharts:
         mock_pos.qty = 100
 
         mock_session = MagicMock()
-        mock_session.query.return_value.join.return_value.filter.return_value.all.return_value = [
+        mock_session.query.return_value.join.return_value.filter.return_value.distinct.return_value.all.return_value = [
             mock_pos
         ]
         mock_get_session.return_value.__enter__.return_value = mock_session
@@ -255,29 +270,64 @@ class TestGeneratePositionCharts:
         assert result.success is True
         assert result.charts_generated == 1
 
-    @patch("services.chart_service.get_session")
-    def test_filters_zero_qty(self, mock_get_session):
-        """Test that zero quantity positions are filtered."""
-        mock_pos1 = MagicMock()
-        mock_pos1.market = "HK"
-        mock_pos1.code = "00700"
-        mock_pos1.qty = 100
-
-        mock_pos2 = MagicMock()
-        mock_pos2.market = "US"
-        mock_pos2.code = "NVDA"
-        mock_pos2.qty = 0  # Zero quantity
+    def test_filters_zero_qty_and_dedupes(self):
+        """Test zero-quantity positions are skipped and codes deduplicated in SQL."""
+        from contextlib import contextmanager
+        from datetime import date
+        from decimal import Decimal
 
-        mock_session = MagicMock()
-        mock_session.query.return_value.join.return_value.filter.return_value.all.return_value = [
-            mock_pos1,
-            mock_pos2,
-        ]
-        mock_get_session.return_value.__enter__.return_value = mock_session
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+
+        from db.models import Account, Base, Position, User
+
+        engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+
+        user = User(username="tester")
+        session.add(user)
+        session.flush()
+        account = Account(
+            user_id=user.id, futu_acc_id=1, account_type="REAL", market="HK"
+        )
+        session.add(account)
+        session.flush()
+        for snapshot_date, code, qty in [
+            (date(2025, 1, 2), "00700", Decimal("100")),
+            (date(2025, 1, 3), "00700", Decimal("100")),
+            (date(2025, 1, 3), "09988", Decimal("0")),
+        ]:
+            session.add(
+                Position(
+                    account_id=account.id,
+                    snapshot_date=snapshot_date,
+                    market="HK",
+                    code=code,
+                    qty=qty,
+                )
+            )
+        session.commit()
+
+        @contextmanager
+        def _get_session():
+            yield session
 
         service = ChartService()
-        # The method should only process positions with qty > 0
-        # We're testing the filtering logic, not the chart generation
+        with (
+            patch("services.chart_service.get_session", _get_session),
+            patch.object(
+                service,
+                "_generate_charts_for_codes",
+                side_effect=lambda c, d, cfg, r: c,
+            ),
+        ):
+            codes = service.generate_position_charts(user_id=user.id)
+
+        session.close()
+        engine.dispose()
+
+        assert codes == ["HK.00700"]
 
 
 class TestGenerateChartsForCodes:
@@ -443,3 +493,196 @@ class TestBatchChartConfigIntegration:
         result = service.generate_charts_for_codes(codes=["HK.00700"], config=config)
 
         assert result.output_dir == tmp_path / "user1/watchlist"
+
+
+class TestParallelRendering:
+    """Tests for process-pool chart rendering."""
+
+    def _make_fetcher(self):
+        mock_fetcher = MagicMock()
+        mock_df = pd.DataFrame(
+            {
+                "date": pd.date_range("2024-01-01", periods=30),
+                "open": [100.0] * 30,
+                "high": [105.0] * 30,
+                "low": [95.0] * 30,
+                "close": [102.0] * 30,
+                "volume": [1000000] * 30,
+            }
+        )
+        mock_fetcher.fetch.return_value = MagicMock(
+            success=True, df=mock_df, error_message=None
+        )
+        return mock_fetcher
+
+    def test_default_is_serial(self):
+        """Test that rendering is serial unless workers are requested."""
+        assert BatchChartConfig().render_workers == 1
+
+    def test_render_in_pool(self, tmp_path):
+        """Test charts are rendered by pool workers."""
+        from charts import ChartGenerator
+
+        service = ChartService(
+            kline_fetcher=self._make_fetcher(),
+            chart_generator=ChartGenerator(output_dir=tmp_path),
+            output_dir=tmp_path,
+        )
+        config = BatchChartConfig(days=20, ma_periods=[5], render_workers=2)
+
+        with patch("services.chart_service.os.cpu_count", return_value=2):
+            result = service.generate_charts_for_codes(
+                codes=["HK.00700", "US.NVDA"], config=config
+            )
+
+        assert result.success is True
+        assert result.charts_generated == 2
+        assert result.generated_files == [
+            tmp_path / "HK_00700.png",
+            tmp_path / "US_NVDA.png",
+        ]
+        assert all(path.exists() for path in result.generated_files)
+
+    def test_pool_records_fetch_failures(self, tmp_path):
+        """Test fetch failures are recorded without reaching the pool."""
+        from charts import ChartGenerator
+
+        mock_fetcher = self._make_fetcher()
+        ok = mock_fetcher.fetch.return_value
+        failed = MagicMock(success=False, df=None, error_message="No data")
+        mock_fetcher.fetch.side_effect = [ok, failed]
+
+        service = ChartService(
+            kline_fetcher=mock_fetcher,
+            chart_generator=ChartGenerator(output_dir=tmp_path),
+            output_dir=tmp_path,
+        )
+        config = BatchChartConfig(days=20, ma_periods=[5], render_workers=2)
+
+        with patch("services.chart_service.os.cpu_count", return_value=2):
+            result = service.generate_charts_for_codes(
+                codes=["HK.00700", "US.NVDA"], config=config
+            )
+
+        assert result.charts_generated == 1
+        assert result.failed_codes == ["US.NVDA"]
+
+
+class TestKlinePrefetch:
+    """Tests for threaded K-line prefetching."""
+
+    def test_prefetch_preserves_order(self):
+        """Test prefetched futures are yielded in input order."""
+        mock_fetcher = MagicMock()
+        mock_fetcher.fetch.side_effect = lambda code, days: code
+        service = ChartService(kline_fetcher=mock_fetcher, chart_generator=MagicMock())
+
+        codes = ["HK.00700", "US.NVDA", "HK.09988"]
+        fetched = [
+            (code, future.result())
+            for code, future in service._prefetch_klines(codes, BatchChartConfig())
+        ]
+
+        assert fetched == [(code, code) for code in codes]
+
+    def test_prefetch_exception_marks_code_failed(self, tmp_path):
+        """Test an exception raised by a prefetch is recorded as a failure."""
+        mock_fetcher = MagicMock()
+        mock_fetcher.fetch.side_effect = RuntimeError("boom")
+
+        service = ChartService(
+            kline_fetcher=mock_fetcher,
+            chart_generator=MagicMock(),
+            output_dir=tmp_path,
+        )
+        result = service.generate_charts_for_codes(codes=["HK.00700"])
+
+        assert result.failed_codes == ["HK.00700"]
+        assert result.success is False
+
+
+class TestKlineCacheIntegration:
+    """Tests for ChartService with a K-line cache."""
+
+    def test_cache_hit_skips_fetch(self, tmp_path):
+        """Test a second run is served from the cache."""
+        from services.kline_cache import KlineCache
+
+        mock_fetcher = MagicMock()
+        mock_df = pd.DataFrame(
+            {
+                "date": pd.date_range("2024-01-01", periods=10),
+                "open": [100] * 10,
+                "high": [105] * 10,
+                "low": [95] * 10,
+                "close": [102] * 10,
+                "volume": [1000000] * 10,
+            }
+        )
+        mock_fetcher.fetch.return_value = MagicMock(
+            success=True, df=mock_df, error_message=None
+        )
+        mock_generator = MagicMock()
+        mock_generator.generate.return_value = tmp_path / "test.png"
+
+        service = ChartService(
+            kline_fetcher=mock_fetcher,
+            chart_generator=mock_generator,
+            output_dir=tmp_path,
+            kline_cache=KlineCache(cache_dir=tmp_path / "cache"),
+        )
+        service.generate_charts_for_codes(codes=["HK.00700"])
+        result = service.generate_charts_for_codes(codes=["HK.00700"])
+
+        assert result.charts_generated == 1
+        assert mock_fetcher.fetch.call_count == 1
+
+    def test_failed_fetch_not_cached(self, tmp_path):
+        """Test failed fetches are not cached."""
+        from services.kline_cache import KlineCache
+
+        mock_fetcher = MagicMock()
+        mock_fetcher.fetch.return_value = MagicMock(
+            success=False, df=None, error_message="No data"
+        )
+
+        service = ChartService(
+            kline_fetcher=mock_fetcher,
+            chart_generator=MagicMock(),
+            output_dir=tmp_path,
+            kline_cache=KlineCache(cache_dir=tmp_path / "cache"),
+        )
+        service.generate_charts_for_codes(codes=["HK.00700"])
+        service.generate_charts_for_codes(codes=["HK.00700"])
+
+        assert mock_fetcher.fetch.call_count == 2
+
+
+class TestDuplicateCodes:
+    """Tests for duplicate code handling."""
+
+    def test_duplicate_codes_rendered_once(self, tmp_path):
+        """Test duplicated codes are fetched and rendered once, in order."""
+        mock_fetcher = MagicMock()
+        mock_fetcher.fetch.return_value = MagicMock(
+            success=True,
+            df=pd.DataFrame({"close": [1.0]}),
+            error_message=None,
+        )
+        mock_generator = MagicMock()
+        mock_generator.generate.side_effect = lambda **kwargs: kwargs["output_path"]
+
+        service = ChartService(
+            kline_fetcher=mock_fetcher,
+            chart_generator=mock_generator,
+            output_dir=tmp_path,
+        )
+        result = service.generate_charts_for_codes(
+            codes=["US.NVDA", "HK.00700", "US.NVDA"]
+        )
+
+        assert mock_fetcher.fetch.call_count == 2
+        assert result.generated_files == [
+            tmp_path / "US_NVDA.png",
+            tmp_path / "HK_00700.png",
+        ]
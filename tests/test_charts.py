@@ -153,6 +153,14 @@ class TestChartConfig:
         assert config.figsize == (10, 6)
         assert config.last_n_days == 30
 
+    def test_config_is_frozen(self):
+        """Test config cannot be mutated once built."""
+        from dataclasses import FrozenInstanceError
+
+        config = ChartConfig()
+        with pytest.raises(FrozenInstanceError):
+            config.dpi = 200
+
 
 class TestChartGeneratorInit:
     """Tests for ChartGenerator initialization."""
@@ -322,6 +330,23 @@ class TestChartGeneratorMAPlots:
         # Should only create MA5 (MA20 needs more data)
         assert len(add_plots) == 1
 
+    def test_ma_matches_rolling_mean(self):
+        """Test vectorized MA equals pandas rolling mean."""
+        closes = [100 + (i % 7) * 1.5 - i * 0.2 for i in range(80)]
+        df = pd.DataFrame(
+            {"close": closes},
+            index=pd.date_range("2025-01-01", periods=80),
+        )
+
+        generator = ChartGenerator()
+        generator._create_ma_plots(df, [5, 20, 60])
+
+        for period in (5, 20, 60):
+            expected = df["close"].rolling(window=period).mean()
+            pd.testing.assert_series_equal(
+                df[f"ma{period}"], expected, check_names=False
+            )
+
 
 class TestChartGeneratorKlinesToDataframe:
     """Tests for converting KlineData to DataFrame."""
@@ -358,10 +383,17 @@ class TestChartGeneratorKlinesToDataframe:
         assert df.empty
 
 
+def _blank_plot(*args, **kwargs):
+    """Stand-in for ``mpf.plot(..., returnfig=True)``: an empty figure, no axes."""
+    from matplotlib.figure import Figure
+
+    return Figure(), []
+
+
 class TestChartGeneratorGenerate:
     """Tests for chart generation."""
 
-    @patch("charts.generator.mpf.plot")
+    @patch("charts.generator.mpf.plot", side_effect=_blank_plot)
     def test_generate_basic_chart(self, mock_plot):
         """Test generating basic chart."""
         df = pd.DataFrame(
@@ -384,7 +416,7 @@ class TestChartGeneratorGenerate:
             mock_plot.assert_called_once()
             assert result == output_path
 
-    @patch("charts.generator.mpf.plot")
+    @patch("charts.generator.mpf.plot", side_effect=_blank_plot)
     def test_generate_without_volume(self, mock_plot):
         """Test generating chart without volume."""
         df = pd.DataFrame(
@@ -411,7 +443,7 @@ class TestChartGeneratorGenerate:
             call_kwargs = mock_plot.call_args[1]
             assert call_kwargs["volume"] is False
 
-    @patch("charts.generator.mpf.plot")
+    @patch("charts.generator.mpf.plot", side_effect=_blank_plot)
     def test_generate_without_ma(self, mock_plot):
         """Test generating chart without MA."""
         df = pd.DataFrame(
@@ -447,7 +479,7 @@ class TestChartGeneratorGenerate:
         with pytest.raises(ValueError):
             generator.generate(df, title="Empty")
 
-    @patch("charts.generator.mpf.plot")
+    @patch("charts.generator.mpf.plot", side_effect=_blank_plot)
     def test_generate_from_klines(self, mock_plot):
         """Test generating chart from KlineData list."""
         klines = [
@@ -478,7 +510,7 @@ class TestChartGeneratorGenerate:
 class TestChartGeneratorBatch:
     """Tests for batch chart generation."""
 
-    @patch("charts.generator.mpf.plot")
+    @patch("charts.generator.mpf.plot", side_effect=_blank_plot)
     def test_generate_batch(self, mock_plot):
         """Test batch chart generation."""
         df1 = pd.DataFrame(
@@ -502,6 +534,123 @@ class TestChartGeneratorBatch:
             assert mock_plot.call_count == 2
 
 
+class TestChartGeneratorRendering:
+    """Tests for headless rendering and external-axes drawing."""
+
+    def _make_df(self, periods=40):
+        return pd.DataFrame(
+            {
+                "date": pd.date_range("2025-01-01", periods=periods),
+                "open": [100 + i * 0.1 for i in range(periods)],
+                "high": [105 + i * 0.1 for i in range(periods)],
+                "low": [95 + i * 0.1 for i in range(periods)],
+                "close": [102 + i * 0.1 for i in range(periods)],
+                "volume": [1000000] * periods,
+            }
+        )
+
+    def test_generate_closes_pyplot_figures(self):
+        """Test charts are written without leaving figures open in pyplot."""
+        import matplotlib.pyplot as plt
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            generator = ChartGenerator(output_dir=tmpdir)
+            open_figs = len(plt.get_fignums())
+
+            first = generator.generate(
+                self._make_df(), title="A", output_path=Path(tmpdir) / "a.png"
+            )
+            second = generator.generate(
+                self._make_df(60), title="B", output_path=Path(tmpdir) / "b.png"
+            )
+
+            assert first.stat().st_size > 0
+            assert second.stat().st_size > 0
+            assert len(plt.get_fignums()) == open_figs
+
+    @pytest.mark.parametrize("show_volume", [True, False])
+    def test_image_matches_mplfinance_layout(self, show_volume):
+        """Test the PNG has the same size and pixels as mpf.plot's own savefig."""
+        import matplotlib.image as mpimg
+        import mplfinance as mpf
+
+        config = ChartConfig(ma_periods=[5, 10], show_volume=show_volume)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            generator = ChartGenerator(output_dir=tmpdir)
+            path = generator.generate(
+                self._make_df(),
+                title="A",
+                output_path=Path(tmpdir) / "a.png",
+                config=config,
+            )
+
+            df = generator._prepare_dataframe(self._make_df(), config)
+            expected_path = Path(tmpdir) / "expected.png"
+            mpf.plot(
+                df,
+                **generator._plot_kwargs(df, "A", config),
+                savefig={"fname": str(expected_path), "dpi": config.dpi},
+            )
+
+            image = mpimg.imread(path)
+            expected = mpimg.imread(expected_path)
+
+        assert image.shape == expected.shape
+        assert (image == expected).all()
+
+    def test_pickle_resets_style_flag(self):
+        """Test generator pickles for worker processes with no active style."""
+        import pickle
+
+        generator = ChartGenerator()
+        with generator.style_context():
+            clone = pickle.loads(pickle.dumps(generator))
+
+        assert clone._style_active is False
+        assert clone.style.name == generator.style.name
+
+
+class TestChartGeneratorStyleContext:
+    """Tests for batch-scoped style rcParams."""
+
+    def test_rc_for_style_uses_style_colors(self):
+        """Test rcParams carry the style's colors."""
+        generator = ChartGenerator(style="dark")
+
+        rc = generator.rc_for_style()
+
+        assert rc["axes.facecolor"] == DARK_STYLE.background_color
+        assert rc["grid.color"] == DARK_STYLE.grid_color
+        assert rc["axes.grid"] is True
+        assert "backend" not in rc
+
+    def test_rc_for_style_cached(self):
+        """Test current-style rcParams are built once until the style changes."""
+        generator = ChartGenerator(style="dark")
+
+        assert generator.rc_for_style() is generator.rc_for_style("dark")
+
+        generator.set_style("light")
+        assert (
+            generator.rc_for_style()["axes.facecolor"] == LIGHT_STYLE.background_color
+        )
+
+    def test_style_context_restores_rcparams(self):
+        """Test rcParams are restored after the context exits."""
+        import matplotlib
+
+        generator = ChartGenerator(style="dark")
+        before = matplotlib.rcParams["axes.facecolor"]
+
+        with generator.style_context():
+            assert matplotlib.rcParams["axes.facecolor"] == DARK_STYLE.background_color
+            with generator.style_context():
+                assert generator._style_active is True
+
+        assert generator._style_active is False
+        assert matplotlib.rcParams["axes.facecolor"] == before
+
+
 class TestChartGeneratorSetStyle:
     """Tests for changing chart style."""
 
@@ -30,8 +30,9 @@ class TestSettings:
 
     def test_database_settings_defaults(self):
         """Test database settings have defaults."""
-        assert settings.database.pool_size == 5
+        assert settings.database.pool_size == 10
         assert settings.database.max_overflow == 10
+        assert settings.database.pool_recycle == 1800
 
     def test_futu_settings_defaults(self):
         """Test Futu settings have defaults."""
@@ -529,3 +529,32 @@ class TestRelationships:
         assert len(account.positions) == 2
         assert pos1 in account.positions
         assert pos2 in account.positions
+
+
+class TestEnginePoolOptions:
+    """Tests for engine connection pool configuration."""
+
+    def test_server_database_uses_sized_pool(self):
+        """Test PostgreSQL URLs get pool sizing, pre-ping and recycle."""
+        from config import settings
+        from db.database import _pool_options
+
+        options = _pool_options("postgresql://localhost:5432/investment_db")
+
+        assert options == {
+            "pool_size": settings.database.pool_size,
+            "max_overflow": settings.database.max_overflow,
+            "pool_recycle": settings.database.pool_recycle,
+            "pool_pre_ping": True,
+        }
+
+    def test_sqlite_keeps_default_pool(self):
+        """Test SQLite URLs create an engine without pool sizing arguments."""
+        from db.database import _pool_options
+
+        url = "sqlite:///:memory:"
+        engine = create_engine(url, **_pool_options(url))
+
+        assert _pool_options(url) == {}
+        with engine.connect():
+            pass
@@ -0,0 +1,430 @@
+"""Tests for derivative contract service helpers."""
+
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db.models import Base, DerivativeContract
+from services.derivative_service import (
+    DerivativeService,
+    get_derivative_type,
+    is_derivative_code,
+    parse_option_code,
+    sync_derivative_contracts_for_trades,
+)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    """Create in-memory database."""
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def session(engine):
+    """Create a session for each test."""
+    SessionLocal = sessionmaker(bind=engine)
+    session = SessionLocal()
+
+    # Clear data
+    for table in reversed(Base.metadata.sorted_tables):
+        session.execute(table.delete())
+    session.commit()
+
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def patched_get_session(session):
+    """Route module-level get_session() calls to the test session."""
+
+    @contextmanager
+    def _get_session():
+        yield session
+        session.commit()
+
+    with patch("services.derivative_service.get_session", _get_session):
+        yield
+
+
+class TestParseOptionCode:
+    """Tests for parse_option_code function."""
+
+    def test_hk_warrant(self):
+        """Test parsing an HK warrant code."""
+        parsed = parse_option_code("HK", "KST260226C75000")
+        assert parsed == {
+            "underlying": "KST",
+            "expiry_date": date(2026, 2, 26),
+            "option_type": "CALL",
+            "strike_price": Decimal("75"),
+        }
+
+    def test_us_option(self):
+        """Test parsing a US option code."""
+        parsed = parse_option_code("US", "NVDA260220P195000")
+        assert parsed["underlying"] == "NVDA"
+        assert parsed["expiry_date"] == date(2026, 2, 20)
+        assert parsed["option_type"] == "PUT"
+        assert parsed["strike_price"] == Decimal("195")
+
+    def test_fractional_strike(self):
+        """Test fractional strikes keep their exact decimal representation."""
+        parsed = parse_option_code("US", "AAPL260220C182500")
+        assert str(parsed["strike_price"]) == "182.5"
+        assert str(parse_option_code("HK", "KST260226C75000")["strike_price"]) == "75"
+
+    def test_invalid_date(self):
+        """Test an unparseable expiry yields None for expiry_date."""
+        parsed = parse_option_code("US", "NVDA261340C195000")
+        assert parsed["expiry_date"] is None
+
+    def test_expiry_matches_strptime(self):
+        """Test hand-rolled YYMMDD parsing follows strptime's %y rules."""
+        from datetime import datetime
+
+        from services.derivative_service import _parse_yymmdd
+
+        for date_str in ["260226", "000101", "681231", "690101", "991231", "240229"]:
+            expected = datetime.strptime(date_str, "%y%m%d").date()
+            assert _parse_yymmdd(date_str) == expected
+        assert _parse_yymmdd("250229") is None
+        assert _parse_yymmdd("251301") is None
+
+    def test_not_an_option(self):
+        """Test plain stock codes are not parsed."""
+        assert parse_option_code("US", "NVDA") is None
+        assert parse_option_code("HK", "00700") is None
+        assert parse_option_code("A", "600519") is None
+
+    def test_returns_fresh_dict(self):
+        """Test cached results are not shared between callers."""
+        first = parse_option_code("US", "NVDA260220C195000")
+        first["underlying"] = "MUTATED"
+        second = parse_option_code("US", "NVDA260220C195000")
+        assert second["underlying"] == "NVDA"
+
+
+class TestIsDerivativeCode:
+    """Tests for is_derivative_code and get_derivative_type."""
+
+    def test_hk(self):
+        """Test HK warrant detection."""
+        assert is_derivative_code("HK", "KST260226C75000") is True
+        assert is_derivative_code("HK", "00700") is False
+
+    def test_us(self):
+        """Test US option detection."""
+        assert is_derivative_code("US", "NVDA260220C195000") is True
+        assert is_derivative_code("US", "NVDA") is False
+
+    def test_other_market(self):
+        """Test other markets are never derivatives."""
+        assert is_derivative_code("A", "600519") is False
+
+    def test_derivative_type(self):
+        """Test derivative type mapping."""
+        assert get_derivative_type("HK", "KST260226C75000") == "WARRANT"
+        assert get_derivative_type("US", "NVDA260220C195000") == "OPTION"
+        assert get_derivative_type("US", "NVDA") is None
+
+
+class TestDerivativeServiceDB:
+    """Tests for DerivativeService database access."""
+
+    def test_get_contracts(self, session):
+        """Test bulk lookup returns only existing contracts."""
+        service = DerivativeService(session)
+        service.save_contract("US", "NVDA260220C195000", contract_type="OPTION")
+        service.save_contract("HK", "KST260226C75000", contract_type="WARRANT")
+
+        found = service.get_contracts(
+            [("US", "NVDA260220C195000"), ("US", "AAPL260220C100000")]
+        )
+
+        assert list(found) == [("US", "NVDA260220C195000")]
+        assert found[("US", "NVDA260220C195000")].contract_type == "OPTION"
+
+    def test_get_contracts_empty(self, session):
+        """Test bulk lookup with no keys skips the query."""
+        assert DerivativeService(session).get_contracts([]) == {}
+
+    def test_save_contract_without_commit(self, session):
+        """Test commit=False defers the write until commit()."""
+        service = DerivativeService(session)
+        service.save_contract(
+            "US", "NVDA260220C195000", contract_type="OPTION", commit=False
+        )
+        assert session.new
+
+        service.commit()
+        assert not session.new
+        assert service.get_contract("US", "NVDA260220C195000") is not None
+
+
+class TestSyncDerivativeContracts:
+    """Tests for sync_derivative_contracts_for_trades."""
+
+    def test_sync_creates_missing_only(self, session, patched_get_session):
+        """Test existing contracts are skipped and new ones auto-populated."""
+        DerivativeService(session).save_contract(
+            "US", "NVDA260220C195000", contract_type="OPTION"
+        )
+
+        synced = sync_derivative_contracts_for_trades(
+            [
+                ("US", "NVDA260220C195000", "NVDA Call"),
+                ("US", "AAPL260220P100000", "AAPL Put"),
+                ("US", "AAPL260220P100000", "AAPL Put"),
+                ("US", "AAPL", "Apple"),
+            ]
+        )
+
+        assert synced == 1
+        codes = {c.code for c in session.query(DerivativeContract).all()}
+        assert codes == {"NVDA260220C195000", "AAPL260220P100000"}
+
+    def test_batch_fetch_commits_once(self, session):
+        """Test batch_fetch_contracts commits all new contracts together."""
+        service = DerivativeService(session)
+        with patch.object(session, "commit", wraps=session.commit) as mock_commit:
+            results = service.batch_fetch_contracts(
+                [("US", "NVDA260220C195000"), ("HK", "KST260226C75000")]
+            )
+
+        assert set(results) == {"US.NVDA260220C195000", "HK.KST260226C75000"}
+        assert mock_commit.call_count == 1
+
+
+class TestFetchFromFutuBatch:
+    """Tests for batched Futu snapshot fetching."""
+
+    def _snapshot(self, codes):
+        import pandas as pd
+
+        rows = []
+        for full_code in codes:
+            market = full_code.split(".", 1)[0]
+            rows.append(
+                {
+                    "code": full_code,
+                    "name": full_code,
+                    "stock_owner": "US.NVDA" if market == "US" else "HK.01024",
+                    "lot_size": 100,
+                    "option_valid": market == "US",
+                    "option_contract_size": 100,
+                    "option_strike_price": 195.0,
+                    "wrt_valid": market == "HK",
+                    "wrt_conversion_ratio": 10.0,
+                    "wrt_strike_price": 75.0,
+                }
+            )
+        return pd.DataFrame(rows)
+
+    def test_single_snapshot_request(self, session):
+        """Test all codes are fetched with one snapshot call."""
+        from futu import RET_OK
+
+        futu_ctx = MagicMock()
+        futu_ctx.get_market_snapshot.side_effect = lambda codes: (
+            RET_OK,
+            self._snapshot(codes),
+        )
+
+        service = DerivativeService(session)
+        results = service.fetch_from_futu_batch(
+            [("US", "NVDA260220C195000"), ("HK", "KST260226C75000")], futu_ctx
+        )
+
+        assert futu_ctx.get_market_snapshot.call_count == 1
+        assert results[("US", "NVDA260220C195000")].contract_type == "OPTION"
+        assert results[("HK", "KST260226C75000")].conversion_ratio == Decimal("10")
+
+    def test_falls_back_per_code(self, session):
+        """Test a failed batch request falls back to per-code requests."""
+        from futu import RET_ERROR, RET_OK
+
+        def snapshot(codes):
+            if len(codes) > 1:
+                return RET_ERROR, "unknown stock"
+            return RET_OK, self._snapshot(codes)
+
+        futu_ctx = MagicMock()
+        futu_ctx.get_market_snapshot.side_effect = snapshot
+
+        service = DerivativeService(session)
+        results = service.fetch_from_futu_batch(
+            [("US", "NVDA260220C195000"), ("US", "AAPL260220P100000")], futu_ctx
+        )
+
+        assert futu_ctx.get_market_snapshot.call_count == 3
+        assert len(results) == 2
+
+    def test_next_chunk_requested_before_flush(self, session):
+        """Test the next snapshot request overlaps the current chunk's DB flush."""
+        import threading
+
+        from futu import RET_OK
+
+        requested = []
+        second_started = threading.Event()
+
+        def snapshot(codes):
+            requested.extend(codes)
+            if len(requested) > 1:
+                second_started.set()
+            return RET_OK, self._snapshot(codes)
+
+        futu_ctx = MagicMock()
+        futu_ctx.get_market_snapshot.side_effect = snapshot
+
+        overlapped = []
+        real_flush = session.flush
+
+        def flush(*args, **kwargs):
+            overlapped.append(second_started.wait(timeout=5))
+            return real_flush(*args, **kwargs)
+
+        service = DerivativeService(session)
+        with (
+            patch("services.derivative_service.SNAPSHOT_BATCH_SIZE", 1),
+            patch.object(session, "flush", side_effect=flush),
+        ):
+            results = service.fetch_from_futu_batch(
+                [("US", "NVDA260220C195000"), ("US", "AAPL260220P100000")], futu_ctx
+            )
+
+        assert overlapped[0] is True
+        assert futu_ctx.get_market_snapshot.call_count == 2
+        assert len(results) == 2
+
+    def test_failed_flush_only_loses_bad_contract(self, session):
+        """Test a flush error rolls back to the chunk's savepoint and retries."""
+        from futu import RET_OK
+        from sqlalchemy.exc import IntegrityError
+
+        futu_ctx = MagicMock()
+        futu_ctx.get_market_snapshot.side_effect = lambda codes: (
+            RET_OK,
+            self._snapshot(codes),
+        )
+
+        bad = "AAPL260220P100000"
+        real_flush = session.flush
+
+        def flush(*args, **kwargs):
+            if any(getattr(obj, "code", None) == bad for obj in session.new):
+                raise IntegrityError("INSERT", {}, Exception("bad row"))
+            return real_flush(*args, **kwargs)
+
+        service = DerivativeService(session)
+        with (
+            patch("services.derivative_service.SNAPSHOT_BATCH_SIZE", 2),
+            patch.object(session, "flush", side_effect=flush),
+        ):
+            results = service.batch_fetch_contracts(
+                [
+                    ("HK", "KST260226C75000"),
+                    ("US", bad),
+                    ("US", "NVDA260220C195000"),
+                ],
+                futu_ctx,
+            )
+
+        assert list(results) == ["HK.KST260226C75000", "US.NVDA260220C195000"]
+        assert service.get_contract("US", bad) is None
+        stored = {c.code for c in session.query(DerivativeContract).all()}
+        assert stored == {"KST260226C75000", "NVDA260220C195000"}
+
+    def test_batch_fetch_contracts_uses_snapshot(self, session):
+        """Test batch_fetch_contracts only requests codes missing from the DB."""
+        from futu import RET_OK
+
+        service = DerivativeService(session)
+        service.save_contract("US", "NVDA260220C195000", contract_type="OPTION")
+
+        futu_ctx = MagicMock()
+        futu_ctx.get_market_snapshot.side_effect = lambda codes: (
+            RET_OK,
+            self._snapshot(codes),
+        )
+
+        results = service.batch_fetch_contracts(
+            [("US", "NVDA260220C195000"), ("HK", "KST260226C75000")], futu_ctx
+        )
+
+        futu_ctx.get_market_snapshot.assert_called_once_with(["HK.KST260226C75000"])
+        assert list(results) == ["US.NVDA260220C195000", "HK.KST260226C75000"]
+        assert results["HK.KST260226C75000"].data_source == "FUTU"
+
+
+class TestContractCache:
+    """Tests for the in-service contract cache."""
+
+    def test_repeat_lookup_skips_query(self, session):
+        """Test a second get_contract is served without a query."""
+        DerivativeService(session).save_contract(
+            "US", "NVDA260220C195000", contract_type="OPTION"
+        )
+
+        service = DerivativeService(session)
+        first = service.get_contract("US", "NVDA260220C195000")
+        with patch.object(session, "query") as mock_query:
+            second = service.get_contract("US", "NVDA260220C195000")
+            bulk = service.get_contracts([("US", "NVDA260220C195000")])
+
+        mock_query.assert_not_called()
+        assert second is first
+        assert bulk[("US", "NVDA260220C195000")] is first
+
+    def test_missing_contract_not_cached(self, session):
+        """Test misses are re-queried so later inserts are seen."""
+        service = DerivativeService(session)
+        assert service.get_contract("US", "NVDA260220C195000") is None
+
+        DerivativeService(session).save_contract(
+            "US", "NVDA260220C195000", contract_type="OPTION"
+        )
+        assert service.get_contract("US", "NVDA260220C195000") is not None
+
+    def test_multiplier_cached(self, session):
+        """Test repeat get_multiplier calls skip the contract lookup."""
+        service = DerivativeService(session)
+        service.save_contract(
+            "HK",
+            "KST260226C75000",
+            contract_type="WARRANT",
+            conversion_ratio=Decimal("10"),
+        )
+        service._contracts.clear()
+
+        assert service.get_multiplier("HK", "KST260226C75000") == Decimal("10")
+        with patch.object(service, "get_contract", return_value=None) as mock_get:
+            assert service.get_multiplier("HK", "KST260226C75000") == Decimal("10")
+            assert service.get_multiplier("US", "AAPL260220C100000") == Decimal("100")
+            assert service.get_multiplier("US", "AAPL260220C100000") == Decimal("100")
+
+        mock_get.assert_called_once_with("US", "AAPL260220C100000")
+
+    def test_save_contract_invalidates_multiplier(self, session):
+        """Test saving a contract refreshes its cached multiplier."""
+        service = DerivativeService(session)
+        assert service.get_multiplier("HK", "KST260226C75000") == Decimal("1")
+
+        service.save_contract(
+            "HK",
+            "KST260226C75000",
+            contract_type="WARRANT",
+            conversion_ratio=Decimal("10"),
+        )
+
+        assert service.get_multiplier("HK", "KST260226C75000") == Decimal("10")
@@ -4,21 +4,29 @@ Tests for export service.
 Tests data export functionality to CSV, Excel, and JSON formats.
 """
 
+import gzip
 import json
 import tempfile
-from datetime import datetime
+import time
+from datetime import date, datetime
+from decimal import Decimal
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
+import pyarrow as pa
 import pytest
 
 from services.export_service import (
+    POSITION_NUM_COLS,
     DateRange,
     ExportConfig,
     ExportFormat,
     ExportResult,
     ExportService,
+    _frame_from_columns,
+    _frame_from_rows,
+    _prefetch,
     create_export_service,
     export_all_to_excel,
     export_klines_to_csv,
@@ -46,89 +54,108 @@ def export_config(temp_output_dir):
 
 
 @pytest.fixture
-def mock_session():
-    """Create a mock database session."""
-    session = MagicMock()
-    return session
-
-
-@pytest.fixture
-def mock_position():
-    """Create a mock position object."""
-    pos = MagicMock()
-    pos.id = 1
-    pos.account_id = 1
-    pos.snapshot_date = datetime(2024, 1, 15).date()
-    pos.market = "HK"
-    pos.code = "00700"
-    pos.stock_name = "腾讯控股"
-    pos.qty = 100
-    pos.can_sell_qty = 100
-    pos.cost_price = 350.0
-    pos.market_price = 380.0
-    pos.market_val = 38000.0
-    pos.pl_val = 3000.0
-    pos.pl_ratio = 0.0857
-    pos.position_side = "LONG"
-    pos.created_at = datetime(2024, 1, 15, 10, 30, 0)
-    return pos
-
-
-@pytest.fixture
-def mock_trade():
-    """Create a mock trade object."""
-    trade = MagicMock()
-    trade.id = 1
-    trade.account_id = 1
-    trade.deal_id = "D001"
-    trade.order_id = "O001"
-    trade.trade_time = datetime(2024, 1, 10, 14, 30, 0)
-    trade.market = "HK"
-    trade.code = "00700"
-    trade.stock_name = "腾讯控股"
-    trade.trd_side = "BUY"
-    trade.qty = 100
-    trade.price = 350.0
-    trade.amount = 35000.0
-    trade.fee = 50.0
-    trade.currency = "HKD"
-    return trade
-
-
-@pytest.fixture
-def mock_kline():
-    """Create a mock kline object."""
-    kline = MagicMock()
-    kline.trade_date = datetime(2024, 1, 15).date()
-    kline.market = "HK"
-    kline.code = "00700"
-    kline.open = 375.0
-    kline.high = 382.0
-    kline.low = 372.0
-    kline.close = 380.0
-    kline.volume = 10000000
-    kline.turnover = 3800000000.0
-    kline.ma5 = 376.0
-    kline.ma10 = 370.0
-    kline.ma20 = 365.0
-    kline.ma60 = 355.0
-    return kline
+def db_session():
+    """Create an in-memory database seeded with one user's data.
+
+    User 1 owns account 1 with one position, one trade and one active
+    watchlist item; HK.00700 has one kline. User 2 has no data.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from db.models import Account, Base, Kline, Position, Trade, User, WatchlistItem
+
+    # StaticPool shares the one in-memory database with worker threads
+    engine = create_engine(
+        "sqlite:///:memory:",
+        echo=False,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    session.add_all(
+        [
+            User(id=1, username="tester"),
+            User(id=2, username="empty"),
+            Account(
+                id=1, user_id=1, futu_acc_id=1001, account_type="REAL", market="HK"
+            ),
+        ]
+    )
+    session.flush()
+    session.add_all(
+        [
+            Position(
+                id=1,
+                account_id=1,
+                snapshot_date=date(2024, 1, 15),
+                market="HK",
+                code="00700",
+                stock_name="腾讯控股",
+                qty=Decimal("100"),
+                can_sell_qty=Decimal("100"),
+                cost_price=Decimal("350.0"),
+                market_price=Decimal("380.0"),
+                market_val=Decimal("38000.0"),
+                pl_val=Decimal("3000.0"),
+                pl_ratio=Decimal("0.0857"),
+                position_side="LONG",
+                created_at=datetime(2024, 1, 15, 10, 30, 0),
+            ),
+            Trade(
+                id=1,
+                account_id=1,
+                deal_id="D001",
+                order_id="O001",
+                trade_time=datetime(2024, 1, 10, 14, 30, 0),
+                market="HK",
+                code="00700",
+                stock_name="腾讯控股",
+                trd_side="BUY",
+                qty=Decimal("100"),
+                price=Decimal("350.0"),
+                amount=Decimal("35000.0"),
+                fee=Decimal("50.0"),
+                currency="HKD",
+            ),
+            Kline(
+                market="HK",
+                code="00700",
+                trade_date=date(2024, 1, 15),
+                open=Decimal("375.0"),
+                high=Decimal("382.0"),
+                low=Decimal("372.0"),
+                close=Decimal("380.0"),
+                volume=10000000,
+                amount=Decimal("3800000000.0"),
+                ma5=Decimal("376.0"),
+                ma10=Decimal("370.0"),
+                ma20=Decimal("365.0"),
+                ma60=Decimal("355.0"),
+            ),
+            WatchlistItem(
+                id=1,
+                user_id=1,
+                market="HK",
+                code="00700",
+                stock_name="腾讯控股",
+                group_name="Tech",
+                notes="Long term hold",
+                sort_order=0,
+                is_active=True,
+                created_at=datetime(2024, 1, 1, 9, 0, 0),
+            ),
+        ]
+    )
+    session.commit()
 
+    yield session
 
-@pytest.fixture
-def mock_watchlist():
-    """Create a mock watchlist item."""
-    item = MagicMock()
-    item.id = 1
-    item.market = "HK"
-    item.code = "00700"
-    item.stock_name = "腾讯控股"
-    item.group_name = "Tech"
-    item.notes = "Long term hold"
-    item.sort_order = 0
-    item.is_active = True
-    item.created_at = datetime(2024, 1, 1, 9, 0, 0)
-    return item
+    session.close()
+    engine.dispose()
 
 
 # ============================================================================
@@ -144,6 +171,9 @@ class TestExportFormat:
         assert ExportFormat.CSV == "csv"
         assert ExportFormat.EXCEL == "xlsx"
         assert ExportFormat.JSON == "json"
+        assert ExportFormat.NDJSON == "ndjson"
+        assert ExportFormat.PARQUET == "parquet"
+        assert ExportFormat.FEATHER == "feather"
 
     def test_format_from_string(self):
         """Test creating format from string."""
@@ -170,6 +200,7 @@ class TestExportConfig:
         assert config.datetime_format == "%Y-%m-%d %H:%M:%S"
         assert config.decimal_places == 4
         assert config.encoding == "utf-8"
+        assert config.compression is None
 
     def test_custom_values(self, temp_output_dir):
         """Test custom configuration values."""
@@ -286,20 +317,165 @@ class TestExportService:
         assert output_dir.exists()
 
 
+class TestPrefetch:
+    """Test background fetching of export partitions."""
+
+    def test_yields_in_order_from_worker_thread(self):
+        """Test frames keep their order and are produced off the caller thread."""
+        import threading
+
+        threads = []
+
+        def frames():
+            for i in range(3):
+                threads.append(threading.get_ident())
+                yield pd.DataFrame({"n": [i]})
+
+        result = [df["n"].iloc[0] for df in _prefetch(frames())]
+
+        assert result == [0, 1, 2]
+        assert threading.get_ident() not in threads
+
+    def test_errors_reach_caller(self):
+        """Test an exception while fetching is raised from the consumer."""
+
+        def frames():
+            yield pd.DataFrame({"n": [1]})
+            raise RuntimeError("connection lost")
+
+        iterator = _prefetch(frames())
+        assert len(next(iterator)) == 1
+        with pytest.raises(RuntimeError, match="connection lost"):
+            next(iterator)
+
+
+    def test_close_waits_for_inflight_fetch(self):
+        """Test closing early returns only after the worker's fetch finishes."""
+        import threading
+
+        fetching = threading.Event()
+        finished = []
+
+        def frames():
+            yield pd.DataFrame({"n": [0]})
+            fetching.set()
+            time.sleep(0.2)
+            finished.append(True)
+            yield pd.DataFrame({"n": [1]})
+
+        iterator = _prefetch(frames())
+        next(iterator)
+        assert fetching.wait(timeout=5)
+        iterator.close()
+
+        assert finished == [True]
+
+    def test_failed_write_closes_frames(self, db_session, temp_output_dir):
+        """Test the frame iterator is closed when the writer raises."""
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+        closed = []
+
+        def frames():
+            try:
+                yield pd.DataFrame({"n": [0]})
+                yield pd.DataFrame({"n": [1]})
+            finally:
+                closed.append(True)
+
+        def write(frames, file_path):
+            next(iter(frames))
+            raise OSError("disk full")
+
+        with (
+            patch.object(service, "_iter_frames", return_value=frames()),
+            patch.object(service, "_write_csv", side_effect=write),
+        ):
+            result = service.export_klines(code="HK.00700", format=ExportFormat.CSV)
+
+        assert result.success is False
+        assert closed == [True]
+
+
+class TestDefaultFilename:
+    """Test default export filenames."""
+
+    def test_make_default_name(self):
+        """Test prefix, key and timestamp are combined."""
+        with patch("services.export_service.datetime") as mock_datetime:
+            mock_datetime.now.return_value = datetime(2024, 1, 15, 10, 30, 0)
+            name = ExportService._make_default_name("klines", "HK_00700")
+
+        assert name == "klines_HK_00700_20240115_103000"
+
+    def test_default_name_used(self, db_session, temp_output_dir):
+        """Test exports without a filename get a prefixed default name."""
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        result = service.export_klines(code="HK.00700", format=ExportFormat.CSV)
+
+        assert result.file_path.name.startswith("klines_HK_00700_")
+
+
+class TestAccountIdsCache:
+    """Test the per-service account-ID cache."""
+
+    def test_cached_within_ttl(self, db_session, temp_output_dir):
+        """Test a second lookup is served without a query."""
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+        assert service._get_user_account_ids(db_session, 1) == [1]
+
+        with patch.object(db_session, "execute") as mock_execute:
+            assert service._get_user_account_ids(db_session, 1) == [1]
+        mock_execute.assert_not_called()
+
+    def test_expires_after_ttl(self, db_session, temp_output_dir):
+        """Test an expired entry is reloaded from the database."""
+        from db.models import Account
+
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+        assert service._get_user_account_ids(db_session, 1) == [1]
+        db_session.add(
+            Account(id=2, user_id=1, futu_acc_id=1002, account_type="REAL", market="US")
+        )
+        db_session.commit()
+
+        assert service._get_user_account_ids(db_session, 1) == [1]
+        with patch("services.export_service.time.monotonic", return_value=1e12):
+            assert service._get_user_account_ids(db_session, 1) == [1, 2]
+
+    def test_not_shared_between_services(self, db_session, temp_output_dir):
+        """Test a new service sees accounts added after another one cached."""
+        from db.models import Account
+
+        config = ExportConfig(output_dir=temp_output_dir)
+        service = ExportService(session=db_session, config=config)
+        assert service._get_user_account_ids(db_session, 2) == []
+        db_session.add(
+            Account(id=2, user_id=2, futu_acc_id=1002, account_type="REAL", market="US")
+        )
+        db_session.commit()
+
+        fresh = ExportService(session=db_session, config=config)
+
+        assert fresh._get_user_account_ids(db_session, 2) == [2]
+        assert service._get_user_account_ids(db_session, 2) == []
+
+
 class TestExportPositions:
     """Test export_positions method."""
 
-    def test_export_positions_csv(self, mock_session, mock_position, temp_output_dir):
+    def test_export_positions_csv(self, db_session, temp_output_dir):
         """Test exporting positions to CSV."""
-        # Setup mock to return account IDs first, then positions
-        mock_accounts = MagicMock()
-        mock_accounts.scalars.return_value.all.return_value = [1]
-        mock_positions = MagicMock()
-        mock_positions.scalars.return_value.all.return_value = [mock_position]
-        mock_session.execute.side_effect = [mock_accounts, mock_positions]
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
         result = service.export_positions(user_id=1, format=ExportFormat.CSV)
 
@@ -315,16 +491,10 @@ class TestExportPositions:
         assert df.iloc[0]["code"] == "00700"
         assert df.iloc[0]["market"] == "HK"
 
-    def test_export_positions_json(self, mock_session, mock_position, temp_output_dir):
+    def test_export_positions_json(self, db_session, temp_output_dir):
         """Test exporting positions to JSON."""
-        mock_accounts = MagicMock()
-        mock_accounts.scalars.return_value.all.return_value = [1]
-        mock_positions = MagicMock()
-        mock_positions.scalars.return_value.all.return_value = [mock_position]
-        mock_session.execute.side_effect = [mock_accounts, mock_positions]
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
         result = service.export_positions(user_id=1, format=ExportFormat.JSON)
 
@@ -337,16 +507,10 @@ class TestExportPositions:
         assert len(data) == 1
         assert data[0]["code"] == "00700"
 
-    def test_export_positions_excel(self, mock_session, mock_position, temp_output_dir):
+    def test_export_positions_excel(self, db_session, temp_output_dir):
         """Test exporting positions to Excel."""
-        mock_accounts = MagicMock()
-        mock_accounts.scalars.return_value.all.return_value = [1]
-        mock_positions = MagicMock()
-        mock_positions.scalars.return_value.all.return_value = [mock_position]
-        mock_session.execute.side_effect = [mock_accounts, mock_positions]
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
         result = service.export_positions(user_id=1, format=ExportFormat.EXCEL)
 
@@ -354,16 +518,12 @@ class TestExportPositions:
         assert result.file_path.suffix == ".xlsx"
         assert result.file_path.exists()
 
-    def test_export_positions_empty(self, mock_session, temp_output_dir):
+    def test_export_positions_empty(self, db_session, temp_output_dir):
         """Test exporting when no accounts exist."""
-        mock_execute = MagicMock()
-        mock_execute.scalars.return_value.all.return_value = []
-        mock_session.execute.return_value = mock_execute
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
-        result = service.export_positions(user_id=1, format=ExportFormat.CSV)
+        result = service.export_positions(user_id=2, format=ExportFormat.CSV)
 
         assert result.success is True
         assert result.records_exported == 0
@@ -373,16 +533,10 @@ class TestExportPositions:
 class TestExportTrades:
     """Test export_trades method."""
 
-    def test_export_trades_csv(self, mock_session, mock_trade, temp_output_dir):
+    def test_export_trades_csv(self, db_session, temp_output_dir):
         """Test exporting trades to CSV."""
-        mock_accounts = MagicMock()
-        mock_accounts.scalars.return_value.all.return_value = [1]
-        mock_trades = MagicMock()
-        mock_trades.scalars.return_value.all.return_value = [mock_trade]
-        mock_session.execute.side_effect = [mock_accounts, mock_trades]
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
         result = service.export_trades(user_id=1, format=ExportFormat.CSV)
 
@@ -390,16 +544,10 @@ class TestExportTrades:
         assert result.records_exported == 1
         assert result.file_path.exists()
 
-    def test_export_trades_with_date_range(self, mock_session, mock_trade, temp_output_dir):
+    def test_export_trades_with_date_range(self, db_session, temp_output_dir):
         """Test exporting trades with date range filter."""
-        mock_accounts = MagicMock()
-        mock_accounts.scalars.return_value.all.return_value = [1]
-        mock_trades = MagicMock()
-        mock_trades.scalars.return_value.all.return_value = [mock_trade]
-        mock_session.execute.side_effect = [mock_accounts, mock_trades]
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
         date_range = DateRange(
             start_date=datetime(2024, 1, 1),
@@ -411,17 +559,14 @@ class TestExportTrades:
         )
 
         assert result.success is True
+        assert result.records_exported == 1
 
-    def test_export_trades_empty(self, mock_session, temp_output_dir):
+    def test_export_trades_empty(self, db_session, temp_output_dir):
         """Test exporting when no accounts exist."""
-        mock_execute = MagicMock()
-        mock_execute.scalars.return_value.all.return_value = []
-        mock_session.execute.return_value = mock_execute
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
-        result = service.export_trades(user_id=1, format=ExportFormat.CSV)
+        result = service.export_trades(user_id=2, format=ExportFormat.CSV)
 
         assert result.success is True
         assert result.records_exported == 0
@@ -431,28 +576,20 @@ class TestExportTrades:
 class TestExportKlines:
     """Test export_klines method."""
 
-    def test_export_klines_csv(self, mock_session, mock_kline, temp_output_dir):
+    def test_export_klines_csv(self, db_session, temp_output_dir):
         """Test exporting klines to CSV."""
-        mock_execute = MagicMock()
-        mock_execute.scalars.return_value.all.return_value = [mock_kline]
-        mock_session.execute.return_value = mock_execute
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
         result = service.export_klines(code="HK.00700", format=ExportFormat.CSV)
 
         assert result.success is True
         assert result.records_exported == 1
 
-    def test_export_klines_with_limit(self, mock_session, mock_kline, temp_output_dir):
+    def test_export_klines_with_limit(self, db_session, temp_output_dir):
         """Test exporting klines with limit."""
-        mock_execute = MagicMock()
-        mock_execute.scalars.return_value.all.return_value = [mock_kline]
-        mock_session.execute.return_value = mock_execute
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
         result = service.export_klines(
             code="HK.00700", format=ExportFormat.CSV, limit=100
@@ -460,14 +597,10 @@ class TestExportKlines:
 
         assert result.success is True
 
-    def test_export_klines_no_market_prefix(self, mock_session, mock_kline, temp_output_dir):
+    def test_export_klines_no_market_prefix(self, db_session, temp_output_dir):
         """Test exporting klines without market prefix."""
-        mock_execute = MagicMock()
-        mock_execute.scalars.return_value.all.return_value = [mock_kline]
-        mock_session.execute.return_value = mock_execute
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
         result = service.export_klines(code="00700", format=ExportFormat.CSV)
 
@@ -477,30 +610,22 @@ class TestExportKlines:
 class TestExportWatchlist:
     """Test export_watchlist method."""
 
-    def test_export_watchlist_csv(self, mock_session, mock_watchlist, temp_output_dir):
+    def test_export_watchlist_csv(self, db_session, temp_output_dir):
         """Test exporting watchlist to CSV."""
-        mock_execute = MagicMock()
-        mock_execute.scalars.return_value.all.return_value = [mock_watchlist]
-        mock_session.execute.return_value = mock_execute
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
         result = service.export_watchlist(user_id=1, format=ExportFormat.CSV)
 
         assert result.success is True
         assert result.records_exported == 1
 
-    def test_export_watchlist_empty(self, mock_session, temp_output_dir):
+    def test_export_watchlist_empty(self, db_session, temp_output_dir):
         """Test exporting empty watchlist."""
-        mock_execute = MagicMock()
-        mock_execute.scalars.return_value.all.return_value = []
-        mock_session.execute.return_value = mock_execute
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
-        result = service.export_watchlist(user_id=1, format=ExportFormat.CSV)
+        result = service.export_watchlist(user_id=2, format=ExportFormat.CSV)
 
         assert result.success is True
         assert result.records_exported == 0
@@ -509,29 +634,10 @@ class TestExportWatchlist:
 class TestExportAll:
     """Test export_all method."""
 
-    def test_export_all_excel(
-        self, mock_session, mock_position, mock_trade, mock_watchlist, temp_output_dir
-    ):
+    def test_export_all_excel(self, db_session, temp_output_dir):
         """Test exporting all data to Excel."""
-        # Setup mock to return data in order: account_ids, positions, trades, watchlist
-        mock_accounts = MagicMock()
-        mock_accounts.scalars.return_value.all.return_value = [1]
-        mock_positions = MagicMock()
-        mock_positions.scalars.return_value.all.return_value = [mock_position]
-        mock_trades = MagicMock()
-        mock_trades.scalars.return_value.all.return_value = [mock_trade]
-        mock_watchlists = MagicMock()
-        mock_watchlists.scalars.return_value.all.return_value = [mock_watchlist]
-
-        mock_session.execute.side_effect = [
-            mock_accounts,
-            mock_positions,
-            mock_trades,
-            mock_watchlists,
-        ]
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
         result = service.export_all(user_id=1, format=ExportFormat.EXCEL)
 
@@ -539,22 +645,596 @@ class TestExportAll:
         assert result.file_path.suffix == ".xlsx"
         assert result.records_exported == 3  # 1 position + 1 trade + 1 watchlist
 
-    def test_export_all_no_data(self, mock_session, temp_output_dir):
+    def test_export_all_no_data(self, db_session, temp_output_dir):
         """Test exporting when no data exists."""
-        mock_accounts = MagicMock()
-        mock_accounts.scalars.return_value.all.return_value = []  # No accounts
-        mock_watchlists = MagicMock()
-        mock_watchlists.scalars.return_value.all.return_value = []  # No watchlist
+        config = ExportConfig(output_dir=temp_output_dir)
+        service = ExportService(session=db_session, config=config)
+
+        result = service.export_all(user_id=2, format=ExportFormat.EXCEL)
+
+        assert result.success is True
+        assert result.records_exported == 0
+
+    def test_export_all_skips_account_lookup(self, db_session, temp_output_dir):
+        """Test export_all filters accounts in SQL: one query per sheet."""
+        from sqlalchemy import event
+
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            result = service.export_all(user_id=1, format=ExportFormat.EXCEL)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert result.records_exported == 3
+        assert len(statements) == 3
+        assert all("accounts" in sql for sql in statements[:2])
+
+    def test_export_all_loads_in_partitions(self, db_session, temp_output_dir):
+        """Test sheets fetched across several partitions keep every row."""
+        from db.models import WatchlistItem
+
+        db_session.add_all(
+            [
+                WatchlistItem(
+                    user_id=1,
+                    market="US",
+                    code=code,
+                    stock_name=code,
+                    is_active=True,
+                )
+                for code in ("AAPL", "MSFT", "NVDA")
+            ]
+        )
+        db_session.commit()
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        with patch("services.export_service.STREAM_CHUNK_SIZE", 2):
+            result = service.export_all(user_id=1, format=ExportFormat.EXCEL)
+
+        assert result.records_exported == 6
+        sheet = pd.read_excel(result.file_path, sheet_name="watchlist")
+        assert sorted(sheet["code"].astype(str)) == ["00700", "AAPL", "MSFT", "NVDA"]
+
+    def test_export_all_parallel_sessions(self, db_session, temp_output_dir):
+        """Test parallel loading opens its own sessions and keeps sheet order."""
+        from sqlalchemy.orm import sessionmaker
+
+        factory = sessionmaker(bind=db_session.get_bind())
+        service = ExportService(config=ExportConfig(output_dir=temp_output_dir))
+
+        with (
+            patch("services.export_service.SessionLocal", factory),
+            patch.object(ExportService, "_can_load_in_parallel", return_value=True),
+        ):
+            result = service.export_all(user_id=1, format=ExportFormat.EXCEL)
+
+        assert result.success is True
+        assert result.records_exported == 3
+        sheets = pd.read_excel(result.file_path, sheet_name=None)
+        assert list(sheets) == ["positions", "trades", "watchlist"]
 
-        mock_session.execute.side_effect = [mock_accounts, mock_watchlists]
+    def test_parallel_loading_guarded(self, db_session, temp_output_dir):
+        """Test injected sessions and SQLite keep export_all sequential."""
+        from sqlalchemy.orm import sessionmaker
 
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        injected = ExportService(session=db_session, config=config)
+        assert not injected._can_load_in_parallel()
 
-        result = service.export_all(user_id=1, format=ExportFormat.EXCEL)
+        factory = sessionmaker(bind=db_session.get_bind())
+        with patch("services.export_service.SessionLocal", factory):
+            assert not ExportService(config=config)._can_load_in_parallel()
+
+    def test_export_all_parquet(self, db_session, temp_output_dir):
+        """Test exporting all data to a directory of Parquet files."""
+        config = ExportConfig(output_dir=temp_output_dir)
+        service = ExportService(session=db_session, config=config)
+
+        result = service.export_all(
+            user_id=1, format=ExportFormat.PARQUET, filename="portfolio"
+        )
 
         assert result.success is True
-        assert result.records_exported == 0
+        assert result.file_path == temp_output_dir / "portfolio"
+        assert result.records_exported == 3
+        assert sorted(p.name for p in result.file_path.iterdir()) == [
+            "positions.parquet",
+            "trades.parquet",
+            "watchlist.parquet",
+        ]
+        assert result.file_size == sum(
+            p.stat().st_size for p in result.file_path.iterdir()
+        )
+
+
+class TestExcelWriter:
+    """Test Excel writer engine selection."""
+
+    def test_prefers_xlsxwriter(self, temp_output_dir):
+        """Test xlsxwriter is used and formula-like text stays literal."""
+        service = ExportService(config=ExportConfig(output_dir=temp_output_dir))
+        df = pd.DataFrame({"notes": ["=1+1", "http://example.com"]})
+
+        result = service._export_dataframe(df, ExportFormat.EXCEL, "notes")
+
+        assert result.success is True
+        with service._excel_writer(temp_output_dir / "probe.xlsx") as writer:
+            assert writer.engine == "xlsxwriter"
+            df.to_excel(writer, index=False)
+        back = pd.read_excel(result.file_path)
+        assert back["notes"].tolist() == ["=1+1", "http://example.com"]
+
+    def test_falls_back_to_openpyxl(self, temp_output_dir):
+        """Test openpyxl is used when xlsxwriter is not installed."""
+        service = ExportService(config=ExportConfig(output_dir=temp_output_dir))
+
+        file_path = temp_output_dir / "fallback.xlsx"
+
+        with patch.dict("sys.modules", {"xlsxwriter": None}):
+            with service._excel_writer(file_path) as writer:
+                assert writer.engine == "openpyxl"
+                pd.DataFrame({"a": [1]}).to_excel(writer, index=False)
+
+        assert pd.read_excel(file_path)["a"].tolist() == [1]
+
+
+class TestColumnarExport:
+    """Test Parquet and Feather exports."""
+
+    def test_klines_parquet(self, db_session, temp_output_dir):
+        """Test kline Parquet export keeps typed columns."""
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        result = service.export_klines(code="HK.00700", format=ExportFormat.PARQUET)
+
+        assert result.success is True
+        assert result.file_path.suffix == ".parquet"
+        df = pd.read_parquet(result.file_path)
+        assert len(df) == 1
+        assert df["close"].dtype == "float64"
+        assert df["volume"].dtype == "int64"
+        assert df["close"].iloc[0] == 380.0
+        assert df["market"].dtype == "category"
+
+    def test_trades_feather(self, db_session, temp_output_dir):
+        """Test trade Feather export round-trips."""
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        result = service.export_trades(user_id=1, format=ExportFormat.FEATHER)
+
+        assert result.success is True
+        assert result.file_path.suffix == ".feather"
+        df = pd.read_feather(result.file_path)
+        assert df["deal_id"].tolist() == ["D001"]
+        assert df["code"].dtype == "category"
+        assert df["currency"].tolist() == ["HKD"]
+        assert df["trade_time"].iloc[0] == pd.Timestamp("2024-01-10 14:30:00")
+
+
+class TestNdjsonExport:
+    """Test newline-delimited JSON exports."""
+
+    def test_lines_match_json_records(self, db_session, temp_output_dir):
+        """Test each line is one record identical to the JSON array entry."""
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        ndjson = service.export_positions(user_id=1, format=ExportFormat.NDJSON)
+        array = service.export_positions(user_id=1, format=ExportFormat.JSON)
+
+        assert ndjson.file_path.suffix == ".ndjson"
+        lines = ndjson.file_path.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == ndjson.records_exported == 1
+        with open(array.file_path, encoding="utf-8") as f:
+            assert [json.loads(line) for line in lines] == json.load(f)
+        assert "腾讯控股" in lines[0]
+
+    def test_stdlib_fallback_matches(self, db_session, temp_output_dir):
+        """Test the stdlib path writes the same lines as orjson."""
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        fast = service.export_klines(
+            code="HK.00700", format=ExportFormat.NDJSON, filename="fast"
+        )
+        with patch.dict("sys.modules", {"orjson": None}):
+            slow = service.export_klines(
+                code="HK.00700", format=ExportFormat.NDJSON, filename="slow"
+            )
+
+        assert fast.file_path.read_text() == slow.file_path.read_text()
+
+
+class TestExportCache:
+    """Test reuse of unchanged exports from the cache directory."""
+
+    @pytest.fixture
+    def service(self, db_session, temp_output_dir):
+        config = ExportConfig(
+            output_dir=temp_output_dir, cache_dir=temp_output_dir / "cache"
+        )
+        return ExportService(session=db_session, config=config)
+
+    def test_repeat_export_served_from_cache(self, service):
+        """Test an unchanged export is copied without re-running the query."""
+        first = service.export_trades(user_id=1, filename="a")
+
+        with patch.object(
+            service, "_iter_frames", side_effect=AssertionError("query ran")
+        ):
+            second = service.export_trades(user_id=1, filename="b")
+
+        assert second.success is True
+        assert second.records_exported == first.records_exported == 1
+        assert second.file_path.name == "b.csv"
+        assert second.file_path.read_bytes() == first.file_path.read_bytes()
+
+    def test_new_rows_invalidate(self, service, db_session):
+        """Test inserting a trade produces a fresh export."""
+        from db.models import Trade
+
+        service.export_trades(user_id=1, format=ExportFormat.JSON)
+        db_session.add(
+            Trade(
+                account_id=1,
+                deal_id="D002",
+                trade_time=datetime(2024, 1, 11, 10, 0, 0),
+                market="HK",
+                code="00700",
+                trd_side="SELL",
+                qty=Decimal("50"),
+                price=Decimal("360.0"),
+            )
+        )
+        db_session.commit()
+
+        result = service.export_trades(user_id=1, format=ExportFormat.JSON)
+
+        assert result.records_exported == 2
+
+    def test_updated_rows_invalidate(self, service, db_session):
+        """Test an in-place kline update (new updated_at) is not served stale."""
+        from db.models import Kline
+
+        service.export_klines(code="HK.00700", filename="before")
+        kline = db_session.query(Kline).first()
+        kline.close = Decimal("999.0")
+        db_session.commit()
+
+        result = service.export_klines(code="HK.00700", filename="after")
+
+        assert pd.read_csv(result.file_path)["close"].tolist() == [999.0]
+
+    def test_format_is_part_of_key(self, service):
+        """Test the same data in another format is exported, not reused."""
+        service.export_watchlist(user_id=1, format=ExportFormat.CSV)
+
+        result = service.export_watchlist(user_id=1, format=ExportFormat.NDJSON)
+
+        assert result.file_path.suffix == ".ndjson"
+        assert len(list(service.config.cache_dir.iterdir())) == 2
+
+
+class TestCompressedExport:
+    """Test on-the-fly compression of CSV and JSON exports."""
+
+    def test_csv_gzip(self, db_session, temp_output_dir):
+        """Test gzip CSV has a .csv.gz name and the same content."""
+        plain = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        ).export_trades(user_id=1, format=ExportFormat.CSV, filename="plain")
+        service = ExportService(
+            session=db_session,
+            config=ExportConfig(output_dir=temp_output_dir, compression="gzip"),
+        )
+
+        result = service.export_trades(user_id=1, format=ExportFormat.CSV)
+
+        assert result.success is True
+        assert result.file_path.name.endswith(".csv.gz")
+        assert result.file_size == result.file_path.stat().st_size
+        with gzip.open(result.file_path, "rt", encoding="utf-8") as f:
+            assert f.read() == plain.file_path.read_text(encoding="utf-8")
+
+    def test_json_zstd(self, db_session, temp_output_dir):
+        """Test zstd JSON decompresses to a valid record array."""
+        service = ExportService(
+            session=db_session,
+            config=ExportConfig(output_dir=temp_output_dir, compression="zstd"),
+        )
+
+        result = service.export_positions(user_id=1, format=ExportFormat.JSON)
+
+        assert result.file_path.name.endswith(".json.zst")
+        raw = pa.input_stream(str(result.file_path), compression="zstd").read()
+        assert json.loads(raw)[0]["code"] == "00700"
+
+    def test_sliced_csv_lz4(self, db_session, temp_output_dir):
+        """Test sliced CSV writes compress to the same text as plain ones."""
+        plain = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        ).export_klines(code="HK.00700", format=ExportFormat.CSV, filename="plain")
+        service = ExportService(
+            session=db_session,
+            config=ExportConfig(output_dir=temp_output_dir, compression="lz4"),
+        )
+
+        with patch("services.export_service.CSV_WRITE_CHUNK_ROWS", 1):
+            result = service.export_klines(code="HK.00700", format=ExportFormat.CSV)
+
+        assert result.file_path.name.endswith(".csv.lz4")
+        raw = pa.input_stream(str(result.file_path), compression="lz4").read()
+        assert raw.decode() == plain.file_path.read_text()
+
+    def test_excel_ignores_compression(self, db_session, temp_output_dir):
+        """Test formats with built-in compression keep their plain suffix."""
+        service = ExportService(
+            session=db_session,
+            config=ExportConfig(output_dir=temp_output_dir, compression="gzip"),
+        )
+
+        result = service.export_positions(user_id=1, format=ExportFormat.EXCEL)
+
+        assert result.file_path.suffix == ".xlsx"
+
+    def test_unsupported_compression(self, db_session, temp_output_dir):
+        """Test an unknown codec fails the export with a clear error."""
+        service = ExportService(
+            session=db_session,
+            config=ExportConfig(output_dir=temp_output_dir, compression="brotli"),
+        )
+
+        result = service.export_positions(user_id=1, format=ExportFormat.CSV)
+
+        assert result.success is False
+        assert "Unsupported compression" in result.error
+
+
+class TestStreamingExport:
+    """Test chunked streaming of query results to files."""
+
+    def _add_klines(self, db_session, days):
+        from db.models import Kline
+
+        db_session.add_all(
+            Kline(
+                market="HK",
+                code="00700",
+                trade_date=date(2024, 2, day),
+                open=Decimal("380"),
+                high=Decimal("385"),
+                low=Decimal("378"),
+                close=Decimal(380 + day),
+                volume=1000 * day,
+                ma5=Decimal("381") if day > 2 else None,
+            )
+            for day in days
+        )
+        db_session.commit()
+
+    def test_csv_written_across_chunks(self, db_session, temp_output_dir):
+        """Test multi-chunk CSV has one header and every row."""
+        self._add_klines(db_session, range(1, 6))
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        with patch("services.export_service.CURSOR_FETCH_ROWS", 2):
+            result = service.export_klines(code="HK.00700", format=ExportFormat.CSV)
+
+        assert result.records_exported == 6
+        df = pd.read_csv(result.file_path)
+        assert len(df) == 6
+        assert list(df["trade_date"]) == sorted(df["trade_date"])
+
+    def test_kline_csv_reads_raw_cursor(self, db_session, temp_output_dir):
+        """Test kline CSV bypasses row mappings and matches the JSON values."""
+        self._add_klines(db_session, range(1, 6))
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        with patch(
+            "services.export_service._iter_row_chunks",
+            side_effect=AssertionError("row mappings used"),
+        ):
+            result = service.export_klines(code="HK.00700", format=ExportFormat.CSV)
+        json_result = service.export_klines(code="HK.00700", format=ExportFormat.JSON)
+
+        csv_df = pd.read_csv(result.file_path, dtype={"code": str})
+        json_df = pd.read_json(json_result.file_path, dtype={"code": str})
+        assert csv_df["trade_date"].tolist() == [
+            str(d.date()) for d in pd.to_datetime(json_df["trade_date"])
+        ]
+        pd.testing.assert_frame_equal(
+            csv_df.drop(columns="trade_date"),
+            json_df.drop(columns="trade_date"),
+            check_dtype=False,
+        )
+
+    def test_kline_csv_streams_from_server_side_cursor(
+        self, db_session, temp_output_dir
+    ):
+        """Test the raw cursor query asks for stream_results and keeps every row."""
+        from sqlalchemy import event
+
+        self._add_klines(db_session, range(1, 6))
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        options = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if "FROM klines" in statement:
+                options.append(context.execution_options.get("stream_results"))
+
+        bind = db_session.get_bind()
+        event.listen(bind, "before_cursor_execute", record)
+        try:
+            with patch("services.export_service.CURSOR_FETCH_ROWS", 2):
+                result = service.export_klines(code="HK.00700", format=ExportFormat.CSV)
+        finally:
+            event.remove(bind, "before_cursor_execute", record)
+
+        assert options and all(options)
+        assert len(pd.read_csv(result.file_path)) == 6
+
+    def test_large_csv_keeps_pandas_formatting(self, db_session, temp_output_dir):
+        """Test a multi-chunk CSV is formatted like a small one."""
+        self._add_klines(db_session, range(1, 6))
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        with (
+            patch("services.export_service.CURSOR_FETCH_ROWS", 2),
+            patch("services.export_service.CSV_WRITE_CHUNK_ROWS", 1),
+        ):
+            result = service.export_klines(code="HK.00700", format=ExportFormat.CSV)
+
+        assert result.records_exported == 6
+        text = result.file_path.read_text()
+        assert text.startswith("trade_date,market,code")
+        assert ",380.0," in text
+        df = pd.read_csv(result.file_path, dtype={"code": str})
+        assert len(df) == 6
+        assert df["code"].unique().tolist() == ["00700"]
+        assert df["close"].tolist() == [380.0, 381.0, 382.0, 383.0, 384.0, 385.0]
+        assert df["ma5"].isna().sum() == 2
+
+    def test_csv_uses_pandas_formatting(self, db_session, temp_output_dir):
+        """Test CSV keeps pandas' unquoted text and ``True``/``False``."""
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        result = service.export_watchlist(user_id=1, format=ExportFormat.CSV)
+
+        lines = result.file_path.read_text(encoding="utf-8").splitlines()
+        assert lines[0].startswith("id,market,code")
+        assert lines[1].endswith(",True,2024-01-01 09:00:00")
+
+    def test_large_dataframe_written_in_slices(self, temp_output_dir):
+        """Test a single large DataFrame is sliced without changing the CSV."""
+        service = ExportService(config=ExportConfig(output_dir=temp_output_dir))
+        df = pd.DataFrame({"code": [f"0070{i}" for i in range(5)], "qty": range(5)})
+
+        with patch("services.export_service.CSV_WRITE_CHUNK_ROWS", 2):
+            result = service._export_dataframe(df, ExportFormat.CSV, "sliced")
+
+        assert result.records_exported == 5
+        assert result.file_path.read_text() == df.to_csv(index=False)
+
+    def test_json_written_across_chunks(self, db_session, temp_output_dir):
+        """Test multi-chunk JSON is a single valid array with nulls for gaps."""
+        self._add_klines(db_session, range(1, 6))
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        with patch("services.export_service.STREAM_CHUNK_SIZE", 2):
+            result = service.export_klines(code="HK.00700", format=ExportFormat.JSON)
+
+        with open(result.file_path) as f:
+            data = json.load(f)
+        assert len(data) == result.records_exported == 6
+        assert data[1]["ma5"] is None
+        assert data[-1]["ma5"] == 381.0
+
+    def test_json_matches_single_dump(self, db_session, temp_output_dir):
+        """Test streamed JSON is byte-identical to json.dump of all records."""
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        result = service.export_trades(user_id=1, format=ExportFormat.JSON)
+
+        with open(result.file_path, encoding="utf-8") as f:
+            text = f.read()
+        assert text == json.dumps(json.loads(text), ensure_ascii=False, indent=2)
+
+    def test_json_stdlib_fallback_matches(self, db_session, temp_output_dir):
+        """Test the stdlib JSON path writes the same file as orjson."""
+        self._add_klines(db_session, range(1, 6))
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        with patch("services.export_service.STREAM_CHUNK_SIZE", 2):
+            fast = service.export_klines(
+                code="HK.00700", format=ExportFormat.JSON, filename="fast"
+            )
+            with patch.dict("sys.modules", {"orjson": None}):
+                slow = service.export_klines(
+                    code="HK.00700", format=ExportFormat.JSON, filename="slow"
+                )
+
+        assert fast.records_exported == slow.records_exported == 6
+        assert fast.file_path.read_text() == slow.file_path.read_text()
+
+    def test_kline_limit_keeps_latest_ascending(self, db_session, temp_output_dir):
+        """Test limit selects the newest rows and exports them oldest first."""
+        self._add_klines(db_session, range(1, 6))
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        result = service.export_klines(
+            code="HK.00700", format=ExportFormat.CSV, limit=3
+        )
+
+        df = pd.read_csv(result.file_path)
+        assert list(df["trade_date"]) == ["2024-02-03", "2024-02-04", "2024-02-05"]
+
+    def test_numeric_columns_coerced(self, db_session, temp_output_dir):
+        """Test NULL numerics become 0 while zero moving averages stay empty."""
+        from db.models import Kline
+
+        db_session.add(
+            Kline(
+                market="HK",
+                code="09988",
+                trade_date=date(2024, 2, 1),
+                open=Decimal("80.5"),
+                high=Decimal("81"),
+                low=Decimal("80"),
+                close=Decimal("80.8"),
+                volume=None,
+                ma5=Decimal("0"),
+            )
+        )
+        db_session.commit()
+        service = ExportService(
+            session=db_session, config=ExportConfig(output_dir=temp_output_dir)
+        )
+
+        result = service.export_klines(code="HK.09988", format=ExportFormat.JSON)
+
+        with open(result.file_path) as f:
+            (record,) = json.load(f)
+        assert record["open"] == 80.5
+        assert record["volume"] == 0
+        assert record["amount"] == 0.0
+        assert record["ma5"] is None
+        assert record["ma60"] is None
 
 
 # ============================================================================
@@ -562,6 +1242,73 @@ class TestExportAll:
 # ============================================================================
 
 
+class TestFrameFromRows:
+    """Test column-wise DataFrame construction from rows."""
+
+    def test_decimals_and_nulls(self):
+        """Test Decimal values convert and NULLs become zero."""
+        rows = [
+            {"code": "00700", "qty": Decimal("100"), "pl_ratio": Decimal("0.05")},
+            {"code": "09988", "qty": None, "pl_ratio": None},
+        ]
+
+        df = _frame_from_rows(rows, float_columns=POSITION_NUM_COLS)
+
+        assert list(df.columns) == ["code", "qty", "pl_ratio"]
+        assert df["qty"].dtype == "float64"
+        assert df["qty"].tolist() == [100.0, 0.0]
+        assert df["pl_ratio"].tolist() == [0.05, 0.0]
+
+    def test_int_and_nullable_columns(self):
+        """Test int columns fill with 0 and nullable columns drop zeros."""
+        rows = [
+            {"volume": None, "ma5": Decimal("0")},
+            {"volume": 5, "ma5": Decimal("2")},
+        ]
+
+        df = _frame_from_rows(rows, int_columns=("volume",), nullable_columns=("ma5",))
+
+        assert df["volume"].tolist() == [0, 5]
+        assert df["volume"].dtype == "int64"
+        assert pd.isna(df["ma5"].iloc[0])
+        assert df["ma5"].iloc[1] == 2.0
+
+    def test_datetime_columns_declared(self):
+        """Test timestamp columns are datetime64 even when all NULL."""
+        rows = [{"trade_time": None, "created_at": datetime(2024, 1, 15, 10, 30)}]
+
+        df = _frame_from_rows(rows)
+
+        assert df["trade_time"].dtype == "datetime64[us]"
+        assert df["trade_time"].isna().all()
+        assert df["created_at"].iloc[0] == pd.Timestamp("2024-01-15 10:30")
+
+    def test_from_cursor_columns(self):
+        """Test raw DB-API column tuples convert like row mappings."""
+        columns = {
+            "trade_date": ("2024-01-02", "2024-01-03"),
+            "close": (380, 381.5),
+            "volume": (None, 7),
+            "ma5": (0, 2.5),
+        }
+
+        df = _frame_from_columns(
+            columns,
+            float_columns=("close",),
+            int_columns=("volume",),
+            nullable_columns=("ma5",),
+        )
+
+        assert df["trade_date"].tolist() == ["2024-01-02", "2024-01-03"]
+        assert df["close"].tolist() == [380.0, 381.5]
+        assert df["volume"].tolist() == [0, 7]
+        assert pd.isna(df["ma5"].iloc[0])
+
+    def test_empty_rows(self):
+        """Test no rows gives an empty DataFrame."""
+        assert _frame_from_rows([]).empty
+
+
 class TestCreateExportService:
     """Test create_export_service factory function."""
 
@@ -693,16 +1440,10 @@ class TestIntegration:
         assert ExportFormat is not None
         assert create_export_service is not None
 
-    def test_export_csv_content_format(self, mock_session, mock_position, temp_output_dir):
+    def test_export_csv_content_format(self, db_session, temp_output_dir):
         """Test CSV content format."""
-        mock_accounts = MagicMock()
-        mock_accounts.scalars.return_value.all.return_value = [1]
-        mock_positions = MagicMock()
-        mock_positions.scalars.return_value.all.return_value = [mock_position]
-        mock_session.execute.side_effect = [mock_accounts, mock_positions]
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
         result = service.export_positions(user_id=1, format=ExportFormat.CSV)
 
@@ -715,16 +1456,10 @@ class TestIntegration:
         ]
         assert list(df.columns) == expected_columns
 
-    def test_export_json_content_format(self, mock_session, mock_position, temp_output_dir):
+    def test_export_json_content_format(self, db_session, temp_output_dir):
         """Test JSON content format."""
-        mock_accounts = MagicMock()
-        mock_accounts.scalars.return_value.all.return_value = [1]
-        mock_positions = MagicMock()
-        mock_positions.scalars.return_value.all.return_value = [mock_position]
-        mock_session.execute.side_effect = [mock_accounts, mock_positions]
-
         config = ExportConfig(output_dir=temp_output_dir)
-        service = ExportService(session=mock_session, config=config)
+        service = ExportService(session=db_session, config=config)
 
         result = service.export_positions(user_id=1, format=ExportFormat.JSON)
 
@@ -737,3 +1472,17 @@ class TestIntegration:
         assert "market" in data[0]
         assert "code" in data[0]
         assert "stock_name" in data[0]
+
+    def test_json_leaves_source_frame_untouched(self, temp_output_dir):
+        """Test datetime formatting for JSON does not mutate the caller's frame."""
+        service = ExportService(config=ExportConfig(output_dir=temp_output_dir))
+        df = pd.DataFrame(
+            {"code": ["00700"], "created_at": [pd.Timestamp("2024-01-01 09:00:00")]}
+        )
+
+        result = service._export_dataframe(df, ExportFormat.JSON, "frame")
+
+        with open(result.file_path) as f:
+            data = json.load(f)
+        assert data[0]["created_at"] == "2024-01-01 09:00:00"
+        assert pd.api.types.is_datetime64_any_dtype(df["created_at"])
@@ -512,7 +512,7 @@ class TestImportTradesMocked:
         )
 
         mock_session = MagicMock()
-        mock_session.query.return_value.filter_by.return_value.first.return_value = None
+        mock_session.query.return_value.scalar.return_value = False
         mock_get_session.return_value.__enter__.return_value = mock_session
 
         result = import_trades(1, csv_path)
@@ -528,7 +528,7 @@ class TestImportTradesMocked:
         csv_path.write_text("code,qty,price,side\nHK.00700,100,350.00,BUY\n")
 
         mock_session = MagicMock()
-        mock_session.query.return_value.filter_by.return_value.first.return_value = None
+        mock_session.query.return_value.scalar.return_value = False
         mock_get_session.return_value.__enter__.return_value = mock_session
 
         result = import_trades(1, csv_path)
@@ -543,7 +543,7 @@ class TestImportTradesMocked:
         csv_path.write_text("code,qty,price,side\nHK.00700,100,350.00,买入\n")
 
         mock_session = MagicMock()
-        mock_session.query.return_value.filter_by.return_value.first.return_value = None
+        mock_session.query.return_value.scalar.return_value = False
         mock_get_session.return_value.__enter__.return_value = mock_session
 
         result = import_trades(1, csv_path)
@@ -551,6 +551,24 @@ class TestImportTradesMocked:
         assert result.success is True
         assert result.imported == 1
 
+    @patch("scripts.import_csv.get_session")
+    def test_import_skips_existing_trades(self, mock_get_session, tmp_path):
+        """Test trades whose deal_id already exists are skipped."""
+        csv_path = tmp_path / "trades.csv"
+        csv_path.write_text("deal_id,code,qty,price,side\nD1,HK.00700,100,350.00,BUY\n")
+
+        mock_session = MagicMock()
+        mock_session.query.return_value.scalar.return_value = True
+        mock_get_session.return_value.__enter__.return_value = mock_session
+
+        result = import_trades(1, csv_path)
+
+        assert result.success is True
+        assert result.imported == 0
+        assert result.skipped == 1
+        mock_session.query.return_value.filter_by.return_value.first.assert_not_called()
+        mock_session.add.assert_not_called()
+
 
 class TestEncodingSupport:
     """Tests for encoding support."""
@@ -509,6 +509,20 @@ class TestOBV:
         assert result.name == "OBV"
         assert isinstance(result.values, pd.Series)
 
+    def test_obv_matches_masked_assignment(self, sample_ohlcv_df):
+        """Test vectorized OBV equals the up/down/flat masked assignment."""
+        close = sample_ohlcv_df["close"].round(0)  # force some flat bars
+        volume = sample_ohlcv_df["volume"]
+        diff = close.diff()
+        expected = pd.Series(index=close.index, dtype=float)
+        expected[diff > 0] = volume[diff > 0]
+        expected[diff < 0] = -volume[diff < 0]
+        expected[diff == 0] = 0
+        expected.iloc[0] = volume.iloc[0]
+
+        assert (diff == 0).any()
+        pd.testing.assert_series_equal(calculate_obv(close, volume), expected.cumsum())
+
     def test_obv_with_signal(self, sample_ohlcv_df):
         """Test OBV with signal line."""
         obv = OBV(signal_period=20)
@@ -544,6 +558,25 @@ class TestOBVDivergence:
         assert "OBV" in result.values.columns
         assert "divergence" in result.values.columns
 
+    def test_calculate_tail_matches_full_history(self, sample_ohlcv_df):
+        """Test tail detection gives the full calculation's recent signals."""
+        divergence = OBVDivergence(lookback=14)
+        full = divergence.calculate(sample_ohlcv_df).values["divergence"]
+
+        for tail in (1, 10, 80):
+            result = divergence.calculate_tail(sample_ohlcv_df, tail=tail)
+            pd.testing.assert_series_equal(
+                result.values["divergence"], full.iloc[-tail:]
+            )
+            assert result.params["tail"] == tail
+
+        assert (full.iloc[-80:] != 0).any()
+
+    def test_calculate_tail_invalid(self, sample_ohlcv_df):
+        """Test tail must be a positive integer."""
+        with pytest.raises(ValueError):
+            OBVDivergence().calculate_tail(sample_ohlcv_df, tail=0)
+
 
 class TestOBVConvenience:
     """Tests for OBV convenience function."""
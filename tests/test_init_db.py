@@ -8,7 +8,7 @@ from click.testing import CliRunner
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
 
-from init_db import cli, get_db_name_from_url, get_server_url
+from init_db import cli, get_db_name_from_url, get_migration_files, get_server_url
 
 
 class TestHelperFunctions:
@@ -36,6 +36,15 @@ class TestHelperFunctions:
         server_url = get_server_url(url)
         assert server_url == "postgresql://localhost/postgres"
 
+    def test_get_migration_files(self):
+        """Test migrations are numbered files in order, excluding the schema."""
+        files = get_migration_files()
+        names = [f.name for f in files]
+
+        assert names == sorted(names)
+        assert "001_name_sync_unique_constraints.sql" in names
+        assert "init_schema.sql" not in names
+
 
 class TestCLI:
     """Tests for CLI commands."""
@@ -91,3 +100,10 @@ class TestCLI:
         assert result.exit_code == 0
         assert "Add sample seed data" in result.output
         assert "--user" in result.output
+
+    def test_migrate_help(self):
+        """Test migrate command help."""
+        runner = CliRunner()
+        result = runner.invoke(cli, ["migrate", "--help"])
+        assert result.exit_code == 0
+        assert "Apply SQL migrations" in result.output
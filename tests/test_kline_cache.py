@@ -0,0 +1,76 @@
+"""Tests for KlineCache."""
+
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from services.kline_cache import KlineCache
+
+
+@pytest.fixture
+def sample_df():
+    """Small K-line DataFrame."""
+    return pd.DataFrame(
+        {
+            "trade_date": pd.date_range("2024-01-01", periods=3),
+            "open": [100.0, 101.0, 102.0],
+            "high": [105.0, 106.0, 107.0],
+            "low": [95.0, 96.0, 97.0],
+            "close": [102.0, 103.0, 104.0],
+            "volume": [1000, 2000, 3000],
+        }
+    )
+
+
+class TestKlineCache:
+    """Tests for KlineCache class."""
+
+    def test_miss_returns_none(self, tmp_path):
+        """Test get on an empty cache."""
+        cache = KlineCache(cache_dir=tmp_path)
+        assert cache.get("HK.00700", 120) is None
+
+    def test_set_then_get(self, tmp_path, sample_df):
+        """Test a stored DataFrame round-trips."""
+        cache = KlineCache(cache_dir=tmp_path)
+        cache.set("HK.00700", 120, sample_df)
+
+        cached = cache.get("HK.00700", 120)
+        pd.testing.assert_frame_equal(cached, sample_df)
+
+    def test_key_includes_days(self, tmp_path, sample_df):
+        """Test entries for different day counts are separate."""
+        cache = KlineCache(cache_dir=tmp_path)
+        cache.set("HK.00700", 120, sample_df)
+        assert cache.get("HK.00700", 60) is None
+
+    def test_expired_entry(self, tmp_path, sample_df):
+        """Test entries older than the TTL are ignored."""
+        cache = KlineCache(cache_dir=tmp_path, ttl_hours=1)
+        cache.set("HK.00700", 120, sample_df)
+
+        path = cache._path("HK.00700", 120)
+        old = time.time() - 2 * 3600
+        os.utime(path, (old, old))
+
+        assert cache.get("HK.00700", 120) is None
+
+    def test_corrupt_entry_is_discarded(self, tmp_path):
+        """Test an unreadable entry is removed and treated as a miss."""
+        cache = KlineCache(cache_dir=tmp_path)
+        path = cache._path("HK.00700", 120)
+        path.write_bytes(b"not a pickle")
+
+        assert cache.get("HK.00700", 120) is None
+        assert not path.exists()
+
+    def test_clear(self, tmp_path, sample_df):
+        """Test clearing removes all entries."""
+        cache = KlineCache(cache_dir=tmp_path)
+        cache.set("HK.00700", 120, sample_df)
+        cache.set("US.NVDA", 120, sample_df)
+
+        assert cache.clear() == 2
+        assert cache.get("HK.00700", 120) is None
@@ -416,6 +416,25 @@ class TestKlineFetcherWithMock:
         assert results["HK.00700"].success is True
         assert results["US.NVDA"].success is True
 
+    def test_fetch_batch_dedupes_codes(self):
+        """Test batch fetching requests each unique code once, in order."""
+        fetcher = KlineFetcher()
+        fetcher.fetch = MagicMock(side_effect=lambda code, **kwargs: code)
+
+        results = fetcher.fetch_batch(["US.NVDA", "HK.00700", "US.NVDA"], days=5)
+
+        assert list(results) == ["US.NVDA", "HK.00700"]
+        assert fetcher.fetch.call_count == 2
+
+    def test_fetch_batch_sequential(self):
+        """Test batch fetching with a single worker."""
+        fetcher = KlineFetcher()
+        fetcher.fetch = MagicMock(side_effect=lambda code, **kwargs: code)
+
+        results = fetcher.fetch_batch(["HK.00700", "US.NVDA"], max_workers=1)
+
+        assert results == {"HK.00700": "HK.00700", "US.NVDA": "US.NVDA"}
+
     @patch("fetchers.kline_fetcher.ak")
     def test_fetch_with_date_range(self, mock_ak):
         """Test fetching with explicit date range."""
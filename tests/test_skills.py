@@ -366,6 +366,84 @@ class TestDataProvider:
         provider.clear_cache()
         assert provider._cache == {}
 
+    def test_get_klines_bulk_single_query(self):
+        """Test bulk K-line load groups rows per stock and serves the cache."""
+        today = date.today()
+        rows = [
+            MagicMock(
+                market=market,
+                code=code,
+                trade_date=today - timedelta(days=offset),
+                open=Decimal("10"),
+                high=Decimal("11"),
+                low=Decimal("9"),
+                close=Decimal(str(10 + offset)),
+                volume=1000,
+                amount=None,
+            )
+            for market, code in [("HK", "00700"), ("A", "600519")]
+            for offset in (1, 0)
+        ]
+        session = MagicMock()
+        chain = session.query.return_value.filter.return_value
+        chain.order_by.return_value.all.return_value = rows
+        provider = DataProvider()
+
+        with patch("skills.shared.data_provider.get_session") as mock_get_session:
+            mock_get_session.return_value.__enter__.return_value = session
+            frames = provider.get_klines_bulk(
+                [("HK", "00700"), ("SH", "600519"), ("US", "NVDA")], days=30
+            )
+            again = provider.get_klines_bulk([("HK", "00700")], days=30)
+
+        assert session.query.call_count == 1
+        assert list(frames) == ["HK.00700", "SH.600519", "US.NVDA"]
+        assert list(frames["HK.00700"]["Close"]) == [11.0, 10.0]
+        assert len(frames["SH.600519"]) == 2
+        assert frames["US.NVDA"].empty
+        assert again["HK.00700"].equals(frames["HK.00700"])
+
+    def _klines(self, count=3):
+        """Build ascending KlineData rows for conversion tests."""
+        start = date(2024, 1, 1)
+        return [
+            KlineData(
+                market="HK",
+                code="00700",
+                trade_date=start + timedelta(days=i),
+                open=Decimal("10.5"),
+                high=Decimal("11"),
+                low=Decimal("9.5"),
+                close=Decimal(str(10 + i)),
+                volume=1000 + i,
+                amount=Decimal("12345.6"),
+            )
+            for i in range(count)
+        ]
+
+    def test_klines_to_df_matches_row_construction(self):
+        """Test block-built DataFrame equals the per-row dict construction."""
+        klines = self._klines()
+        expected = pd.DataFrame(
+            [
+                {
+                    "Date": k.trade_date,
+                    "Open": float(k.open),
+                    "High": float(k.high),
+                    "Low": float(k.low),
+                    "Close": float(k.close),
+                    "Volume": float(k.volume),
+                    "Amount": float(k.amount),
+                }
+                for k in klines
+            ]
+        )
+        expected["Date"] = pd.to_datetime(expected["Date"])
+        expected.set_index("Date", inplace=True)
+
+        pd.testing.assert_frame_equal(DataProvider._klines_to_df(klines), expected)
+        assert DataProvider._klines_to_df([]).empty
+
     def test_is_individual_stock_a_share(self):
         """Test A-share individual stock detection."""
         provider = DataProvider()
@@ -15,6 +15,28 @@ from fetchers.kline_fetcher import KlineData, KlineFetchResult
 from services import SyncResult, SyncService, create_sync_service
 
 
+@pytest.fixture
+def db_session():
+    """In-memory SQLite session with one user and one Futu account."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from db.models import Account, Base, User
+
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, username="tester"))
+    session.add(
+        Account(id=1, user_id=1, futu_acc_id=123456, account_type="REAL", market="HK")
+    )
+    session.commit()
+
+    yield session
+
+    session.close()
+
+
 class TestSyncResult:
     """Tests for SyncResult dataclass."""
 
@@ -50,6 +72,14 @@ class TestSyncResult:
         assert result.duration_seconds == 0.0
         assert result.details == {}
 
+    def test_result_uses_slots(self):
+        """Test SyncResult instances carry no per-instance __dict__."""
+        result = SyncResult.ok("KLINES", records_synced=1)
+
+        assert not hasattr(result, "__dict__")
+        with pytest.raises(AttributeError):
+            result.unknown_field = 1
+
 
 class TestSyncServiceInit:
     """Tests for SyncService initialization."""
@@ -162,6 +192,48 @@ class TestSyncServicePositions:
         assert result.sync_type == "POSITIONS"
         assert result.records_synced >= 0
 
+    @patch("services.sync_service.get_session")
+    def test_sync_positions_single_upsert(self, mock_get_session):
+        """Test all positions of an account are written by one upsert."""
+        from sqlalchemy.dialects import postgresql
+        from sqlalchemy.sql.dml import Insert
+
+        mock_session = MagicMock()
+        mock_account = MagicMock()
+        mock_account.id = 1
+        mock_account.futu_acc_id = 123456
+        mock_session.scalars.return_value.all.return_value = [mock_account]
+        # 00700 is already stored for today, 09988 is new
+        mock_session.execute.return_value.tuples.return_value = [("HK", "00700")]
+        mock_get_session.return_value.__enter__ = MagicMock(return_value=mock_session)
+        mock_get_session.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_futu = MagicMock()
+        mock_futu.get_positions.return_value = FetchResult.ok(
+            [
+                PositionInfo(
+                    market=Market.HK, code=code, stock_name=code, qty=Decimal("100")
+                )
+                for code in ("00700", "09988")
+            ]
+        )
+        mock_futu.get_account_info.return_value = FetchResult.ok([])
+
+        service = SyncService(futu_fetcher=mock_futu)
+        result = service.sync_positions(user_id=1)
+
+        assert result.records_synced == 1
+        assert result.records_skipped == 1
+        upserts = [
+            c.args[0]
+            for c in mock_session.execute.call_args_list
+            if isinstance(c.args[0], Insert)
+        ]
+        assert len(upserts) == 1
+        sql = str(upserts[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT ON CONSTRAINT uq_positions_account_date_code" in sql
+        mock_session.add.assert_called_once()  # only the sync log
+
 
 class TestSyncServiceTrades:
     """Tests for sync_trades method."""
@@ -226,6 +298,56 @@ class TestSyncServiceTrades:
         assert result.success is True
         assert result.sync_type == "TRADES"
 
+    @patch("services.sync_service.get_session")
+    def test_sync_trades_batches_lookup_and_insert(self, mock_get_session):
+        """Test one deal_id lookup and one insert per account."""
+        from sqlalchemy.dialects import postgresql
+
+        mock_session = MagicMock()
+        mock_account = MagicMock()
+        mock_account.id = 1
+        mock_account.futu_acc_id = 123456
+        accounts, stored_ids = MagicMock(), MagicMock()
+        accounts.all.return_value = [mock_account]
+        stored_ids.all.return_value = ["DEAL001"]
+        mock_session.scalars.side_effect = [accounts, stored_ids]
+        mock_get_session.return_value.__enter__ = MagicMock(return_value=mock_session)
+        mock_get_session.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_futu = MagicMock()
+        mock_futu.get_history_deals.return_value = FetchResult.ok(
+            [
+                TradeInfo(
+                    deal_id=deal_id,
+                    market=Market.HK,
+                    code="00700",
+                    stock_name="腾讯控股",
+                    trd_side=TradeSide.BUY,
+                    qty=Decimal("100"),
+                    price=Decimal("350.00"),
+                    trade_time=datetime(2025, 12, 14, 10, 30, 0),
+                )
+                for deal_id in ("DEAL001", "DEAL002", "DEAL002", "DEAL003")
+            ]
+        )
+
+        service = SyncService(futu_fetcher=mock_futu)
+        result = service.sync_trades(user_id=1, days=30)
+
+        assert result.records_synced == 2
+        assert result.records_skipped == 2
+        assert mock_session.scalars.call_count == 2
+        mock_session.execute.assert_called_once()
+        stmt = mock_session.execute.call_args.args[0]
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        assert "ON CONFLICT ON CONSTRAINT uq_trades_account_deal DO NOTHING" in str(
+            compiled
+        )
+        assert {v for k, v in compiled.params.items() if k.startswith("deal_id")} == {
+            "DEAL002",
+            "DEAL003",
+        }
+
 
 class TestSyncServiceKlines:
     """Tests for sync_klines method."""
@@ -315,6 +437,121 @@ class TestSyncServiceKlines:
         assert result.success is True
         assert mock_kline.fetch.call_count == 2
 
+    @patch("services.sync_service.get_session")
+    def test_sync_klines_fetches_concurrently(self, mock_get_session):
+        """Test codes are fetched in parallel and reported in input order."""
+        import threading
+
+        mock_session = MagicMock()
+        mock_get_session.return_value.__enter__ = MagicMock(return_value=mock_session)
+        mock_get_session.return_value.__exit__ = MagicMock(return_value=False)
+
+        # Each fetch waits for the other: a serial loop would time out here
+        barrier = threading.Barrier(2, timeout=5)
+
+        def mock_fetch(code, **kwargs):
+            barrier.wait()
+            return KlineFetchResult.error(f"no data for {code}")
+
+        mock_kline = MagicMock()
+        mock_kline.fetch.side_effect = mock_fetch
+
+        service = SyncService(kline_fetcher=mock_kline)
+        result = service.sync_klines(codes=["US.NVDA", "HK.00700"], days=5)
+
+        assert list(result.details["codes"]) == ["US.NVDA", "HK.00700"]
+        assert mock_session.execute.call_count == 0
+
+    @patch("services.sync_service.KLINE_UPSERT_CHUNK", 2)
+    @patch("services.sync_service.get_session")
+    def test_sync_klines_chunked_upsert(self, mock_get_session):
+        """Test K-lines are upserted in chunks and counted per code."""
+        from sqlalchemy.dialects import postgresql
+
+        mock_session = MagicMock()
+        # RETURNING market, code, inserted for each chunk
+        mock_session.execute.return_value.tuples.side_effect = [
+            [("HK", "00700", True), ("HK", "00700", False)],
+            [("US", "NVDA", True)],
+        ]
+        mock_get_session.return_value.__enter__ = MagicMock(return_value=mock_session)
+        mock_get_session.return_value.__exit__ = MagicMock(return_value=False)
+
+        def mock_fetch(code, **kwargs):
+            market, stock_code = code.split(".")
+            days = (14, 15) if market == "HK" else (15,)
+            return KlineFetchResult.ok_with_df(
+                [
+                    KlineData(
+                        market=Market(market),
+                        code=stock_code,
+                        trade_date=date(2025, 12, day),
+                        open=Decimal("100"),
+                        high=Decimal("110"),
+                        low=Decimal("95"),
+                        close=Decimal("105"),
+                    )
+                    for day in days
+                ],
+                MagicMock(),
+            )
+
+        mock_kline = MagicMock()
+        mock_kline.fetch.side_effect = mock_fetch
+
+        service = SyncService(kline_fetcher=mock_kline)
+        result = service.sync_klines(codes=["HK.00700", "US.NVDA"], days=5)
+
+        assert mock_session.execute.call_count == 2
+        sql = str(
+            mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+        )
+        assert "ON CONFLICT ON CONSTRAINT uq_klines_market_code_date" in sql
+        assert "updated_at" in sql
+        assert result.records_synced == 2
+        assert result.records_skipped == 1
+        assert result.details["codes"]["HK.00700"] == {"synced": 1, "updated": 1}
+        mock_session.scalars.assert_not_called()
+
+    @patch("services.sync_service.get_session")
+    def test_sync_klines_skips_unchanged_bars(self, mock_get_session):
+        """Test unchanged stored bars are not rewritten but still counted."""
+        from sqlalchemy.dialects import postgresql
+
+        mock_session = MagicMock()
+        # Only the new bar comes back; the two stored bars are unchanged
+        mock_session.execute.return_value.tuples.return_value = [("HK", "00700", True)]
+        mock_get_session.return_value.__enter__ = MagicMock(return_value=mock_session)
+        mock_get_session.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_kline = MagicMock()
+        mock_kline.fetch.return_value = KlineFetchResult.ok_with_df(
+            [
+                KlineData(
+                    market=Market.HK,
+                    code="00700",
+                    trade_date=date(2025, 12, day),
+                    open=Decimal("100"),
+                    high=Decimal("110"),
+                    low=Decimal("95"),
+                    close=Decimal("105"),
+                )
+                for day in (12, 13, 14)
+            ],
+            MagicMock(),
+        )
+
+        service = SyncService(kline_fetcher=mock_kline)
+        result = service.sync_klines(codes=["HK.00700"], days=5)
+
+        sql = str(
+            mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+        )
+        assert "klines.close IS DISTINCT FROM excluded.close" in sql
+        assert result.records_synced == 1
+        assert result.records_skipped == 2
+        assert result.details["codes"]["HK.00700"] == {"synced": 1, "updated": 2}
+
 
 class TestSyncServiceWatchlist:
     """Tests for sync_watchlist_klines method."""
@@ -323,10 +560,8 @@ class TestSyncServiceWatchlist:
     def test_sync_watchlist_klines(self, mock_get_session):
         """Test syncing K-lines for watchlist."""
         mock_session = MagicMock()
-        mock_watchlist_item = MagicMock()
-        mock_watchlist_item.full_code = "HK.00700"
-        mock_session.scalars.return_value.all.return_value = [mock_watchlist_item]
-        mock_session.scalars.return_value.first.return_value = None
+        # (market, code) projection of the active watchlist
+        mock_session.execute.return_value.all.return_value = [("HK", "00700")]
         mock_get_session.return_value.__enter__ = MagicMock(return_value=mock_session)
         mock_get_session.return_value.__exit__ = MagicMock(return_value=False)
 
@@ -338,6 +573,143 @@ class TestSyncServiceWatchlist:
 
         assert result.success is True
         assert result.sync_type == "KLINES"
+        assert mock_kline.fetch.call_args.kwargs["code"] == "HK.00700"
+
+
+class TestSyncServiceWatchlistItems:
+    """Tests for sync_watchlist against a real database."""
+
+    def test_inserts_reactivates_and_deactivates(self, db_session):
+        """Test new items are bulk inserted once and removed ones soft-deleted."""
+        from db.models import WatchlistItem
+        from fetchers.base import WatchlistInfo
+
+        db_session.add_all(
+            [
+                WatchlistItem(user_id=1, market="HK", code="00700", is_active=False),
+                WatchlistItem(user_id=1, market="US", code="AAPL", is_active=True),
+            ]
+        )
+        db_session.commit()
+
+        mock_futu = MagicMock()
+        mock_futu.get_watchlist.return_value = FetchResult.ok(
+            [
+                WatchlistInfo(Market.HK, "00700", "腾讯控股", "港股"),
+                WatchlistInfo(Market.US, "NVDA", "NVIDIA", "全部"),
+                WatchlistInfo(Market.US, "NVDA", "NVIDIA", "美股"),
+            ]
+        )
+
+        service = SyncService(futu_fetcher=mock_futu)
+        result = service.sync_watchlist(user_id=1, session=db_session)
+
+        assert result.records_synced == 1
+        assert result.records_skipped == 1
+        assert result.details["reactivated"] == 1
+        assert result.details["deactivated"] == 1
+        items = {
+            item.code: item.is_active for item in db_session.query(WatchlistItem).all()
+        }
+        assert items == {"00700": True, "AAPL": False, "NVDA": True}
+
+    def test_reactivates_once_when_listed_in_several_groups(self, db_session):
+        """Test an inactive item in two Futu groups is reactivated once."""
+        from db.models import WatchlistItem
+        from fetchers.base import WatchlistInfo
+
+        db_session.add(
+            WatchlistItem(user_id=1, market="HK", code="00700", is_active=False)
+        )
+        db_session.commit()
+
+        mock_futu = MagicMock()
+        mock_futu.get_watchlist.return_value = FetchResult.ok(
+            [
+                WatchlistInfo(Market.HK, "00700", "腾讯控股", "全部"),
+                WatchlistInfo(Market.HK, "00700", "腾讯控股", "港股"),
+            ]
+        )
+
+        service = SyncService(futu_fetcher=mock_futu)
+        result = service.sync_watchlist(user_id=1, session=db_session)
+
+        assert result.details["reactivated"] == 1
+        assert result.records_skipped == 1
+        item = db_session.query(WatchlistItem).one()
+        assert item.is_active is True
+        assert item.stock_name == "腾讯控股"
+        assert item.group_name == "全部"
+
+
+class TestAccountSnapshots:
+    """Tests for _sync_account_snapshots method."""
+
+    def test_single_upsert_for_all_accounts(self):
+        """Test snapshots of all Futu accounts are written by one upsert."""
+        from sqlalchemy.dialects import postgresql
+
+        accounts = []
+        for acc_id, futu_acc_id in ((1, 111), (2, 0), (3, 333), (4, 444)):
+            account = MagicMock()
+            account.id = acc_id
+            account.futu_acc_id = futu_acc_id
+            accounts.append(account)
+
+        def account_info(acc_id):
+            if acc_id == 444:
+                return FetchResult.error("timeout")
+            return FetchResult.ok(
+                [
+                    AccountInfo(
+                        acc_id=acc_id,
+                        account_type=AccountType.REAL,
+                        market=Market.HK,
+                        cash=Decimal(acc_id),
+                    )
+                ]
+            )
+
+        mock_futu = MagicMock()
+        mock_futu.get_account_info.side_effect = account_info
+        mock_session = MagicMock()
+        # First snapshot is new, the second already existed for the date
+        mock_session.execute.return_value.scalars.return_value = [True, False]
+
+        service = SyncService(futu_fetcher=mock_futu)
+        created = service._sync_account_snapshots(
+            mock_session, accounts, date(2025, 12, 14)
+        )
+
+        assert created == 1
+        # Manual account (futu_acc_id=0) is never queried
+        assert sorted(
+            c.kwargs["acc_id"] for c in mock_futu.get_account_info.call_args_list
+        ) == [111, 333, 444]
+        mock_session.execute.assert_called_once()
+        stmt = mock_session.execute.call_args.args[0]
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        assert "ON CONFLICT ON CONSTRAINT uq_account_snapshots_account_date" in str(
+            compiled
+        )
+        assert compiled.params["account_id_m0"] == 1
+        assert compiled.params["account_id_m1"] == 3
+
+    def test_no_futu_accounts(self):
+        """Test manual-only accounts skip the fetch and the write."""
+        account = MagicMock()
+        account.futu_acc_id = 0
+        mock_futu = MagicMock()
+        mock_session = MagicMock()
+
+        service = SyncService(futu_fetcher=mock_futu)
+        created = service._sync_account_snapshots(
+            mock_session, [account], date(2025, 12, 14)
+        )
+
+        assert created == 0
+        mock_futu.get_account_info.assert_not_called()
+        mock_session.execute.assert_not_called()
 
 
 class TestSyncServicePositionKlines:
@@ -347,11 +719,8 @@ class TestSyncServicePositionKlines:
     def test_sync_position_klines(self, mock_get_session):
         """Test syncing K-lines for positions."""
         mock_session = MagicMock()
-        mock_position = MagicMock()
-        mock_position.market = "HK"
-        mock_position.code = "00700"
-        mock_session.scalars.return_value.all.return_value = [mock_position]
-        mock_session.scalars.return_value.first.return_value = None
+        # DISTINCT (market, code) projection of today's positions
+        mock_session.execute.return_value.all.return_value = [("HK", "00700")]
         mock_get_session.return_value.__enter__ = MagicMock(return_value=mock_session)
         mock_get_session.return_value.__exit__ = MagicMock(return_value=False)
 
@@ -363,6 +732,7 @@ class TestSyncServicePositionKlines:
 
         assert result.success is True
         assert result.sync_type == "KLINES"
+        assert mock_kline.fetch.call_args.kwargs["code"] == "HK.00700"
 
 
 class TestSyncServiceAll:
@@ -441,6 +811,93 @@ class TestSyncServiceAll:
         assert "position_klines" not in results
         assert "watchlist_klines" not in results
 
+    @patch("services.sync_service.get_session")
+    def test_sync_all_looks_up_accounts_once(self, mock_get_session):
+        """Test sync_all resolves user and accounts once for all syncs."""
+        mock_session = MagicMock()
+        mock_account = MagicMock()
+        mock_account.id = 1
+        mock_account.futu_acc_id = 123456
+
+        mock_session.get.return_value = MagicMock()
+        mock_session.scalars.return_value.all.return_value = [mock_account]
+        mock_get_session.return_value.__enter__ = MagicMock(return_value=mock_session)
+        mock_get_session.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_futu = MagicMock()
+        mock_futu.get_positions.return_value = FetchResult.ok([])
+        mock_futu.get_history_deals.return_value = FetchResult.ok([])
+        mock_futu.get_account_info.return_value = FetchResult.ok([])
+
+        service = SyncService(futu_fetcher=mock_futu)
+        with patch.object(
+            service, "_get_active_accounts", wraps=service._get_active_accounts
+        ) as lookup:
+            results = service.sync_all(user_id=1, include_klines=False)
+
+        assert results["positions"].success is True
+        assert results["trades"].success is True
+        lookup.assert_called_once_with(mock_session, 1)
+        assert mock_session.get.call_count == 1
+        mock_futu.get_positions.assert_called_once()
+        mock_futu.get_history_deals.assert_called_once()
+
+    def test_sync_all_merges_kline_codes(self, db_session):
+        """Test codes both held and watched are synced once, in sorted order."""
+        from db.models import Position, WatchlistItem
+
+        for code in ("00700", "09988"):
+            db_session.add(
+                Position(
+                    account_id=1,
+                    snapshot_date=date.today(),
+                    market="HK",
+                    code=code,
+                    qty=Decimal("100"),
+                )
+            )
+        db_session.add(WatchlistItem(user_id=1, market="HK", code="00700"))
+        db_session.add(WatchlistItem(user_id=1, market="US", code="AAPL"))
+        db_session.commit()
+
+        service = SyncService(futu_fetcher=MagicMock(), kline_fetcher=MagicMock())
+        ok = SyncResult.ok("KLINES", records_synced=0)
+        with (
+            patch.object(service, "sync_positions", return_value=ok),
+            patch.object(service, "sync_trades", return_value=ok),
+            patch.object(service, "sync_klines", return_value=ok) as sync_klines,
+        ):
+            results = service.sync_all(user_id=1, kline_days=60, session=db_session)
+
+        assert results["klines"] is ok
+        sync_klines.assert_called_once_with(
+            ["HK.00700", "HK.09988", "US.AAPL"],
+            days=60,
+            user_id=1,
+            session=db_session,
+        )
+
+    def test_sync_all_disables_autoflush(self, db_session):
+        """Test sync_all runs without autoflush and flushes once at the end."""
+        ok = SyncResult.ok("POSITIONS", records_synced=0)
+        seen = []
+
+        def record_autoflush(*args, **kwargs):
+            seen.append(db_session.autoflush)
+            return ok
+
+        service = SyncService(futu_fetcher=MagicMock())
+        with (
+            patch.object(service, "sync_positions", side_effect=record_autoflush),
+            patch.object(service, "sync_trades", side_effect=record_autoflush),
+            patch.object(db_session, "flush", wraps=db_session.flush) as flush,
+        ):
+            service.sync_all(user_id=1, include_klines=False, session=db_session)
+
+        assert seen == [False, False]
+        assert db_session.autoflush is True
+        flush.assert_called_once_with()
+
 
 class TestSyncServiceLastSync:
     """Tests for get_last_sync method."""
@@ -475,6 +932,50 @@ class TestSyncServiceLastSync:
 
         assert result is None
 
+    def test_get_last_sync_served_from_cache(self, db_session):
+        """Test a committed sync log is returned without querying."""
+        service = SyncService()
+        log = service._log_sync(
+            db_session, "POSITIONS", "SUCCESS", 3, datetime.now(), user_id=1
+        )
+        db_session.commit()
+
+        with patch.object(db_session, "scalars") as scalars:
+            result = service.get_last_sync(1, "POSITIONS", session=db_session)
+
+        scalars.assert_not_called()
+        assert result is not log
+        assert result.id == log.id
+        assert result.records_count == 3
+        assert result.created_at == log.created_at
+
+    def test_get_last_sync_not_cached_before_commit(self, db_session):
+        """Test an uncommitted log is not served, and a rollback drops it."""
+        service = SyncService()
+        service._log_sync(
+            db_session, "POSITIONS", "SUCCESS", 3, datetime.now(), user_id=1
+        )
+        assert service._last_sync_cache == {}
+
+        db_session.rollback()
+        db_session.commit()
+
+        assert service._last_sync_cache == {}
+        assert service.get_last_sync(1, "POSITIONS", session=db_session) is None
+
+    def test_get_last_sync_cache_expires(self, db_session):
+        """Test expired cache entries fall through to the database."""
+        service = SyncService()
+        service._log_sync(db_session, "TRADES", "SUCCESS", 1, datetime.now(), user_id=1)
+        db_session.commit()
+
+        scalars = patch.object(db_session, "scalars", wraps=db_session.scalars)
+        with patch("services.sync_service.LAST_SYNC_CACHE_TTL", 0), scalars as spy:
+            result = service.get_last_sync(1, "TRADES", session=db_session)
+
+        assert result.records_count == 1
+        spy.assert_called_once()
+
 
 class TestCreateSyncService:
     """Tests for create_sync_service factory function."""
@@ -1,5 +1,7 @@
 """Tests for VCP (Volatility Contraction Pattern) indicator."""
 
+from unittest.mock import patch
+
 import numpy as np
 import pandas as pd
 import pytest
@@ -287,6 +289,23 @@ class TestVCP:
         # Should have signals
         assert len(vcp_result.signals) > 0
 
+    def test_calculate_reuses_given_arrays(self):
+        """Test precomputed column arrays give the same result as the df."""
+        df = create_vcp_pattern_df()
+        arrays = {
+            col.capitalize(): df[col].to_numpy(dtype=np.float64)
+            for col in ("high", "low", "close", "volume")
+        }
+        vcp = VCP()
+
+        expected = vcp.calculate(df).values
+        with patch.object(vcp, "_get_column") as mock_get_column:
+            result = vcp.calculate(df, arrays=arrays).values
+
+        mock_get_column.assert_not_called()
+        assert result.to_dict() == expected.to_dict()
+        assert result.contraction_count >= 1
+
     def test_non_vcp_pattern(self):
         """Test that non-VCP data is not detected as VCP."""
         df = create_non_vcp_df()
@@ -321,6 +340,26 @@ class TestVCP:
         # All indices should be valid
         assert all(0 <= idx < len(low) for idx in swing_lows)
 
+    def test_swing_detection_matches_per_bar_scan(self):
+        """Test vectorized swing detection equals the per-bar window scan."""
+        df = create_sample_df()
+        df.iloc[40, df.columns.get_loc("high")] = np.nan
+        vcp = VCP()
+        period = vcp.config.swing_period
+
+        def per_bar(series, pick):
+            found = []
+            for i in range(period, len(series) - period):
+                window = series.iloc[i - period : i + period + 1]
+                if series.iloc[i] == pick(window):
+                    if not found or i - found[-1] >= vcp.config.min_swing_distance:
+                        found.append(i)
+            return found
+
+        assert vcp._find_swing_highs(df["high"]) == per_bar(df["high"], pd.Series.max)
+        assert vcp._find_swing_lows(df["low"]) == per_bar(df["low"], pd.Series.min)
+        assert vcp._find_swing_highs(df["high"].iloc[:5]) == []
+
     def test_check_depth_decrease(self):
         """Test depth decrease checking."""
         vcp = VCP()